@@ -0,0 +1,340 @@
+""" BatchRunner.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import json
+from os.path import join
+from queue import Queue
+from threading import Thread
+from time import perf_counter
+from DBClient import DBClient
+from OutputWriter import OutputWriter
+from SQLScriptSplitter import SQLScriptSplitter
+from functions import print_stacktrace
+
+# Prefix of the comment line setting bind variables for the next statement.
+# Followed by JSON: an object for named and pyformat bind variables, an array
+# for qmark.  For example:
+#   --@bind {"actor": "CHEVY FOSTER", "price": 35.0}
+BIND_DIRECTIVE = '--@bind'
+
+# Output formats.
+TEXT = 'text'
+JSONL = 'jsonl'
+OUT_FILE_EXT = {TEXT: 'txt', JSONL: 'jsonl'}
+
+# Results waiting to be written, when pipelined.
+PIPELINE_DEPTH = 2
+
+
+def parse_directives(statement: str) -> (str, object):
+    """ Remove leading blank and comment lines from a statement, reading any
+        bind variables directive in them.
+
+    Parameters:
+        statement (str): text of a statement, from SQLScriptSplitter.
+    Returns:
+        sql (str): the statement without its leading comment lines, or '' if
+            nothing is left.
+        bind_vars: dict or tuple of bind variables, or None if no directive.
+        A directive that is not valid JSON raises ValueError.
+    """
+    bind_vars = None
+    lines = statement.split('\n')
+    while len(lines) > 0:
+        line = lines[0].strip()
+        if line.startswith(BIND_DIRECTIVE):
+            bind_vars = json.loads(line[len(BIND_DIRECTIVE):])
+            if isinstance(bind_vars, list):
+                bind_vars = tuple(bind_vars)
+        elif line != '' and not line.startswith('--'):
+            break
+        del lines[0]
+    sql = '\n'.join(lines).strip()
+    return sql, bind_vars
+# End of function parse_directives.
+
+
+class BatchRunner(object):
+    """ Run all the statements in a SQL script over one connection, without
+        prompting, writing each result set to its own output target, and
+        timing each statement.
+
+    Attributes:
+        db_instance: the DBInstance to run the statements on.
+        db_client: the DBClient running the statements.
+        out_dir (str): folder for one output file per statement, or '' for
+            standard output.
+        out_format (str): TEXT (like OutputWriter.write_rows) or JSONL.
+        col_sep (str): character(s) to separate columns in TEXT output.
+        align_col (bool): pad values with spaces to align columns in TEXT.
+        pipelined (bool): if True, the next statement is executed while the
+            result of the previous one is being written.
+        timeout (float): seconds a statement may run before it is
+            cancelled, None for no limit.
+        timings (list): one dict per statement run: number, sql, rows,
+            run_secs, write_secs, out_file_name, error.
+    """
+    def __init__(self,
+                 db_instance,
+                 out_dir: str = '',
+                 out_format: str = TEXT,
+                 col_sep: str = '|',
+                 align_col: bool = True,
+                 pipelined: bool = False,
+                 timeout: float = None) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance to run the statements on.
+            out_dir (str): folder for one output file per statement, or ''
+                for standard output.
+            out_format (str): TEXT or JSONL.
+            col_sep (str): character(s) to separate columns in TEXT output.
+            align_col (bool): pad values with spaces to align columns in TEXT.
+            pipelined (bool): if True, execute the next statement while the
+                result of the previous one is being written.
+            timeout (float): seconds a statement may run before it is
+                cancelled and counted as failed, None for no limit.
+        Returns:
+        """
+        if out_format not in OUT_FILE_EXT:
+            print('Invalid output format "{}".'.format(out_format))
+            exit(1)
+        self.db_instance = db_instance
+        self.db_client = DBClient(db_instance)
+        self.timeout = timeout
+        self.db_client.set_timeout(timeout)
+        self.out_dir: str = out_dir
+        self.out_format: str = out_format
+        self.col_sep: str = col_sep
+        self.align_col: bool = align_col
+        self.pipelined: bool = pipelined
+        self.timings: list = list()
+        return
+    # End of method __init__.
+
+    def clean_up(self) -> None:
+        """ Cleans up, in preparation for deletion.
+
+        Parameters:
+        Returns:
+        """
+        self.db_client.clean_up()
+        return
+    # End of method clean_up.
+
+    def read_script(self, script_path: str):
+        """ Read the statements in a SQL script, with their bind variables,
+            split as the database type's command line client would split them.
+            Statements are read one at a time, never the whole script at once.
+
+        Parameters:
+            script_path (str): relative or absolute path to the script.
+        Returns:
+            sql (str), bind_vars: yields each statement and its bind
+                variables (None if it has none, the ValueError if its bind
+                variables directive is not valid JSON).
+        """
+        splitter = SQLScriptSplitter(self.db_instance.get_db_type())
+        for statement in splitter.split_file(script_path):
+            try:
+                sql, bind_vars = parse_directives(statement)
+            except ValueError as e:
+                # Counted as a failed statement by run_statements.
+                yield statement.strip(), e
+                continue
+            if sql != '':
+                yield sql, bind_vars
+        return
+    # End of method read_script.
+
+    def run_script(self, script_path: str) -> int:
+        """ Run all the statements in a SQL script.
+
+        Parameters:
+            script_path (str): relative or absolute path to the script.
+        Returns:
+            failures (int): number of statements that failed.
+        """
+        return self.run_statements(self.read_script(script_path))
+    # End of method run_script.
+
+    def run_statements(self, statements) -> int:
+        """ Run statements, writing each result set to its own output target.
+
+        Parameters:
+            statements: iterable of (sql, bind_vars) tuples, bind_vars None
+                for no bind variables, or a ValueError from reading them,
+                which fails the statement without running it.
+        Returns:
+            failures (int): number of statements that failed.
+        """
+        if self.pipelined:
+            pipeline = Queue(maxsize=PIPELINE_DEPTH)
+            writer = Thread(target=self._write_pipeline, args=(pipeline,))
+            writer.start()
+        else:
+            pipeline = None
+            writer = None
+
+        try:
+            for number, (sql, bind_vars) in enumerate(statements, start=1):
+                timing = {'number': number, 'sql': sql, 'rows': 0,
+                          'run_secs': 0.0, 'write_secs': 0.0,
+                          'out_file_name': '', 'error': ''}
+                self.timings.append(timing)
+                if isinstance(bind_vars, ValueError):
+                    timing['error'] = 'Invalid {} line: {}'.format(
+                        BIND_DIRECTIVE, bind_vars)
+                    print('STATEMENT {} FAILED: {}'.format(number,
+                                                         timing['error']))
+                    continue
+                self.db_client.set_sql(sql)
+                if bind_vars is None:
+                    bind_vars = self.db_instance.init_bind_vars()
+                self.db_client.set_bind_vars(bind_vars)
+
+                start = perf_counter()
+                if (not self.pipelined and self.out_format == JSONL and
+                        self.db_client.get_sql_type() == 'SELECT'):
+                    # Stream rows straight to the output, never all in memory.
+                    col_names, batches = self.db_client.run_sql_stream()
+                    timing['run_secs'] = perf_counter() - start
+                    if self.db_client.last_error is None:
+                        execute_secs = timing['run_secs']
+                        batches = self._timed_batches(timing, batches)
+                        rows = (row for batch in batches for row in batch)
+                        self._write(timing, col_names, rows, perf_counter())
+                        # Fetching the rows is run time, not write time.
+                        timing['write_secs'] -= (timing['run_secs'] -
+                                                 execute_secs)
+                else:
+                    col_names, rows, row_count = self.db_client.run_sql()
+                    timing['run_secs'] = perf_counter() - start
+                    timing['rows'] = row_count
+                    if len(col_names) > 0:
+                        if pipeline is not None:
+                            pipeline.put((timing, col_names, rows))
+                        else:
+                            self._write(timing, col_names, rows, perf_counter())
+
+                if self.db_client.last_error is not None:
+                    timing['error'] = str(self.db_client.last_error)
+        finally:
+            if pipeline is not None:
+                pipeline.put(None)
+                writer.join()
+        failures = len([t for t in self.timings if t['error'] != ''])
+        return failures
+    # End of method run_statements.
+
+    @staticmethod
+    def _timed_batches(timing: dict, batches):
+        """ Pass on streamed batches of rows, adding the time taken to fetch
+            each to the run time of the statement.
+
+        Parameters:
+            timing (dict): timings of the statement, updated here.
+            batches: iterable of lists of rows, from run_sql_stream.
+        Returns:
+            batch (list): yields each batch of rows.
+        """
+        batches = iter(batches)
+        while True:
+            start = perf_counter()
+            try:
+                batch = next(batches)
+            except StopIteration:
+                return
+            finally:
+                timing['run_secs'] += perf_counter() - start
+            yield batch
+    # End of method _timed_batches.
+
+    def _write_pipeline(self, pipeline: Queue) -> None:
+        """ Thread writing result sets while the next statements run.
+
+        Parameters:
+            pipeline (Queue): (timing, col_names, rows) tuples, None at end.
+        Returns:
+        """
+        while True:
+            item = pipeline.get()
+            if item is None:
+                break
+            timing, col_names, rows = item
+            try:
+                self._write(timing, col_names, rows, perf_counter())
+            except Exception:
+                print_stacktrace()
+                timing['error'] = 'Failed to write output.'
+        return
+    # End of method _write_pipeline.
+
+    def _write(self, timing: dict, col_names: list, rows, start: float) -> None:
+        """ Write one result set to its output target.
+
+        Parameters:
+            timing (dict): timings of the statement, updated here.
+            col_names (list): list of column names.
+            rows: list (or for JSONL, any iterable) of tuples, each a row.
+            start (float): perf_counter when the writing started.
+        Returns:
+        """
+        if self.out_dir == '':
+            out_file_name = ''
+            print('\nOUTPUT OF STATEMENT {}:'.format(timing['number']))
+        else:
+            out_file_name = 'stmt_{:04d}.{}'.format(
+                timing['number'], OUT_FILE_EXT[self.out_format])
+            out_file_name = join(self.out_dir, out_file_name)
+        writer = OutputWriter(out_file_name=out_file_name,
+                              align_col=self.align_col, col_sep=self.col_sep)
+        if self.out_format == JSONL:
+            row_count = writer.write_rows_jsonl(rows, col_names)
+            timing['rows'] = row_count
+        else:
+            writer.write_rows(rows, col_names)
+            if out_file_name == '':
+                print()
+        writer.close_output_file()
+        timing['out_file_name'] = out_file_name
+        timing['write_secs'] = perf_counter() - start
+        return
+    # End of method _write.
+
+    def print_report(self) -> None:
+        """ Print the timing of each statement run.
+
+        Parameters:
+        Returns:
+        """
+        col_names = ['#', 'RUN_SECS', 'WRITE_SECS', 'ROWS', 'STATUS', 'SQL']
+        rows = list()
+        for t in self.timings:
+            sql = ' '.join(t['sql'].split())
+            if len(sql) > 60:
+                sql = sql[:57] + '...'
+            status = 'OK' if t['error'] == '' else 'FAILED'
+            rows.append((t['number'], '{:.4f}'.format(t['run_secs']),
+                         '{:.4f}'.format(t['write_secs']), t['rows'],
+                         status, sql))
+        print('\nSTATEMENT TIMINGS:')
+        if len(rows) == 0:
+            print('No statements run.')
+            return
+        writer = OutputWriter(out_file_name='', align_col=True, col_sep='|')
+        writer.write_rows(rows, col_names)
+        total = sum(t['run_secs'] + t['write_secs'] for t in self.timings)
+        print('\nTotal: {:.4f} seconds for {} statements.'.format(
+            total, len(self.timings)))
+        return
+    # End of method print_report.
+# End of Class BatchRunner.
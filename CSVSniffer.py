@@ -0,0 +1,239 @@
+""" CSVSniffer.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import codecs
+import csv
+import re
+from os.path import getsize
+from time import perf_counter
+
+# Bytes read from the start of the file, and again from its middle.
+DEFAULT_SAMPLE_BYTES = 64 * 1024
+
+# Characters csv.Sniffer is given, it is slow on long samples.
+SNIFFER_CHARS = 8 * 1024
+
+# Delimiters looked for, in order of preference when equally likely.
+DELIMITERS = (',', '\t', ';', '|', ':')
+
+# Byte order marks, longest first, with the codec of the data after them and
+# the codec for opening the file in text mode, which drops the mark.
+BOMS = ((codecs.BOM_UTF32_LE, 'utf-32-le', 'utf-32'),
+        (codecs.BOM_UTF32_BE, 'utf-32-be', 'utf-32'),
+        (codecs.BOM_UTF8, 'utf8', 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16-le', 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16-be', 'utf-16'))
+
+# Bytes with no character in cp1252.
+NOT_CP1252 = re.compile(b'[\x81\x8d\x8f\x90\x9d]')
+
+
+class CSVSniffer(object):
+    """ Detect the format of a CSV file from a bounded sample, its first and
+        middle blocks, so even huge files are sniffed in milliseconds: byte
+        order mark and encoding, delimiter, quote character, header and line
+        terminator.  The delimiter is the candidate found the same number of
+        times, outside quotes, on the most lines of the sample (byte
+        frequency statistics), with csv.Sniffer breaking ties and choosing
+        the quote character and header.
+
+    Attributes:
+        path (str): the CSV file.
+        size (int): size of the file in bytes.
+        bom (bytes): the byte order mark, b'' if none.
+        encoding (str): codec of the data after the byte order mark.
+        text_encoding (str): codec for opening the file in text mode, which
+            drops the byte order mark.
+        ascii_compatible (bool): True if the encoding stores ASCII as single
+            bytes, as MmapCSVReader requires.
+        delimiter (str): the column delimiter.
+        quotechar (str): the quote character.
+        doublequote (bool): True if quotes in quoted fields are doubled.
+        has_header (bool): True if the first line looks like column headings.
+        line_terminator (str): '\\r\\n', '\\n' or '\\r'.
+        secs (float): seconds taken to sniff.
+    """
+    def __init__(self, path: str,
+                 sample_bytes: int = DEFAULT_SAMPLE_BYTES) -> None:
+        """ Constructor method for this class, sniffs the file.
+
+        Parameters:
+            path (str): the CSV file.
+            sample_bytes (int): bytes read from the start of the file, and
+                again from its middle.
+        Returns:
+        """
+        start = perf_counter()
+        self.path: str = path
+        self.size: int = getsize(path)
+        self.bom: bytes = b''
+        self.encoding: str = 'utf8'
+        self.text_encoding: str = 'utf8'
+        self.ascii_compatible: bool = True
+        self.delimiter: str = ','
+        self.quotechar: str = '"'
+        self.doublequote: bool = True
+        self.has_header: bool = True
+        self.line_terminator: str = '\n'
+
+        blocks = self._sample(max(1024, sample_bytes))
+        self._sniff_encoding(blocks)
+        if self.bom != b'':
+            blocks[0] = blocks[0][len(self.bom):]
+        texts = [block.decode(self.encoding, errors='replace')
+                 for block in blocks]
+        self._sniff_line_terminator(texts[0])
+        self._sniff_dialect(texts)
+        self.secs: float = perf_counter() - start
+        return
+    # End of method __init__.
+
+    def _sample(self, sample_bytes: int) -> list:
+        """ Read the first block of the file, and a block from its middle
+            starting after a line break, each cut at its last line break.
+
+        Parameters:
+            sample_bytes (int): bytes in each block.
+        Returns:
+            blocks (list): one or two blocks of bytes.
+        """
+        with open(self.path, 'rb') as f:
+            blocks = [f.read(sample_bytes)]
+            if self.size > 2 * sample_bytes:
+                f.seek(self.size // 2)
+                block = f.read(sample_bytes)
+                # Skip the partial first line.
+                blocks.append(block[block.find(b'\n') + 1:])
+        if self.size > sample_bytes:
+            blocks = [block[:block.rfind(b'\n') + 1] or block
+                      for block in blocks]
+        return blocks
+    # End of method _sample.
+
+    def _sniff_encoding(self, blocks: list) -> None:
+        """ Set bom, encoding, text_encoding and ascii_compatible.  Without a
+            byte order mark: UTF-8 if every block of the sample decodes as
+            UTF-8, else cp1252 if no block has bytes cp1252 leaves undefined,
+            else latin-1.
+
+        Parameters:
+            blocks (list): the blocks of the sample, the first block of the
+                file first.
+        Returns:
+        """
+        for bom, encoding, text_encoding in BOMS:
+            if blocks[0].startswith(bom):
+                self.bom = bom
+                self.encoding = encoding
+                self.text_encoding = text_encoding
+                self.ascii_compatible = (encoding == 'utf8')
+                return
+        for block in blocks:
+            try:
+                block.decode('utf8')
+            except UnicodeDecodeError as e:
+                # A character cut by the end of the block is still UTF-8.
+                if e.reason != 'unexpected end of data':
+                    break
+        else:
+            return
+        if all(NOT_CP1252.search(block) is None for block in blocks):
+            self.encoding = 'cp1252'
+        else:
+            self.encoding = 'latin-1'
+        self.text_encoding = self.encoding
+        return
+    # End of method _sniff_encoding.
+
+    def _sniff_line_terminator(self, text: str) -> None:
+        """ Set line_terminator, the most common in the sample.
+
+        Parameters:
+            text (str): the first block of the file, decoded.
+        Returns:
+        """
+        crlf = text.count('\r\n')
+        lf = text.count('\n') - crlf
+        cr = text.count('\r') - crlf
+        if crlf >= lf and crlf >= cr and crlf > 0:
+            self.line_terminator = '\r\n'
+        elif cr > lf:
+            self.line_terminator = '\r'
+        return
+    # End of method _sniff_line_terminator.
+
+    def _sniff_dialect(self, texts: list) -> None:
+        """ Set delimiter, quotechar, doublequote and has_header.
+
+        Parameters:
+            texts (list): the blocks of the sample, decoded.
+        Returns:
+        """
+        head = texts[0][:SNIFFER_CHARS]
+        cut = head.rfind(self.line_terminator)
+        if cut > 0 and len(texts[0]) > SNIFFER_CHARS:
+            head = head[:cut]
+        sniffed = None
+        try:
+            sniffed = csv.Sniffer().sniff(head, delimiters=''.join(DELIMITERS))
+            self.quotechar = sniffed.quotechar or '"'
+            self.doublequote = sniffed.doublequote
+        except csv.Error:
+            pass
+
+        # Count the candidates on each line, outside quoted fields.
+        q = re.escape(self.quotechar)
+        quoted = re.compile(q + '[^' + q + ']*' + q)
+        lines = [line for text in texts
+                 for line in quoted.sub('', text).splitlines() if line]
+        if len(lines) == 0:
+            return
+        best, best_score = None, (0, 0)
+        for delimiter in DELIMITERS:
+            counts = dict()
+            for line in lines:
+                count = line.count(delimiter)
+                counts[count] = counts.get(count, 0) + 1
+            count, lines_with = max(counts.items(),
+                                    key=lambda item: (item[1], item[0]))
+            if count == 0:
+                continue
+            # Lines with the usual count, then the count itself.
+            score = (lines_with, count)
+            if score > best_score or (
+                    score == best_score and sniffed is not None and
+                    delimiter == sniffed.delimiter):
+                best, best_score = delimiter, score
+        if best is not None:
+            self.delimiter = best
+        elif sniffed is not None and sniffed.delimiter in DELIMITERS:
+            self.delimiter = sniffed.delimiter
+
+        try:
+            self.has_header = csv.Sniffer().has_header(head)
+        except csv.Error:
+            pass
+        return
+    # End of method _sniff_dialect.
+
+    def describe(self) -> str:
+        """ Describe what was found, for printing.
+
+        Parameters:
+        Returns:
+            description (str): the description.
+        """
+        z = 'Encoding {}{}, delimiter {}, quote {}, line terminator {}, {}.'
+        return z.format(self.encoding, ' with BOM' if self.bom else '',
+                        repr(self.delimiter), repr(self.quotechar),
+                        repr(self.line_terminator),
+                        'header' if self.has_header else 'no header')
+    # End of method describe.
+# End of Class CSVSniffer.
@@ -0,0 +1,481 @@
+""" CmdlineSession.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+from collections import deque
+from queue import Queue, Empty
+from subprocess import Popen, PIPE, TimeoutExpired
+from threading import Thread, Timer, RLock
+from uuid import uuid4
+from functions import MYSQLSH_PASSWORD_WARNING
+from constants import MYSQL
+import constants as c
+
+# Seconds a session may sit unused before its client is shut down.
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+class CmdlineSession(object):
+    """ One long-lived db command line client (sqlplus, psql, sqlcmd, sqlite3
+        or mysqlsh) for one DBInstance, so that running many statements
+        through it pays for process startup and login only once.
+
+        After the SQL of each call, the client is told to print a marker line
+        (constants.DB_CLIENT_ECHO), and the output of the call is everything
+        the client prints before that marker.  The client must flush its
+        output when writing to a pipe.
+
+    Attributes:
+        db_instance: the DBInstance whose command line client this is.
+        idle_timeout (float): seconds unused before the client is shut down,
+            None to keep it running until close is called.
+        process: the client subprocess, None when not running.
+        stdout_queue (Queue): lines read from the client's stdout, None when
+            the client exits.
+        stderr (list): lines read from the client's stderr, not yet reported.
+        lock (RLock): so only one statement at a time is sent to the client.
+        idle_timer (Timer): shuts down the client after idle_timeout.
+        marker_base (str): unique start of this session's marker lines.
+        marker_count (int): number of marker lines requested so far.
+        stream_marker (str): marker ending the output still to be read, ''
+            if none.
+        stream_sql (str): the SQL whose output is still to be read.
+        stream_timeout (float): seconds to wait for each line of it.
+    """
+    def __init__(self, db_instance,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance whose command line client to run.
+            idle_timeout (float): seconds unused before the client is shut
+                down, None to keep it running until close is called.
+        Returns:
+        """
+        self.db_instance = db_instance
+        self.db_type: str = db_instance.get_db_type()
+        self.idle_timeout = idle_timeout
+        self.process = None
+        self.stdout_queue = None
+        self.stderr: list = list()
+        self.lock = RLock()
+        self.idle_timer = None
+        self.marker_base: str = '__DBCLIENT_END_{}_'.format(uuid4().hex)
+        self.marker_count: int = 0
+        self.stream_marker: str = ''
+        self.stream_sql: str = ''
+        self.stream_timeout = None
+        return
+    # End of method __init__.
+
+    def is_running(self) -> bool:
+        """ Whether the client subprocess is running.
+
+        Parameters:
+        Returns:
+            running (bool): True if running.
+        """
+        return self.process is not None and self.process.poll() is None
+    # End of method is_running.
+
+    def start(self) -> bool:
+        """ Start the client subprocess, if not running, and discard its
+            startup banner.
+
+        Parameters:
+        Returns:
+            started (bool): False if the client could not be started.
+        """
+        with self.lock:
+            if self.is_running():
+                return True
+            cmdline_list = self.db_instance.get_cmdline_list()
+            if cmdline_list[0] == 'Error':
+                print(cmdline_list[1])
+                return False
+
+            self.process = Popen(cmdline_list, stdin=PIPE, stdout=PIPE,
+                                 stderr=PIPE, encoding='utf-8',
+                                 errors='replace', bufsize=1)
+            self.stdout_queue = Queue()
+            Thread(target=self._read_stdout, args=(self.process,
+                   self.stdout_queue), daemon=True).start()
+            Thread(target=self._read_stderr, args=(self.process,),
+                   daemon=True).start()
+
+            # Discard the banner, plus any output of the setup commands.
+            # Never through run_stream, which would start a client that has
+            # already exited again, and again.
+            setup = c.DB_CLIENT_SETUP[self.db_type]
+            marker = self._send(setup)
+            if marker is not None:
+                for _ in self._read_stream(setup, marker, None):
+                    pass
+            return self.is_running()
+    # End of method start.
+
+    def _read_stdout(self, process, stdout_queue: Queue) -> None:
+        """ Thread copying the client's stdout to stdout_queue, with None at
+            the end.
+
+        Parameters:
+            process: the client subprocess.
+            stdout_queue (Queue): where to put lines of output.
+        Returns:
+        """
+        for line in process.stdout:
+            stdout_queue.put(line.rstrip('\r\n'))
+        stdout_queue.put(None)
+        return
+    # End of method _read_stdout.
+
+    def _read_stderr(self, process) -> None:
+        """ Thread saving the client's stderr, minus the lines to ignore.
+
+        Parameters:
+            process: the client subprocess.
+        Returns:
+        """
+        for line in process.stderr:
+            line = line.rstrip('\r\n')
+            if line not in {'', MYSQLSH_PASSWORD_WARNING}:
+                self.stderr.append(line)
+        return
+    # End of method _read_stderr.
+
+    def run(self, sql: str, timeout: float = None) -> list:
+        """ Run SQL in the client, starting it if not running.
+
+        Parameters:
+            sql (str): text of the SQL to run, with the terminators the
+                client needs (";", "/", "go", etc).
+            timeout (float): seconds to wait for the output, None for no
+                limit.  On timeout, the client is killed.
+        Returns:
+            sql_output (list): rows of output.
+        """
+        return list(self.run_stream(sql, timeout))
+    # End of method run.
+
+    def run_stream(self, sql: str, timeout: float = None):
+        """ Run SQL in the client, starting it if not running, and yield its
+            output one line at a time, as the client writes it.
+
+            The lock is held only while a line is read, not while it is
+            yielded, so a paused generator blocks no one.  If another
+            statement is run, or the client is closed, before the generator
+            is finished, the rest of its output is discarded, and the
+            generator ends.
+
+        Parameters:
+            sql (str): text of the SQL to run, with the terminators the
+                client needs (";", "/", "go", etc).
+            timeout (float): seconds to wait for each line of output, None
+                for no limit.  On timeout, the client is killed.
+        Returns:
+            line (str): yields rows of output, without line endings.
+        """
+        with self.lock:
+            if not self.is_running() and not self.start():
+                return
+            marker = self._send(sql, timeout)
+        if marker is not None:
+            yield from self._read_stream(sql, marker, timeout)
+        return
+    # End of method run_stream.
+
+    def _send(self, sql: str, timeout: float = None):
+        """ Send SQL to the client, followed by the command printing a new
+            marker line.  Discards the rest of the output of an unfinished
+            run_stream first.
+
+        Parameters:
+            sql (str): text of the SQL to run.
+            timeout (float): seconds to wait for each line of its output,
+                None for no limit.
+        Returns:
+            marker (str): the marker line ending the output, None if the
+                client exited.
+        """
+        with self.lock:
+            self._end_stream()
+            self._cancel_idle_timer()
+            self.marker_count += 1
+            marker = '{}{}__'.format(self.marker_base, self.marker_count)
+            if sql != '' and not sql.endswith('\n'):
+                sql += '\n'
+            echo = c.DB_CLIENT_ECHO[self.db_type].format(marker)
+            try:
+                self.process.stdin.write(sql + echo)
+                self.process.stdin.flush()
+            except OSError:
+                print('THE {} CLIENT EXITED.'.format(self.db_type.upper()))
+                self._report_stderr(sql)
+                self.close()
+                return None
+            self.stream_marker = marker
+            self.stream_sql = sql
+            self.stream_timeout = timeout
+            return marker
+    # End of method _send.
+
+    def _read_stream(self, sql: str, marker: str, timeout: float):
+        """ Generator of the output of SQL sent by _send, up to its marker.
+            Ends quietly once the output is discarded by _end_stream.
+
+        Parameters:
+            sql (str): text of the SQL run, for reporting errors.
+            marker (str): the marker line ending the output.
+            timeout (float): seconds to wait for each line of output, None
+                for no limit.
+        Returns:
+            line (str): yields rows of output, without line endings.
+        """
+        # With mysqlsh, the marker is printed in a table, so hold back the
+        # lines that may be the top of that table.
+        hold = 3 if self.db_type == MYSQL else 0
+        held = deque()
+        try:
+            while True:
+                with self.lock:
+                    if self.stream_marker != marker:
+                        return
+                    line = self._next_line(timeout)
+                    if line is None:
+                        self.stream_marker = ''
+                        return
+                    if marker in line:
+                        self._finish_stream(sql)
+                        lines = self._without_mysql_table_top(held)
+                        held.clear()
+                if marker in line:
+                    for line in lines:
+                        yield line
+                    return
+                held.append(line)
+                if len(held) > hold:
+                    yield held.popleft()
+        finally:
+            # The caller stopped early: discard the rest of the output, so it
+            # is not read as the output of the next statement.
+            with self.lock:
+                if self.stream_marker == marker:
+                    self._end_stream()
+    # End of method _read_stream.
+
+    def _end_stream(self) -> None:
+        """ Discard the rest of the output of an unfinished run_stream.
+
+        Parameters:
+        Returns:
+        """
+        with self.lock:
+            marker = self.stream_marker
+            if marker != '' and self._drain(marker, self.stream_timeout):
+                self._finish_stream(self.stream_sql)
+            self.stream_marker = ''
+        return
+    # End of method _end_stream.
+
+    def _finish_stream(self, sql: str) -> None:
+        """ After the marker line: discard the rest of the mysqlsh marker
+            table, report stderr, and start the idle timer.
+
+        Parameters:
+            sql (str): text of the SQL run, for reporting errors.
+        Returns:
+        """
+        self.stream_marker = ''
+        if self.db_type == MYSQL:
+            self._skip_mysql_marker_table(None)
+        self._report_stderr(sql)
+        self._start_idle_timer()
+        return
+    # End of method _finish_stream.
+
+    def _next_line(self, timeout: float):
+        """ The next line of the client's output.  If there is none, because
+            of a timeout or because the client exited, say so and shut down
+            the client.
+
+        Parameters:
+            timeout (float): seconds to wait, None for no limit.
+        Returns:
+            line (str): the line, None if there is none.
+        """
+        if self.stdout_queue is None:
+            return None
+        try:
+            line = self.stdout_queue.get(timeout=timeout)
+        except Empty:
+            z = 'NO OUTPUT FROM THE {} CLIENT FOR {} SECONDS.'
+            print(z.format(self.db_type.upper(), timeout))
+            self.kill()
+            return None
+        if line is None:
+            print('THE {} CLIENT EXITED.'.format(self.db_type.upper()))
+            self.close()
+        return line
+    # End of method _next_line.
+
+    def _drain(self, marker: str, timeout: float) -> bool:
+        """ Discard the client's output up to and including the marker line.
+
+        Parameters:
+            marker (str): the marker line ending the output.
+            timeout (float): seconds to wait for each line, None for no limit.
+        Returns:
+            found (bool): False if the client was shut down first.
+        """
+        while True:
+            line = self._next_line(timeout)
+            if line is None:
+                return False
+            if marker in line:
+                return True
+    # End of method _drain.
+
+    @staticmethod
+    def _without_mysql_table_top(held) -> list:
+        """ The lines held back before the marker, minus the top of the table
+            mysqlsh prints the marker in: border, "| marker |" heading and
+            border.
+
+        Parameters:
+            held (deque): the lines held back.
+        Returns:
+            lines (list): the lines that are output of the statement.
+        """
+        lines = list(held)
+        if len(lines) >= 3 and lines[-3].startswith('+') and \
+                lines[-2].strip('| ') == 'marker' and \
+                lines[-1].startswith('+'):
+            del lines[-3:]
+        return lines
+    # End of method _without_mysql_table_top.
+
+    def _skip_mysql_marker_table(self, timeout: float) -> None:
+        """ Discard the rest of the table mysqlsh prints the marker in, up
+            to and including the "1 row in set" line.
+
+        Parameters:
+            timeout (float): seconds to wait for each line, None for no limit.
+        Returns:
+        """
+        while self.stdout_queue is not None:
+            try:
+                line = self.stdout_queue.get(timeout=timeout)
+            except Empty:
+                return
+            if line is None or line.startswith('1 row in set'):
+                return
+    # End of method _skip_mysql_marker_table.
+
+    def _report_stderr(self, sql: str) -> None:
+        """ Print the client's stderr since the last report, if any.
+
+        Parameters:
+            sql (str): text of the SQL just run.
+        Returns:
+        """
+        if len(self.stderr) > 0:
+            stderr = self.stderr[:]
+            del self.stderr[:len(stderr)]
+            print("PROBLEM IN CMDLINE_SESSION:")
+            print('sql: ', sql)
+            print('stderr: ', stderr)
+        return
+    # End of method _report_stderr.
+
+    def _start_idle_timer(self) -> None:
+        """ Start the timer that shuts down the client when idle.
+
+        Parameters:
+        Returns:
+        """
+        self._cancel_idle_timer()
+        if self.idle_timeout is not None and self.is_running():
+            self.idle_timer = Timer(self.idle_timeout, self._idle_close)
+            self.idle_timer.daemon = True
+            self.idle_timer.start()
+        return
+    # End of method _start_idle_timer.
+
+    def _cancel_idle_timer(self) -> None:
+        """ Stop the timer that shuts down the client when idle.
+
+        Parameters:
+        Returns:
+        """
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+        return
+    # End of method _cancel_idle_timer.
+
+    def _idle_close(self) -> None:
+        """ Shut down the client, unless it is busy.
+
+        Parameters:
+        Returns:
+        """
+        if self.lock.acquire(blocking=False):
+            try:
+                self.close()
+            finally:
+                self.lock.release()
+        return
+    # End of method _idle_close.
+
+    def close(self, wait: float = 5.0) -> None:
+        """ Shut down the client, killing it if it has not exited after
+            "wait" seconds.  The next call to run starts a new client.
+
+        Parameters:
+            wait (float): seconds to wait for the client to exit.
+        Returns:
+        """
+        with self.lock:
+            self._cancel_idle_timer()
+            self.stream_marker = ''
+            if self.process is None:
+                return
+            if self.process.poll() is None:
+                try:
+                    self.process.stdin.write(c.DB_CLIENT_EXIT[self.db_type])
+                    self.process.stdin.close()
+                except OSError:
+                    pass
+                try:
+                    self.process.wait(wait)
+                except TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+            self.process = None
+            self.stdout_queue = None
+        return
+    # End of method close.
+
+    def kill(self) -> None:
+        """ Kill the client right away, for when it is stuck.
+
+        Parameters:
+        Returns:
+        """
+        with self.lock:
+            self._cancel_idle_timer()
+            self.stream_marker = ''
+            if self.process is not None:
+                self.process.kill()
+                self.process.wait()
+                self.process = None
+                self.stdout_queue = None
+        return
+    # End of method kill.
+# End of Class CmdlineSession.
@@ -0,0 +1,124 @@
+""" ConnectionPool.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+from contextlib import contextmanager
+from queue import Queue, Empty
+from threading import Lock
+
+# Connections in a pool, when not specified.
+DEFAULT_POOL_SIZE = 4
+
+
+class ConnectionPool(object):
+    """ A fixed number of connections to one database, each in its own
+        DBInstance (from DBInstance.clone), lent to one thread at a time.
+        Connections are opened when first used, and kept open until close.
+
+    Attributes:
+        db_instance: the DBInstance whose database the pool connects to.
+        size (int): number of connections in the pool.
+        idle (Queue): DBInstances not lent out.
+        members (list): all DBInstances in the pool.
+        lock (Lock): protects closed.
+        closed (bool): True after close.
+    """
+    def __init__(self, db_instance, size: int = DEFAULT_POOL_SIZE) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance whose database to connect to.
+            size (int): number of connections in the pool.
+        Returns:
+        """
+        self.db_instance = db_instance
+        self.size: int = max(1, size)
+        self.idle = Queue()
+        self.members: list = list()
+        for _ in range(self.size):
+            member = db_instance.clone()
+            # Lent to one thread at a time, so one connection is enough.
+            member.set_thread_local(False)
+            self.members.append(member)
+            self.idle.put(member)
+        self.lock = Lock()
+        self.closed: bool = False
+        return
+    # End of method __init__.
+
+    def acquire(self, timeout: float = None):
+        """ Borrow a DBInstance from the pool, waiting until one is free.
+
+        Parameters:
+            timeout (float): seconds to wait, None for no limit.
+        Returns:
+            db_instance: the DBInstance, None if timed out or pool closed.
+        """
+        if self.closed:
+            print('The connection pool is closed.')
+            return None
+        try:
+            return self.idle.get(timeout=timeout)
+        except Empty:
+            print('No free connection after {} seconds.'.format(timeout))
+            return None
+    # End of method acquire.
+
+    def release(self, db_instance) -> None:
+        """ Return a borrowed DBInstance to the pool.  Any transaction left
+            open is rolled back.
+
+        Parameters:
+            db_instance: the DBInstance from acquire.
+        Returns:
+        """
+        if db_instance.connection is not None:
+            try:
+                db_instance.connection.rollback()
+            except db_instance.db_lib_obj.Error:
+                # Broken connection, reconnect when next used.
+                db_instance.connection = None
+        self.idle.put(db_instance)
+        return
+    # End of method release.
+
+    @contextmanager
+    def borrow(self, timeout: float = None):
+        """ Context manager: borrow a DBInstance for the "with" block.
+
+        Parameters:
+            timeout (float): seconds to wait, None for no limit.
+        Returns:
+            db_instance: yields the DBInstance, None if timed out.
+        """
+        db_instance = self.acquire(timeout)
+        try:
+            yield db_instance
+        finally:
+            if db_instance is not None:
+                self.release(db_instance)
+    # End of method borrow.
+
+    def close(self) -> None:
+        """ Close all the connections in the pool.  Connections lent out are
+            closed too, so call this when all threads using the pool are done.
+
+        Parameters:
+        Returns:
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        for member in self.members:
+            if member.connection is not None:
+                member.close_connection(del_cursors=True)
+        return
+    # End of method close.
+# End of Class ConnectionPool.
@@ -8,20 +8,55 @@ VERSION: 0.7.6
 
 DATE: Jul 9, 2020
 """
-from constants import ACCESS, ORACLE, SQLSERVER  # MYSQL, POSTGRESQL, SQLITE
+import re
+from threading import Lock, Timer
+from constants import ACCESS  # MYSQL, ORACLE, POSTGRESQL, SQLITE, SQLSERVER
+from constants import NAMED
 from OutputWriter import OutputWriter
 import MyQueries as mq
 from functions import print_stacktrace, pick_one, is_skip_operation
+from functions import data_type_group, portable_to_native
+from Row import column_index, set_row_factory, clear_row_factory, wrap_rows
+
+# Whitespace, comments and opening parentheses before the first word of SQL,
+# and the first word.
+LEADING_NOISE = re.compile(r'(?:\s+|--[^\n]*|/\*.*?\*/|\()*', re.DOTALL)
+FIRST_WORD = re.compile(r'\w*')
+# First words of queries that are not SELECT.
+QUERY_WORDS = {'WITH', 'VALUES'}
 
 
 class DBClient(object):
     """ Get text of a SQL program with bind variables, then execute it.
+        A DBClient is for one thread at a time, ideally the one that created
+        it: it stays on the connection its DBInstance gave that thread.
+        Threads can share a DBInstance, each with its own DBClients (see
+        DBInstance for the thread safety guarantees).
 
     Attributes:
         sql (str): the text of a SQL program with bind variables.
         bind_vars: dict or tuple containing bind variables.
         cursor: the cursor to execute this SQL on.
             I set cursor = None when cursor closed.
+        named_rows (bool): if True, SELECTs return Row objects instead of
+            tuples, accessible by column name as well as by item #.
+        last_error: the database library exception raised by the last
+            run_sql or run_sql_stream, None if it succeeded.
+        timeout (float): seconds a statement may run before it is cancelled,
+            None for no limit.
+        cancelled (bool): True if the last statement was cancelled, by
+            cancel or because it timed out.
+        timed_out (bool): True if the last statement timed out.
+        plan_cache: the PlanCache capturing the plan of each statement run,
+            None for none.
+        workload: the IndexAdvisor.Workload recording each statement run,
+            None for none.
+        local_cache: the LocalCache answering SELECTs that read only tables
+            copied into it, None for none.
+        cache_age (float): for the last SELECT, if answered by local_cache,
+            seconds since the oldest copy it read was refreshed, else None.
+        cache_stale (bool): True if the last SELECT was answered by
+            local_cache from a copy older than its time to live.
     """
     def __init__(self, db_instance) -> None:
         """ Constructor method for this class.
@@ -36,18 +71,49 @@ class DBClient(object):
         # Get database type.
         self.db_type = self.db_instance.get_db_type()
 
-        # Get database library.
-        self.db_lib_name = self.db_instance.get_db_lib_name()
-        db_library = __import__(self.db_lib_name)
-        self.db_library = db_library
-
-        # Get database cursor.
+        # Get database cursor, connecting if db_instance not yet connected.
+        # Later cursors use the same connection, whatever thread runs the SQL.
         self.cursor = self.db_instance.create_cursor(self)
+        self._connection = self.cursor.connection
+
+        # Get database library, already imported by db_instance.
+        self.db_lib_name = self.db_instance.get_db_lib_name()
+        self.db_library = self.db_instance.db_lib_obj
 
         # Initialize SQL text and bind variables.
         self.sql: str = ''
         self.bind_vars = self.db_instance.init_bind_vars()
         self.paramstyle = self.db_instance.get_paramstyle()
+
+        # No SQL has failed yet.
+        self.last_error = None
+
+        # No time limit, and nothing running to cancel.
+        self.timeout = None
+        self.cancelled: bool = False
+        self.timed_out: bool = False
+        self._running: bool = False
+        self._statement_num: int = 0
+        self._timer = None
+        self._lock = Lock()
+
+        # Do not capture plans, or record statements.
+        self.plan_cache = None
+        self.workload = None
+
+        # Run all SQL on the database, not on local copies.
+        self.local_cache = None
+        self.cache_age = None
+        self.cache_stale: bool = False
+        # SQL and values from set_portable_sql, None after set_sql.
+        self._portable = None
+
+        # Return rows as tuples, not Row objects.
+        self.named_rows: bool = False
+        # Column index of the current result set, when rows must be wrapped.
+        self._wrap_index = None
+        # The server-side cursor of run_sql_stream, None when not streaming.
+        self._stream_cursor = None
         return
     # End of method __init__.
 
@@ -63,6 +129,7 @@ class DBClient(object):
                 self.cursor.connection.commit()
             self.db_instance.delete_cursor(self)
             self.cursor = None
+        self._stream_cursor = None
         return
     # End of method clean_up.
 
@@ -74,9 +141,23 @@ class DBClient(object):
         Returns:
         """
         self.sql: str = sql
+        self._portable = None
+        self._end_stream()
         return
     # End of method set_sql.
 
+    def set_named_rows(self, named_rows: bool) -> None:
+        """ Set whether SELECTs return Row objects or tuples.
+
+        Parameters:
+            named_rows (bool): if True, return Row objects, accessible by
+                column name or attribute as well as by item #.
+        Returns:
+        """
+        self.named_rows = named_rows
+        return
+    # End of method set_named_rows.
+
     def set_bind_vars(self, bind_vars) -> None:
         """ Set bind variables.
 
@@ -89,6 +170,210 @@ class DBClient(object):
         return
     # End of method set_bind_vars.
 
+    def set_portable_sql(self, sql: str, values: dict = None) -> None:
+        """ Set text of SQL to execute, with bind variables written :name
+            whatever the parameter style of the database library, and their
+            values.  The SQL is translated into the parameter style of this
+            database once per text, then looked up.  In Microsoft Access, the
+            values are put into the SQL as literals.
+
+        Parameters:
+            sql (str): text of the SQL to execute, bind variables as :name.
+            values (dict): the value of each bind variable, by name.
+        Returns:
+        """
+        try:
+            self.sql, self.bind_vars = portable_to_native(
+                sql, self.paramstyle, values or dict())
+            self._portable = (sql, values)
+        except KeyError as e:
+            print('NO VALUE FOR BIND VARIABLE :{}.'.format(e.args[0]))
+            self.clean_up()
+            exit(1)
+        return
+    # End of method set_portable_sql.
+
+    def set_timeout(self, timeout: float) -> None:
+        """ Set how long a statement may run before it is cancelled.  For
+            run_sql, that is until all rows are fetched.  For run_sql_stream,
+            until the last batch is fetched, including the time the caller
+            spends on each batch.
+
+        Parameters:
+            timeout (float): seconds, None or 0 for no limit.
+        Returns:
+        """
+        self.timeout = timeout if timeout else None
+        return
+    # End of method set_timeout.
+
+    def set_plan_cache(self, plan_cache) -> None:
+        """ Capture the plan of each statement run with run_sql or
+            run_sql_stream, before running it, within its timeout.  In
+            PostgreSQL, the plan of a query comes from EXPLAIN ANALYZE, which
+            runs it, so each query runs twice.
+
+        Parameters:
+            plan_cache: a PlanCache, None to stop capturing plans.
+        Returns:
+        """
+        self.plan_cache = plan_cache
+        return
+    # End of method set_plan_cache.
+
+    def set_workload(self, workload) -> None:
+        """ Record each statement run with run_sql or run_sql_stream, for
+            IndexAdvisor.
+
+        Parameters:
+            workload: an IndexAdvisor.Workload, None to stop recording.
+        Returns:
+        """
+        self.workload = workload
+        return
+    # End of method set_workload.
+
+    def set_local_cache(self, local_cache) -> None:
+        """ Answer SELECTs that read only tables copied into a LocalCache
+            from those copies, not from the database.  SELECTs with bind
+            variables must be set with set_portable_sql, unless the
+            library's parameter style is named, like SQLite's.
+
+        Parameters:
+            local_cache: the LocalCache, None to stop using one.
+        Returns:
+        """
+        self.local_cache = local_cache
+        return
+    # End of method set_local_cache.
+
+    def _run_local(self):
+        """ Run a SELECT on the local cache, if it can answer it.
+
+        Parameters:
+        Returns:
+            None if the local cache cannot answer the SQL, otherwise:
+            col_names: list of the names of the columns being fetched.
+            all_rows: list of tuples, each tuple is one row being fetched.
+        """
+        self.cache_age = None
+        self.cache_stale = False
+        if self.local_cache is None or self.get_sql_type() != 'SELECT':
+            return None
+        if self._portable is not None:
+            sql, values = self._portable
+        elif not self.bind_vars:
+            sql, values = self.sql, None
+        elif self.paramstyle == NAMED:
+            # Already written :name, like portable SQL.
+            sql, values = self.sql, self.bind_vars
+        else:
+            # Bind variables in this library's parameter style.
+            return None
+        result = self.local_cache.query(sql, values)
+        if result is None:
+            return None
+        col_names, all_rows, self.cache_age, self.cache_stale = result
+        if self.named_rows:
+            all_rows = wrap_rows(all_rows, column_index(col_names))
+        return col_names, all_rows
+    # End of method _run_local.
+
+    def cancel(self) -> bool:
+        """ Cancel the statement this DBClient is running, using the database
+            library's own mechanism (see DBInstance.cancel).  Call it from
+            another thread, or from an asyncio task while run_sql_async is
+            awaited.  The statement fails with last_error set.
+
+        Parameters:
+        Returns:
+            sent (bool): True if a statement was running and the cancel was
+                sent.
+        """
+        with self._lock:
+            if not self._running:
+                return False
+            self.cancelled = True
+            cursor = self.cursor
+        return self.db_instance.cancel(cursor)
+    # End of method cancel.
+
+    def _time_out(self, statement_num: int) -> None:
+        """ Cancel a statement that has run longer than timeout.  Runs in the
+            thread of the Timer started by _start_statement.
+
+        Parameters:
+            statement_num (int): which statement the Timer was started for.
+        Returns:
+        """
+        with self._lock:
+            if statement_num != self._statement_num or not self._running:
+                # That statement already finished.
+                return
+            self.timed_out = True
+        self.cancel()
+        return
+    # End of method _time_out.
+
+    def _start_statement(self) -> None:
+        """ Mark a statement as running, so it can be cancelled, and start
+            its timer if there is a timeout.
+
+        Parameters:
+        Returns:
+        """
+        self._end_statement()
+        with self._lock:
+            self._statement_num += 1
+            self._running = True
+            self.cancelled = False
+            self.timed_out = False
+            if self.timeout is not None:
+                self._timer = Timer(self.timeout, self._time_out,
+                                    args=(self._statement_num,))
+                self._timer.daemon = True
+                self._timer.start()
+        return
+    # End of method _start_statement.
+
+    def _end_statement(self) -> None:
+        """ Mark the running statement as finished, and stop its timer.
+
+        Parameters:
+        Returns:
+        """
+        with self._lock:
+            self._running = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return
+    # End of method _end_statement.
+
+    def _report_error(self, error) -> None:
+        """ Record and report an error raised by the database library.
+            After a cancel, the transaction is rolled back, since some
+            databases (PostgreSQL) refuse further statements in it.
+
+        Parameters:
+            error: the database library exception.
+        Returns:
+        """
+        self.last_error = error
+        if not self.cancelled:
+            print_stacktrace()
+            return
+        if self.timed_out:
+            print('SQL TIMED OUT AFTER {} SECONDS.'.format(self.timeout))
+        else:
+            print('SQL CANCELLED.')
+        try:
+            self.cursor.connection.rollback()
+        except self.db_library.Error:
+            pass
+        return
+    # End of method _report_error.
+
     def run_sql(self) -> (list, list, int):
         """ Run the SQL, perhaps return rows and column names.
 
@@ -106,21 +391,23 @@ class DBClient(object):
         col_names = list()
         all_rows = list()
         row_count = 0
+        self.last_error = None
+        self._end_stream()
         if not self.sql:
             print('NO SQL TO EXECUTE.')
             self.clean_up()
             exit(1)
         else:
+            local = self._run_local()
+            if local is not None:
+                return local[0], local[1], len(local[1])
+            if self.workload is not None:
+                self.workload.record(self.sql, self.bind_vars)
             try:
                 # Execute SQL.
-                if len(self.bind_vars) > 0:
-                    if self.db_type == ACCESS:
-                        print('NO BIND VARIABLES ALLOWED IN MICROSOFT ACCESS.')
-                        self.clean_up()
-                        exit(1)
-                    self.cursor.execute(self.sql, self.bind_vars)
-                else:
-                    self.cursor.execute(self.sql)
+                self._start_statement()
+                self._capture_plan()
+                self._execute()
 
                 # Check for something really yucky.
                 if self.cursor is None:
@@ -129,38 +416,271 @@ class DBClient(object):
                     exit(1)
 
                 # Classify SQL.
-                sql_type: str = self.sql.split()[0].upper()
+                sql_type: str = self.get_sql_type()
 
                 row_count = self.cursor.rowcount
 
-                # Handle SQL results.
+                # Handle SQL results.  Anything with a result set is a query.
+                if self.cursor.description is not None:
+                    sql_type = 'SELECT'
                 if sql_type in {'INSERT', 'UPDATE', 'DELETE'}:
                     self.cursor.connection.commit()
                 elif sql_type != 'SELECT':
                     print('Not a CRUD statement!')
                 elif sql_type == 'SELECT':
-                    # Fetch rows.  Fetchall for large number of rows a problem.
-                    all_rows = self.cursor.fetchall()
-
                     # Get column names
                     col_names = [item[0] for item in self.cursor.description]
 
                     # Column data types.  Too specific and inconsistent to use.
                     # col_types = [item[1] for item in self.cursor.description]
 
-                    # Could combine all_rows & col_names into dict, with keys
-                    # from col_names & values from all_rows, but performance
-                    # would suffer.
+                    # Rows combining all_rows & col_names into dicts would
+                    # hurt performance, Row objects share one column index.
+                    self._prepare_rows(col_names)
+
+                    # Fetch rows.  Fetchall for large number of rows a problem.
+                    all_rows = self._wrap(self.cursor.fetchall())
 
                     # In Oracle, cursor.rowcount = 0, so get row count directly.
                     row_count = len(all_rows)
 
-            except self.db_library.Error:
-                print_stacktrace()
+            except self.db_library.Error as e:
+                self._end_statement()
+                self._report_error(e)
             finally:
+                self._end_statement()
                 return col_names, all_rows, row_count
     # End of method run_sql.
 
+    async def run_sql_async(self) -> (list, list, int):
+        """ Run the SQL like run_sql, but in a worker thread, so an asyncio
+            task can await it.  If the awaiting task is cancelled, for
+            instance by asyncio.wait_for when its timeout runs out, the
+            statement is cancelled too, and the task waits for it to stop.
+
+        Parameters:
+        Returns:
+            Same as run_sql.
+        """
+        # Imported here, it is slow to import and seldom needed.
+        import asyncio
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, self.run_sql)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.cancel()
+            # The cursor cannot be used until the statement stops.
+            await asyncio.wait([future])
+            raise
+    # End of method run_sql_async.
+
+    def run_sql_stream(self) -> (list, object):
+        """ Run the SQL.  For a SELECT, return the column names and a generator
+            of batches of rows, fetched through a server-side cursor where the
+            database library has one, so memory use stays bounded however
+            large the result set.  After the generator is exhausted or closed,
+            this DBClient goes back to using an ordinary cursor.  Callers
+            that stop early should close the generator; one never started
+            or left unfinished is abandoned at the next set_sql, run_sql or
+            run_sql_stream, which restore the ordinary cursor then.
+            Statements other than SELECT are run with run_sql.
+
+        Parameters:
+        Returns:
+            col_names: list of the names of the columns being fetched.
+            batches: generator of lists of tuples, each tuple is one row.
+        """
+        self._end_stream()
+        if not self.sql:
+            print('NO SQL TO EXECUTE.')
+            self.clean_up()
+            exit(1)
+        elif self.get_sql_type() != 'SELECT':
+            self.run_sql()
+            return list(), iter(())
+
+        self.last_error = None
+        local = self._run_local()
+        if local is not None:
+            return local[0], (batch for batch in [local[1]] if batch)
+
+        if self.workload is not None:
+            self.workload.record(self.sql, self.bind_vars)
+        # Switch to a server-side cursor.
+        self.last_error = None
+        self.db_instance.delete_cursor(self)
+        self.cursor = self.db_instance.create_cursor(
+            self, server_side=True, connection=self._connection)
+        self._stream_cursor = self.cursor
+        try:
+            self._start_statement()
+            self._capture_plan()
+            self._execute()
+            if self.cursor.description is None:
+                # psycopg2 named cursors have no description until a fetch.
+                first_batch = self.cursor.fetchmany(self.cursor.arraysize)
+                col_names = [item[0] for item in self.cursor.description]
+                self._prepare_rows(col_names)
+                first_batch = self._wrap(first_batch)
+            else:
+                col_names = [item[0] for item in self.cursor.description]
+                self._prepare_rows(col_names)
+                first_batch = self._wrap(
+                    self.cursor.fetchmany(self.cursor.arraysize))
+        except self.db_library.Error as e:
+            self._end_statement()
+            self._report_error(e)
+            self._restore_cursor()
+            return list(), iter(())
+        return col_names, self._stream_batches(first_batch, self.cursor)
+    # End of method run_sql_stream.
+
+    def _stream_batches(self, first_batch: list, cursor):
+        """ Generator of batches for run_sql_stream, restores an ordinary
+            cursor when done, unless _end_stream already has.  Once
+            abandoned by _end_stream, it ends quietly, even if resumed.
+
+        Parameters:
+            first_batch (list): the batch already fetched by run_sql_stream.
+            cursor: the server-side cursor of run_sql_stream.
+        Returns:
+            rows (list): yields lists of tuples, each tuple is one row.
+        """
+        if cursor is not self._stream_cursor:
+            # Abandoned before it started.
+            return
+        try:
+            if first_batch:
+                if self.db_instance.auto_tune_fetch:
+                    self.db_instance.tune_fetch_sizes(cursor, first_batch)
+                yield first_batch
+                while True:
+                    if cursor is not self._stream_cursor:
+                        # Abandoned while paused, the cursor is closed.
+                        return
+                    rows = cursor.fetchmany(cursor.arraysize)
+                    if not rows:
+                        break
+                    yield self._wrap(rows)
+        except self.db_library.Error as e:
+            # Errors of an abandoned cursor are not the current statement's.
+            if cursor is self._stream_cursor:
+                self._end_statement()
+                self._report_error(e)
+        finally:
+            if cursor is self._stream_cursor:
+                self._end_statement()
+                self._restore_cursor()
+        return
+    # End of method _stream_batches.
+
+    def _end_stream(self) -> None:
+        """ Abandon the generator of run_sql_stream, if not exhausted or
+            closed, and go back to an ordinary cursor.
+
+        Parameters:
+        Returns:
+        """
+        if self._stream_cursor is not None:
+            self._end_statement()
+            self._restore_cursor()
+        return
+    # End of method _end_stream.
+
+    def _restore_cursor(self) -> None:
+        """ Replace the cursor used by run_sql_stream with an ordinary one.
+
+        Parameters:
+        Returns:
+        """
+        self._stream_cursor = None
+        if self.cursor is not None:
+            self.db_instance.delete_cursor(self)
+            self.cursor = self.db_instance.create_cursor(
+                self, connection=self._connection)
+        return
+    # End of method _restore_cursor.
+
+    def _capture_plan(self) -> None:
+        """ Capture the plan of the SQL, if there is a plan cache.  Runs
+            after _start_statement, so the timeout and cancel cover the
+            EXPLAIN too, and a statement cancelled during it is not run.
+
+        Parameters:
+        Returns:
+        """
+        if self.plan_cache is None:
+            return
+        self.plan_cache.capture(self.db_instance, self.sql, self.bind_vars)
+        if self.cancelled:
+            raise self.db_library.OperationalError(
+                'Cancelled while capturing the plan.')
+        return
+    # End of method _capture_plan.
+
+    def _execute(self) -> None:
+        """ Execute the SQL, with bind variables if there are any.
+
+        Parameters:
+        Returns:
+        """
+        if self.bind_vars:
+            if self.db_type == ACCESS:
+                print('NO BIND VARIABLES ALLOWED IN MICROSOFT ACCESS.')
+                self.clean_up()
+                exit(1)
+            self.cursor.execute(self.sql, self.bind_vars)
+        else:
+            self.cursor.execute(self.sql)
+        return
+    # End of method _execute.
+
+    def _prepare_rows(self, col_names: list) -> None:
+        """ Prepare the cursor to return Row objects or tuples, according to
+            named_rows, for the result set just executed.
+
+        Parameters:
+            col_names (list): the names of the columns in the result set.
+        Returns:
+        """
+        self._wrap_index = None
+        if self.named_rows:
+            index = column_index(col_names)
+            if not set_row_factory(self.cursor, self.db_lib_name, index):
+                self._wrap_index = index
+        else:
+            clear_row_factory(self.cursor, self.db_lib_name)
+        return
+    # End of method _prepare_rows.
+
+    def _wrap(self, rows: list) -> list:
+        """ Wrap rows in Row objects, if the library cannot do it itself.
+
+        Parameters:
+            rows (list): list of tuples, each tuple is one row.
+        Returns:
+            rows (list): the same rows, maybe wrapped in Row objects.
+        """
+        if self._wrap_index is None:
+            return rows
+        return wrap_rows(rows, self._wrap_index)
+    # End of method _wrap.
+
+    def get_sql_type(self) -> str:
+        """ Classify the SQL by its first word, after any comments and
+            opening parentheses.  Queries starting with WITH or VALUES are
+            classified as SELECT.
+
+        Parameters:
+        Returns:
+            sql_type (str): first word of the SQL, in upper case.
+        """
+        start = LEADING_NOISE.match(self.sql).end()
+        sql_type = FIRST_WORD.match(self.sql, start).group(0).upper()
+        return 'SELECT' if sql_type in QUERY_WORDS else sql_type
+    # End of method get_sql_type.
+
     def _skip_op_msg(self, sql_x: str, object_str: str) -> str:
         """ Method to print message if skipping operation in db_table_schema or
             db_view_schema.
@@ -201,8 +721,7 @@ class DBClient(object):
 
         # Create map from column name to item #, so items accessible by column
         # name instead of by item #.
-        columns = {name.lower(): item_num for
-                   item_num, name in enumerate(table_col_names)}
+        columns = column_index(table_col_names)
 
         # Extract a list of table names.
         table_names = [table[columns['table_name']] for table in table_rows]
@@ -236,8 +755,7 @@ class DBClient(object):
 
         # Create map from column name to item #, so items accessible by
         # column name instead of by item #.
-        columns = {name.lower(): item_num for
-                   item_num, name in enumerate(indexes_col_names)}
+        columns = column_index(indexes_col_names)
 
         # Go through indexes, add index_columns to end of each index/row.
         for item_num, index_row in enumerate(indexes_rows):
@@ -278,8 +796,7 @@ class DBClient(object):
 
         # Create mapping from column name to item #, so I can access items by
         # column name instead of by item #.
-        columns = {name.lower(): item_num for
-                   item_num, name in enumerate(view_col_names)}
+        columns = column_index(view_col_names)
 
         # Extract a list of view names.
         view_names = [view[columns['view_name']] for view in view_rows]
@@ -342,6 +859,104 @@ class DBClient(object):
             return False, column_names, rows
     # End of method _data_dict_fetch.
 
+    def get_table_names(self) -> list:
+        """ Find the tables owned by the current login, from the data
+            dictionary.
+
+        Parameters:
+        Returns:
+            tables (list): the names of the tables.  Empty if the data
+                dictionary cannot be read for this type of database.
+        """
+        skip_op, table_col_names, table_rows = self._data_dict_fetch(
+            mq.TABLES, '')
+        if skip_op:
+            return list()
+        columns = column_index(table_col_names)
+        return [table[columns['table_name']] for table in table_rows]
+    # End of method get_table_names.
+
+    def get_table_rows(self, table: str) -> int:
+        """ Estimate the number of rows in a table from optimizer statistics,
+            without scanning it.
+
+        Parameters:
+            table (str): the table.
+        Returns:
+            row_count (int): the estimate, -1 if unknown.
+        """
+        skip_op, _, rows = self._data_dict_fetch(mq.TABLE_ROWS, table)
+        if skip_op or not rows or rows[0][0] is None:
+            return -1
+        return int(rows[0][0])
+    # End of method get_table_rows.
+
+    def get_table_columns(self, table: str) -> list:
+        """ Find the columns of a table, in order, from the data dictionary.
+
+        Parameters:
+            table (str): the table whose columns we want.
+        Returns:
+            columns (list): one tuple per column: column name, data type as
+                described in the database's data dictionary, data type group
+                (see functions.data_type_group), and whether nullable (bool).
+                Empty if the table was not found, or if the data dictionary
+                cannot be read for this type of database.
+        """
+        skip_op, columns_col_names, columns_rows = self._data_dict_fetch(
+            mq.TAB_COL, table)
+        if skip_op:
+            return list()
+
+        # Create mapping from column name to item #.
+        columns = column_index(columns_col_names)
+        table_columns = list()
+        for columns_row in columns_rows:
+            data_type = columns_row[columns['data_type']]
+            nullable = str(columns_row[columns['nullable']]).upper()
+            table_columns.append((columns_row[columns['column_name']],
+                                  data_type,
+                                  data_type_group(data_type, self.db_type),
+                                  nullable not in {'NO', 'NOT NULL'}))
+        return table_columns
+    # End of method get_table_columns.
+
+    def get_table_indexes(self, table: str) -> list:
+        """ Find the indexes of a table, from the data dictionary.
+
+        Parameters:
+            table (str): the table whose indexes we want.
+        Returns:
+            indexes (list): one tuple per index: index name, whether unique
+                (bool), and list of the names of its columns, in order (the
+                expression, for a column that is an expression).  Empty if
+                the table has no indexes, or if the data dictionary cannot be
+                read for this type of database.
+        """
+        skip_op, indexes_col_names, indexes_rows = self._data_dict_fetch(
+            mq.INDEXES, table)
+        if skip_op:
+            return list()
+
+        columns = column_index(indexes_col_names)
+        indexes = list()
+        for index_row in indexes_rows:
+            index_name = index_row[columns['index_name']]
+            unique = str(index_row[columns['unique']]).upper() == 'YES'
+            skip_op, _, ind_col_rows = self._data_dict_fetch(mq.IND_COL,
+                                                             index_name)
+            if skip_op:
+                return list()
+            index_columns = list()
+            for column_pos, column_name, descend, column_expr in ind_col_rows:
+                if column_expr is None or column_expr == '':
+                    index_columns.append(column_name)
+                else:
+                    index_columns.append(column_expr)
+            indexes.append((index_name, unique, index_columns))
+        return indexes
+    # End of method get_table_indexes.
+
     def get_data_type(self, table: str, column: str) -> (str, str):
         """ Find the data type of table.column.
             Only used in UniversalClient_Complex.py.
@@ -354,64 +969,10 @@ class DBClient(object):
                 described in the database's data dictionary.
             data_type_group (str): the data type's group.
         """
-        # Get the columns for this table.
-        skip_op, columns_col_names, columns_rows = self._data_dict_fetch(mq.TAB_COL, table)
-        if skip_op:
-            return 'NOT FOUND', 'NOT FOUND'
-
-        # Create mapping from column name to item #.
-        columns = {name.lower(): item_num for
-                   item_num, name in enumerate(columns_col_names)}
-        data_type = 'NOT FOUND'
-        for columns_row in columns_rows:
-            if columns_row[columns['column_name']].upper() == column.upper():
-                data_type = columns_row[columns['data_type']]
-                break
-
-        data_type_low = data_type.lower()
-        # Now find data type group.
-        if data_type == 'NOT FOUND':
-            data_type_group = data_type
-        elif ((data_type_low.find('nchar') > -1) or
-              (data_type_low.find('nvarchar') > -1) or
-              (data_type_low.find('nclob') > -1)):
-            data_type_group = 'UNICODE'
-        elif ((data_type_low.find('bit') > -1 and self.db_type != SQLSERVER) or
-              (data_type_low.find('raw') > -1) or
-              (data_type_low.find('image') > -1) or
-              (data_type_low.find('binary') > -1) or
-              (data_type_low.find('blob') > -1) or
-              (data_type_low.find('byte') > -1 and self.db_type != ORACLE)):
-            # Includes Oracle Long Raw, listed before Long.
-            # Image is Sql server
-            data_type_group = 'BINARY'
-        elif ((data_type_low.find('char') > -1) or
-              (data_type_low.find('text') > -1) or
-              (data_type_low.find('long') > -1) or
-              (data_type_low.find('clob') > -1)):
-            data_type_group = 'STRING'
-        elif ((data_type_low.find('int') > -1) or
-              (data_type_low.find('number') > -1) or
-              (data_type_low.find('numeric') > -1) or
-              (data_type_low.find('decimal') > -1) or
-              (data_type_low.find('real') > -1) or
-              (data_type_low.find('float') > -1) or
-              (data_type_low.find('double') > -1) or
-              (data_type_low.find('money') > -1) or
-              (data_type_low.find('currency') > -1)):
-            data_type_group = 'NUMBER'
-        elif ((data_type_low.find('date') > -1) or
-              (data_type_low.find('time') > -1) or
-              (data_type_low.find('interval') > -1) or
-              (data_type_low.find('year') > -1)):
-            data_type_group = 'DATETIME'
-        elif ((data_type_low.find('bool') > -1) or
-              (data_type_low.find('bit') > -1 and self.db_type == SQLSERVER)):
-            data_type_group = 'BOOLEAN'
-        else:
-            data_type_group = 'OTHER'
-
-        return data_type, data_type_group
+        for column_name, data_type, group, _ in self.get_table_columns(table):
+            if column_name.upper() == column.upper():
+                return data_type, group
+        return 'NOT FOUND', 'NOT FOUND'
     # End of method get_data_type.
 
 # End of Class DBClient.
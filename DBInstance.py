@@ -8,7 +8,8 @@ VERSION: 0.7.6
 
 DATE: Jul 9, 2020
 """
-from functions import print_stacktrace, is_file_in_path
+from threading import RLock, local
+from functions import print_stacktrace, find_executable
 from constants import ACCESS, MYSQL, ORACLE, POSTGRESQL, SQLITE, SQLSERVER
 import constants as c
 
@@ -17,6 +18,16 @@ class DBInstance(object):
     """ Class containing database connection utilities and information
         about one database instance (referred to as "this database").
 
+        Thread safety: a DBInstance may be shared by threads, as long as each
+        thread uses its own DBClients, created in that thread.  The registry
+        of cursors is protected by a lock.  If the database library's
+        threadsafety level is below 2 (threads may not share connections:
+        pymysql, pyodbc, sqlite3 unless built serialized), each thread gets
+        its own connection, opened when it first needs one.  Otherwise all
+        threads share one connection, and its transaction.  An in-memory
+        SQLite database always has one connection, since each connection to
+        ":memory:" is a different database.
+
     Attributes:
         os (str): the OS this is running on ('Windows', 'Linux', or 'Darwin').
         db_type (str): the type of database (Oracle, SQL Server, etc).
@@ -30,10 +41,27 @@ class DBInstance(object):
         db_lib_name (str): name of the imported db library.
         db_lib_version (str): version of the imported db library.
         db_software_version (str): version of the database software being used.
-        connection: the handle to this database. I set connection = None when
-                    connection closed, this is not default behavior.
+        connection: the handle to this database, of the calling thread if
+                    thread_local. I set connection = None when connection
+                    closed, this is not default behavior.
+        connections (list): all the open connections, of all threads.
+        thread_local (bool): if True, each thread has its own connection.
+                             None until decided when first connecting.
+        lock (RLock): protects callers, connections and connecting.
         callers (dict): collection of DBClient instances using this instance of
                         of DBInstance, along with their cursor objects.
+        cmdline_session: persistent db command line client session, from
+                         get_cmdline_session, or None.
+        sqlite_read_only (bool): if True, SQLite connections are read-only.
+        sqlite_immutable (bool): if True, SQLite connections treat the file as
+                                 a snapshot no process changes: no locking.
+        sqlite_pragmas (list): PRAGMA statements run on each new SQLite
+                               connection.
+        arraysize (int): rows fetched per round trip (cursor.arraysize, and
+                         cursor.itersize in server-side psycopg2 cursors).
+        prefetch_rows (int): rows oracledb fetches with the execute call.
+        auto_tune_fetch (bool): if True, DBClient resets arraysize from the
+                                width of the first batch of rows fetched.
     """
     def __init__(self,
                  os: str,
@@ -43,7 +71,8 @@ class DBInstance(object):
                  password: str,
                  hostname: str,
                  port_num: int,
-                 instance: str) -> None:
+                 instance: str,
+                 lazy_connect: bool = False) -> None:
         """ Constructor method for this class.
 
         Parameters:
@@ -55,6 +84,8 @@ class DBInstance(object):
             hostname (str): the hostname of this database.
             port_num (int): the port this database listens on.
             instance (str): the name of this database instance.
+            lazy_connect (bool): if True, do not import the database library
+                and connect until a cursor or the connection is first needed.
         Returns:
         """
         # Save arguments of __init__.
@@ -73,28 +104,18 @@ class DBInstance(object):
             # Nothing to clean up.
             exit(1)
 
-        # Import appropriate database library.
+        # Appropriate database library, imported when first connecting.
         self.db_lib_name = c.LIB_NAME_FOR_DB[self.db_type]
-        self.db_lib_obj = __import__(self.db_lib_name)
+        self.db_lib_obj = None
+        self.db_lib_version = None
 
         # Appropriate database client executable.
         self.db_client_exe = c.DB_CLIENT_EXES[self.db_type]
 
-        # Get database library version.
-        if self.db_lib_name in {c.PSYCOPG2, c.PYMYSQL}:
-            self.db_lib_version = self.db_lib_obj.__version__
-        else:
-            self.db_lib_version = self.db_lib_obj.version
-        z = 'Using {} library version {}.'
-        print(z.format(self.db_lib_name, self.db_lib_version))
-
-        # Get the library's primary parameter style.
-        print('Parameter style "{}".'.format(self.db_lib_obj.paramstyle))
+        # Get the parameter style we're using.
         # paramstyle = 'named': oracledb.  Option for sqlite3 & psycopg2.
         # paramstyle = 'qmark': sqlite3 and pyodbc.
         # paramstyle = 'pyformat': pymysql and psycopg2.
-
-        # Get the parameter style we're using.
         self.paramstyle = c.PARAMSTYLE_FOR_LIB[self.db_lib_name]
         if self.db_type == ACCESS:
             self.paramstyle = c.NOBINDVARS
@@ -107,35 +128,260 @@ class DBInstance(object):
         else:
             self.bind_vars = None
 
+        # Database software version, found when first asked for.
+        self.db_software_version = None
+
+        # Prepare to save cursors for this connection, from any thread.
+        self.lock = RLock()
+        self.callers = dict()
+        # For unique names of server-side cursors.
+        self.cursor_count = 0
+
+        # Persistent session of the db command line client, started on demand.
+        self.cmdline_session = None
+
+        # How SQLite connections are opened, see set_sqlite_options.
+        self.sqlite_read_only: bool = False
+        self.sqlite_immutable: bool = False
+        self.sqlite_pragmas: list = list()
+
+        # Rows per round trip, applied to all cursors in create_cursor.
+        self.arraysize: int = c.DEFAULT_ARRAYSIZE
+        self.prefetch_rows: int = c.DEFAULT_PREFETCH_ROWS
+        self.auto_tune_fetch: bool = True
+
+        # Connections, shared or one per thread, decided when connecting.
+        self.thread_local = None
+        self.connections: list = list()
+        self._shared_connection = None
+        self._local = local()
+        # Incremented when all connections are closed, so that threads forget
+        # their closed connections.
+        self._generation: int = 0
+
+        # Connect to database instance, now or when first needed.
+        if not lazy_connect:
+            self.connect()
+
+        return
+    # End of method __init__.
+
+    # METHODS INVOLVING THE DATABASE CONNECTION.
+
+    @property
+    def connection(self):
+        """ The connection of the calling thread if thread_local, otherwise
+            the connection shared by all threads.  None if not connected.
+        """
+        if self.thread_local:
+            if getattr(self._local, 'generation', None) != self._generation:
+                return None
+            return self._local.connection
+        return self._shared_connection
+    # End of method connection.
+
+    @connection.setter
+    def connection(self, connection) -> None:
+        """ Replace the connection of the calling thread if thread_local,
+            otherwise the connection shared by all threads.  The old
+            connection is forgotten, not closed.
+
+        Parameters:
+            connection: the new handle to this database, or None.
+        Returns:
+        """
+        with self.lock:
+            old_connection = self.connection
+            if old_connection is not None and \
+                    old_connection in self.connections:
+                self.connections.remove(old_connection)
+            if self.thread_local:
+                self._local.connection = connection
+                self._local.generation = self._generation
+            else:
+                self._shared_connection = connection
+            if connection is not None:
+                self.connections.append(connection)
+        return
+    # End of method connection.
+
+    def set_thread_local(self, thread_local: bool) -> None:
+        """ Method to choose whether each thread gets its own connection,
+            instead of deciding from the database library's threadsafety
+            level.  Call it before connecting.
+
+        Parameters:
+            thread_local (bool): if True, one connection per thread.  If
+                False, one connection for all threads, for a DBInstance used
+                by one thread at a time, like those in a ConnectionPool.
+        Returns:
+        """
+        with self.lock:
+            if len(self.connections) > 0:
+                print('Already connected, connections not changed.')
+                return
+            self.thread_local = thread_local
+        return
+    # End of method set_thread_local.
+
+    def is_in_memory(self) -> bool:
+        """ Method to tell whether this is an in-memory SQLite database.
+
+        Parameters:
+        Returns:
+            in_memory (bool): True if so.
+        """
+        return self.db_type == SQLITE and (
+            self.db_path in {'', ':memory:'} or
+            self.db_path.startswith('file::memory:'))
+    # End of method is_in_memory.
+
+    def connect(self) -> None:
+        """ Method to import the database library, if not yet imported, and
+            connect to this database, if not yet connected.  Connects only
+            the calling thread, if thread_local.
+
+        Parameters:
+        Returns:
+        """
+        with self.lock:
+            self._connect()
+        return
+    # End of method connect.
+
+    def _connect(self) -> None:
+        """ Method doing the work of connect, with the lock held.
+
+        Parameters:
+        Returns:
+        """
+        if self.connection is not None:
+            return
+
+        if self.db_lib_obj is None:
+            # Import appropriate database library.
+            self.db_lib_obj = __import__(self.db_lib_name)
+
+            # Get database library version.
+            if self.db_lib_name in {c.PSYCOPG2, c.PYMYSQL}:
+                self.db_lib_version = self.db_lib_obj.__version__
+            else:
+                self.db_lib_version = self.db_lib_obj.version
+            z = 'Using {} library version {}.'
+            print(z.format(self.db_lib_name, self.db_lib_version))
+
+            # Get the library's primary parameter style.
+            print('Parameter style "{}".'.format(self.db_lib_obj.paramstyle))
+
+        # Threads may not share connections below threadsafety level 2.
+        if self.thread_local is None:
+            self.thread_local = (self.db_lib_obj.threadsafety < 2 and
+                                 not self.is_in_memory())
+
         # Connect to database instance.
-        self.connection = None
         try:
-            if db_type in c.USES_CONNECTION_STRING:
-                z = self.get_db_connection_string()
-                self.connection = self.db_lib_obj.connect(z)
-            else:
-                args = (self.hostname, self.username, self.password,
-                        self.instance, self.port_num)
-                # self.connection = self.db_lib_obj.connect(*args)
-                self.connection = self.db_lib_obj.connect(host=self.hostname, user=self.username, password=self.password, db=self.instance,
-                                                          port=self.port_num)
+            self.connection = self._open_connection()
             print('Successfully connected to database.')
         except self.db_lib_obj.Error:
             print_stacktrace()
             print('Failed to connect to database.')
             # Nothing to clean up.
             exit(1)
+        return
+    # End of method _connect.
 
-        # Get database software version.
-        self.db_software_version = self.get_db_software_version()
+    def _open_connection(self):
+        """ Method to open a new connection to this database.  The database
+            library must already be imported.
 
-        # Prepare to save cursors for this connection.
-        self.callers = dict()
+        Parameters:
+        Returns:
+            connection: the new handle to this database.
+        """
+        if self.db_lib_name == c.SQLITE3:
+            # ConnectionPool lends a connection to one thread at a time, but
+            # not always the thread that opened it.  And a serialized sqlite3
+            # connection is shared by threads.
+            z = self.get_db_connection_string()
+            uri = self.sqlite_read_only or self.sqlite_immutable
+            if uri:
+                from pathlib import Path
+                z = Path(z).resolve().as_uri() + '?mode=ro'
+                if self.sqlite_immutable:
+                    z += '&immutable=1'
+            connection = self.db_lib_obj.connect(z, uri=uri,
+                                                 check_same_thread=False)
+            for pragma in self.sqlite_pragmas:
+                connection.execute(pragma).fetchall()
+        elif self.db_type in c.USES_CONNECTION_STRING:
+            z = self.get_db_connection_string()
+            connection = self.db_lib_obj.connect(z)
+        else:
+            connection = self.db_lib_obj.connect(
+                host=self.hostname, user=self.username,
+                password=self.password, db=self.instance, port=self.port_num)
+        return connection
+    # End of method _open_connection.
 
-        return
-    # End of method __init__.
+    def get_connection(self):
+        """ Method to return the connection to this database, connecting
+            first if not yet connected.
 
-    # METHODS INVOLVING THE DATABASE CONNECTION.
+        Parameters:
+        Returns:
+            connection: the handle to this database.
+        """
+        if self.connection is None:
+            self.connect()
+        return self.connection
+    # End of method get_connection.
+
+    def clone(self):
+        """ Method to create another DBInstance for this database, with the
+            same connection parameters and fetch sizes, but its own
+            connection, opened when first needed.  For using this database
+            from another thread: connect in the thread that uses it.
+
+        Parameters:
+        Returns:
+            db_instance (DBInstance): the new DBInstance, not yet connected.
+        """
+        db_instance = DBInstance(self.os, self.db_type, self.db_path,
+                                 self.username, self.password, self.hostname,
+                                 self.port_num, self.instance,
+                                 lazy_connect=True)
+        # Share the already imported library.
+        db_instance.db_lib_obj = self.db_lib_obj
+        db_instance.db_lib_version = self.db_lib_version
+        db_instance.set_fetch_sizes(self.arraysize, self.prefetch_rows,
+                                    self.auto_tune_fetch)
+        db_instance.set_sqlite_options(self.sqlite_read_only,
+                                       self.sqlite_immutable,
+                                       self.sqlite_pragmas)
+        return db_instance
+    # End of method clone.
+
+    def set_sqlite_options(self, read_only: bool = False,
+                           immutable: bool = False,
+                           pragmas: list = None) -> None:
+        """ Method to set how SQLite connections opened afterwards are
+            opened.  Ignored for other types of database.
+
+        Parameters:
+            read_only (bool): if True, open the file read-only (URI
+                mode=ro), so the connection cannot write.
+            immutable (bool): if True, also tell SQLite that no process
+                changes the file (URI immutable=1), so it skips locking and
+                change detection.  Only for frozen snapshots.
+            pragmas (list): PRAGMA statements to run on each new connection,
+                such as mmap_size and cache_size.
+        Returns:
+        """
+        self.sqlite_read_only = read_only
+        self.sqlite_immutable = immutable
+        self.sqlite_pragmas = list(pragmas or list())
+        return
+    # End of method set_sqlite_options.
 
     def close_connection(self, del_cursors: bool = False) -> None:
         """ Method to close connection to this database.
@@ -145,13 +391,18 @@ class DBInstance(object):
                                 if False, refuse to close connection.
         Returns:
         """
+        if self.cmdline_session is not None:
+            self.cmdline_session.close()
+
         if del_cursors:
-            # TODO need to test with multiple DBClients.
-            for caller, cursor in self.callers.items():
+            # Iterate over a copy, delete_cursor changes callers.
+            with self.lock:
+                callers = list(self.callers)
+            for caller in callers:
                 self.delete_cursor(caller)
-                del caller
-        else:
+        elif len(self.callers) > 0:
             print('Dependent DBClients exist, will not close connection.')
+            return
 
         if self.db_type in c.FILE_DATABASES:
             z = '\n{} from database at "{}".'
@@ -159,9 +410,18 @@ class DBInstance(object):
         else:
             z = '\n{} from instance "{}" on host "{}".'
             z = z.format('{}', self.instance, self.hostname)
+        # Close the connections of all threads.
+        with self.lock:
+            connections = self.connections
+            self.connections = list()
+            self._shared_connection = None
+            self._generation += 1
+        if len(connections) == 0:
+            print(z.format('Already disconnected'))
+            return
         try:
-            self.connection.close()
-            self.connection = None
+            for connection in connections:
+                connection.close()
             print(z.format('Successfully disconnected'))
         except self.db_lib_obj.Error:
             print_stacktrace()
@@ -171,7 +431,8 @@ class DBInstance(object):
         return
     # End of method close_connection.
 
-    def create_cursor(self, caller):
+    def create_cursor(self, caller, server_side: bool = False,
+                      connection=None):
         """ Method that creates and returns a new cursor.  Saves caller
             object, along with its cursor, into "callers", so that deletion of
             self cannot be done before dependent callers and their cursors are
@@ -180,11 +441,36 @@ class DBInstance(object):
         Parameters:
             caller: the self object of the object calling create_cursor, added
                     to pool of caller objects.
+            server_side (bool): if True, a cursor that leaves the result set on
+                the server and fetches it as rows are requested, instead of
+                buffering it all on the client with the execute call.
+                psycopg2: named cursor.  pymysql: SSCursor.  The oracledb,
+                pyodbc and sqlite3 cursors already work this way.
+                A psycopg2 named cursor can execute only one SELECT.  The
+                connection of a pymysql SSCursor cannot be used by any other
+                cursor until all rows are fetched or the cursor is closed.
+            connection: the connection to create the cursor on, None for the
+                calling thread's.  For a caller to stay on its connection
+                when run from another thread.
         Returns:
             cursor: handle to this database.
         """
-        cursor = self.connection.cursor()
-        self.callers[caller] = cursor
+        if connection is None:
+            connection = self.get_connection()
+        if not server_side:
+            cursor = connection.cursor()
+        elif self.db_lib_name == c.PSYCOPG2:
+            with self.lock:
+                self.cursor_count += 1
+                name = 'dbclient_cursor_{}'.format(self.cursor_count)
+            cursor = connection.cursor(name)
+        elif self.db_lib_name == c.PYMYSQL:
+            cursor = connection.cursor(self.db_lib_obj.cursors.SSCursor)
+        else:
+            cursor = connection.cursor()
+        self.apply_fetch_sizes(cursor)
+        with self.lock:
+            self.callers[caller] = cursor
         return cursor
     # End of method create_cursor.
 
@@ -196,13 +482,138 @@ class DBInstance(object):
                     Remove from pool of caller objects.
         Returns:
         """
-        # Close cursor.
-        self.callers[caller].close()
         # Delete caller DBClient from callers pool.
-        del self.callers[caller]
+        with self.lock:
+            cursor = self.callers.pop(caller, None)
+        # Close cursor.
+        if cursor is not None:
+            cursor.close()
         return
     # End of method delete_cursor.
 
+    def cancel(self, cursor=None) -> bool:
+        """ Method that asks the database to stop the statement running on
+            this connection, which then raises an error in the thread running
+            it.  Meant to be called from another thread.
+            sqlite3: connection.interrupt.  psycopg2 and oracledb:
+            connection.cancel.  pyodbc: cursor.cancel.  pymysql has no cancel,
+            so KILL QUERY is sent over a second, short-lived connection.
+
+        Parameters:
+            cursor: the cursor running the statement, needed for pyodbc, and
+                for its connection if thread_local.
+        Returns:
+            sent (bool): True if the cancel request was sent.
+        """
+        if cursor is not None:
+            connection = cursor.connection
+        else:
+            connection = self.connection
+        if connection is None:
+            return False
+        try:
+            if self.db_lib_name == c.SQLITE3:
+                connection.interrupt()
+            elif self.db_lib_name in {c.PSYCOPG2, c.ORACLEDB}:
+                connection.cancel()
+            elif self.db_lib_name == c.PYMYSQL:
+                killer = self._open_connection()
+                try:
+                    killer_cursor = killer.cursor()
+                    killer_cursor.execute(
+                        'KILL QUERY {}'.format(int(connection.thread_id())))
+                    killer_cursor.close()
+                finally:
+                    killer.close()
+            elif self.db_lib_name == c.PYODBC and cursor is not None:
+                cursor.cancel()
+            else:
+                return False
+        except self.db_lib_obj.Error:
+            print_stacktrace()
+            print('Failed to cancel the running statement.')
+            return False
+        return True
+    # End of method cancel.
+
+    # METHODS FOR TUNING HOW MANY ROWS ARE FETCHED PER ROUND TRIP.
+
+    def set_fetch_sizes(self, arraysize: int = None,
+                        prefetch_rows: int = None,
+                        auto_tune: bool = None) -> None:
+        """ Method to set the fetch sizes used by cursors created afterwards.
+
+        Parameters:
+            arraysize (int): rows fetched per round trip, None for no change.
+            prefetch_rows (int): rows oracledb fetches with the execute call,
+                                 None for no change.
+            auto_tune (bool): whether to tune arraysize from the observed row
+                              width, None for no change.
+        Returns:
+        """
+        if arraysize is not None:
+            self.arraysize = max(1, int(arraysize))
+        if prefetch_rows is not None:
+            self.prefetch_rows = max(0, int(prefetch_rows))
+        if auto_tune is not None:
+            self.auto_tune_fetch = auto_tune
+        return
+    # End of method set_fetch_sizes.
+
+    def apply_fetch_sizes(self, cursor, arraysize: int = None) -> None:
+        """ Method to set the fetch sizes of a cursor, according to the
+            database library used.
+
+        Parameters:
+            cursor: the cursor to tune.
+            arraysize (int): rows fetched per round trip, None for the value
+                             saved in this DBInstance.
+        Returns:
+        """
+        if arraysize is None:
+            arraysize = self.arraysize
+        # arraysize is in DB API 2.0, the default size for fetchmany.
+        # oracledb also uses it for fetchall and iteration.
+        cursor.arraysize = arraysize
+        if self.db_lib_name == c.ORACLEDB:
+            # Rows returned by the execute round trip.
+            cursor.prefetchrows = self.prefetch_rows
+        elif hasattr(cursor, 'itersize'):
+            # Server-side psycopg2 cursors, rows per round trip in iteration.
+            cursor.itersize = arraysize
+        return
+    # End of method apply_fetch_sizes.
+
+    def tune_fetch_sizes(self, cursor, rows: list) -> int:
+        """ Method to set a cursor's arraysize so that each round trip
+            fetches about c.FETCH_TARGET_BYTES, judging by a sample of rows.
+
+        Parameters:
+            cursor: the cursor to tune.
+            rows (list): sample of rows already fetched with that cursor.
+        Returns:
+            arraysize (int): the new arraysize.
+        """
+        if len(rows) == 0:
+            return cursor.arraysize
+        total = 0
+        for row in rows:
+            for value in row:
+                if value is None:
+                    total += 1
+                elif isinstance(value, (str, bytes, bytearray)):
+                    total += len(value)
+                elif isinstance(value, (int, float)):
+                    total += 8
+                else:
+                    total += len(str(value))
+        row_width = max(1, total // len(rows))
+        arraysize = c.FETCH_TARGET_BYTES // row_width
+        arraysize = min(c.MAX_ARRAYSIZE, max(c.MIN_ARRAYSIZE, arraysize))
+        self.apply_fetch_sizes(cursor, arraysize)
+        return arraysize
+    # End of method tune_fetch_sizes.
+
     # DATABASE INFORMATION METHODS.
 
     def get_connection_status(self) -> str:
@@ -265,12 +676,16 @@ class DBInstance(object):
     # End of method get_paramstyle.
 
     def get_db_software_version(self) -> str:
-        """ Method to return the database software version.
+        """ Method to return the database software version.  Only asks the
+            database the first time, this costs a round trip.
 
         Parameters:
         Returns:
             db_software_version (str): database software version.
         """
+        if self.db_software_version is not None:
+            return self.db_software_version
+
         sql = {
             MYSQL: 'SELECT version()',
             POSTGRESQL: 'SELECT version()',
@@ -279,7 +694,7 @@ class DBInstance(object):
             SQLSERVER: 'SELECT @@VERSION'}.get(self.db_type, 'Nada')
 
         if sql[0:6] == 'SELECT':
-            cursor = self.connection.cursor()
+            cursor = self.get_connection().cursor()
             cursor.execute(sql)
             version = cursor.fetchone()[0]
             cursor.close()
@@ -288,10 +703,11 @@ class DBInstance(object):
             version = "unavailable for MS Access through SQL"
         elif self.db_lib_name != c.PYODBC:
             # This is for future use.
-            version = self.connection.version
+            version = self.get_connection().version
         else:
             version = 'unknown'
-        return str(version)
+        self.db_software_version = str(version)
+        return self.db_software_version
     # End of method get_db_software_version.
 
     def get_db_connection_string(self) -> str:
@@ -342,7 +758,7 @@ class DBInstance(object):
         """
         print('The database type is "{}".'.format(self.db_type))
         z = 'The database software version is {}.'
-        print(z.format(self.db_software_version))
+        print(z.format(self.get_db_software_version()))
         if self.db_type in c.FILE_DATABASES:
             print('The database path is "{}".'.format(self.db_path))
         else:
@@ -354,6 +770,29 @@ class DBInstance(object):
         return
     # End of method print_all_connection_parameters.
 
+    def get_cmdline_session(self, idle_timeout: float = None):
+        """ Get the persistent session of the db command line client for this
+            database, creating it if it does not exist.  The client itself is
+            started when the session first runs SQL, and is shut down after
+            being idle for idle_timeout seconds, then restarted if needed.
+
+        Parameters:
+            idle_timeout (float): seconds unused before the client is shut
+                down, None for CmdlineSession.DEFAULT_IDLE_TIMEOUT.
+        Returns:
+            cmdline_session (CmdlineSession): the session.
+        """
+        from CmdlineSession import CmdlineSession, DEFAULT_IDLE_TIMEOUT
+
+        if idle_timeout is None:
+            idle_timeout = DEFAULT_IDLE_TIMEOUT
+        if self.cmdline_session is None:
+            self.cmdline_session = CmdlineSession(self, idle_timeout)
+        else:
+            self.cmdline_session.idle_timeout = idle_timeout
+        return self.cmdline_session
+    # End of method get_cmdline_session.
+
     def get_cmdline_list(self) -> list:
         """ Get command line list for db command line client.
 
@@ -368,24 +807,28 @@ class DBInstance(object):
             z = '{} DOES NOT HAVE A COMMAND LINE INTERFACE.'
             z = z.format(self.db_type).upper()
             cmd = ['Error', z]
-        elif not is_file_in_path(self.os, self.db_client_exe):
+            return cmd
+
+        # Full path of the executable, cached by find_executable.
+        exe_path = find_executable(self.os, self.db_client_exe)
+        if exe_path == '':
             z = 'Did not find {} in PATH.'.format(self.db_client_exe)
             cmd = ['Error', z]
         elif self.db_type == MYSQL:
             conn_str = '--uri={}:{}@{}:{}/{}'.format(*args)
-            cmd = [self.db_client_exe, conn_str,
+            cmd = [exe_path, conn_str,
                    '--table', '--sql', '--quiet-start']
         elif self.db_type == ORACLE:
             conn_str = '{}/{}@{}:{}/{}'.format(*args)
-            cmd = [self.db_client_exe, conn_str]
+            cmd = [exe_path, conn_str]
         elif self.db_type == POSTGRESQL:
             conn_str = 'postgresql://{}:{}@{}:{}/{}'.format(*args)
-            cmd = [self.db_client_exe, '-d', conn_str]
+            cmd = [exe_path, '-d', conn_str]
         elif self.db_type == SQLITE:
-            cmd = [self.db_client_exe, self.db_path]
+            cmd = [exe_path, self.db_path]
         elif self.db_type == SQLSERVER:
             host_port = '{},{}'.format(self.hostname, self.port_num)
-            cmd = [self.db_client_exe, '-U', self.username, '-P', self.password,
+            cmd = [exe_path, '-U', self.username, '-P', self.password,
                    '-S', host_port, '-d', self.instance]
         else:
             z = 'Not yet implemented for {}.'.format(self.db_type)
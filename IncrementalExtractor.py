@@ -0,0 +1,307 @@
+""" IncrementalExtractor.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from os import replace, truncate
+from os.path import abspath, exists, getsize
+from time import perf_counter
+from DBClient import DBClient
+from OutputWriter import OutputWriter
+from functions import print_stacktrace
+from constants import FILE_DATABASES
+
+# File holding the high-water marks, when not specified.
+DEFAULT_STATE_FILE = 'extract_state.json'
+
+# Output formats.
+TEXT = 'text'
+JSONL = 'jsonl'
+
+# Types of high-water marks, so they are read back from the state file with
+# the type they were fetched with.
+WATERMARK_TYPES = {
+    'int': int,
+    'float': float,
+    'str': str,
+    'decimal': Decimal,
+    'date': date.fromisoformat,
+    'datetime': datetime.fromisoformat}
+
+
+def encode_watermark(value) -> (str, object):
+    """ Convert a high-water mark into something JSON can store.
+
+    Parameters:
+        value: the largest value of the watermark column extracted.
+    Returns:
+        type_name (str): key of WATERMARK_TYPES.
+        value: the value, as int, float or str.
+    """
+    if isinstance(value, bool):
+        return 'int', int(value)
+    elif isinstance(value, int):
+        return 'int', value
+    elif isinstance(value, float):
+        return 'float', value
+    elif isinstance(value, Decimal):
+        return 'decimal', str(value)
+    elif isinstance(value, datetime):
+        # datetime is a subclass of date, so test it first.
+        return 'datetime', value.isoformat()
+    elif isinstance(value, date):
+        return 'date', value.isoformat()
+    return 'str', str(value)
+# End of function encode_watermark.
+
+
+def decode_watermark(type_name: str, value):
+    """ Undo encode_watermark.
+
+    Parameters:
+        type_name (str): key of WATERMARK_TYPES.
+        value: the value, as saved in the state file.
+    Returns:
+        value: the high-water mark, with its original type.
+    """
+    return WATERMARK_TYPES[type_name](value)
+# End of function decode_watermark.
+
+
+class IncrementalExtractor(object):
+    """ Extract only the rows of a table added since the last extract, and
+        append them to the output of the previous extracts.  The rows to
+        extract are those whose watermark column, an ever-increasing key or
+        timestamp such as ORDERS.ORDERID, is greater than the largest value
+        extracted before, its high-water mark.  High-water marks are kept in
+        a JSON state file, one per database, table and output file, and only
+        updated after the rows are written, so a failed extract is simply
+        repeated.
+
+        Rows updated in place, or committed with a watermark value lower
+        than one already extracted, are not picked up.
+
+    Attributes:
+        db_instance: the DBInstance of the database to extract from.
+        state_file (str): path of the JSON state file.
+        state (dict): contents of the state file.
+        last_rows (int): rows extracted by the last extract.
+        last_secs (float): seconds taken by the last extract.
+    """
+    def __init__(self, db_instance,
+                 state_file: str = DEFAULT_STATE_FILE) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance of the database to extract from.
+            state_file (str): path of the JSON state file, created if it does
+                not exist.
+        Returns:
+        """
+        self.db_instance = db_instance
+        self.state_file: str = state_file
+        self.state: dict = self.load_state()
+        self.last_rows: int = 0
+        self.last_secs: float = 0.0
+        return
+    # End of method __init__.
+
+    def load_state(self) -> dict:
+        """ Read the state file.
+
+        Parameters:
+        Returns:
+            state (dict): state key -> dict with watermark column, type and
+                value, plus the time of the last extract.
+        """
+        if not exists(self.state_file):
+            return dict()
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print_stacktrace()
+            print('Cannot read state file "{}".'.format(self.state_file))
+            exit(1)
+    # End of method load_state.
+
+    def save_state(self) -> None:
+        """ Write the state file, replacing it in one step, so that it is
+            never left half written.
+
+        Parameters:
+        Returns:
+        """
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        replace(temp_file, self.state_file)
+        return
+    # End of method save_state.
+
+    def state_key(self, table: str, out_file_name: str) -> str:
+        """ Key of an extract in the state file: its database, table and
+            output file.
+
+        Parameters:
+            table (str): the table.
+            out_file_name (str): the output file.
+        Returns:
+            key (str): the key.
+        """
+        db = self.db_instance
+        if db.get_db_type() in FILE_DATABASES:
+            where = db.db_path
+        else:
+            where = '{}:{}/{}'.format(db.hostname, db.port_num, db.instance)
+        return '{}|{}|{}|{}'.format(db.get_db_type(), where, table.lower(),
+                                    abspath(out_file_name))
+    # End of method state_key.
+
+    def get_watermark(self, table: str, out_file_name: str):
+        """ Get the high-water mark of extracts of a table to a file.
+
+        Parameters:
+            table (str): the table.
+            out_file_name (str): the output file.
+        Returns:
+            watermark_column (str): the watermark column, '' if none saved.
+            watermark: the high-water mark, None if none saved.
+        """
+        entry = self.state.get(self.state_key(table, out_file_name))
+        if entry is None:
+            return '', None
+        return entry['column'], decode_watermark(entry['type'],
+                                                 entry['value'])
+    # End of method get_watermark.
+
+    def reset(self, table: str, out_file_name: str) -> None:
+        """ Forget the high-water mark of extracts of a table to a file, so
+            the next extract is full.
+
+        Parameters:
+            table (str): the table.
+            out_file_name (str): the output file.
+        Returns:
+        """
+        key = self.state_key(table, out_file_name)
+        if self.state.pop(key, None) is not None:
+            self.save_state()
+        return
+    # End of method reset.
+
+    def extract(self, table: str, watermark_column: str, out_file_name: str,
+                out_format: str = JSONL, columns: str = '*',
+                where: str = '', col_sep: str = '|') -> int:
+        """ Append the rows added to a table since the last extract to an
+            output file.  The first extract, or the first after changing the
+            watermark column, is of all rows, and replaces the output file.
+            If the extract fails, the rows it wrote are removed again.
+
+        Parameters:
+            table (str): the table to extract.
+            watermark_column (str): the ever-increasing column, such as a
+                generated key or a timestamp of insertion.
+            out_file_name (str): the output file.
+            out_format (str): TEXT (unaligned) or JSONL.
+            columns (str): the columns to select, comma separated.  Must
+                include watermark_column.
+            where (str): other condition on the rows to extract, '' for none.
+            col_sep (str): character(s) to separate columns in TEXT output.
+        Returns:
+            row_count (int): rows extracted, -1 if the extract failed.
+        """
+        if out_format not in {TEXT, JSONL}:
+            print('Invalid output format "{}".'.format(out_format))
+            exit(1)
+        start = perf_counter()
+        key = self.state_key(table, out_file_name)
+        saved_column, watermark = self.get_watermark(table, out_file_name)
+        if saved_column.lower() != watermark_column.lower():
+            if saved_column != '':
+                print('Watermark column changed, extracting all rows.')
+            watermark = None
+
+        # Only rows past the high-water mark.
+        conditions = list()
+        if watermark is not None:
+            conditions.append('{} > :watermark'.format(watermark_column))
+        if where != '':
+            conditions.append('({})'.format(where))
+        sql = 'SELECT {} FROM {}'.format(columns, table)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+
+        client = DBClient(self.db_instance)
+        client.set_portable_sql(sql, {'watermark': watermark})
+        col_names, batches = client.run_sql_stream()
+        if client.last_error is not None:
+            client.clean_up()
+            return -1
+        upper_names = [col_name.upper() for col_name in col_names]
+        if watermark_column.upper() not in upper_names:
+            print('Column "{}" not selected.'.format(watermark_column))
+            batches.close()
+            client.clean_up()
+            return -1
+        key_num = upper_names.index(watermark_column.upper())
+
+        # Track the largest watermark value while the rows stream past.
+        high = [watermark]
+
+        def tracked(batches):
+            for batch in batches:
+                batch_high = max((row[key_num] for row in batch
+                                  if row[key_num] is not None), default=None)
+                if batch_high is not None and \
+                        (high[0] is None or batch_high > high[0]):
+                    high[0] = batch_high
+                yield batch
+
+        append = watermark is not None and exists(out_file_name)
+        # Size to cut the output file back to if the extract fails, so no
+        # partial rows are left to be extracted again next time.
+        old_size = getsize(out_file_name) if append else 0
+        writer = OutputWriter(out_file_name=out_file_name, align_col=False,
+                              col_sep=col_sep, append=append)
+        failed = True
+        try:
+            if out_format == JSONL:
+                rows = (row for batch in tracked(batches) for row in batch)
+                row_count = writer.write_rows_jsonl(rows, col_names)
+            else:
+                header = None if append and getsize(out_file_name) > 0 \
+                    else col_names
+                row_count = writer.write_rows_stream(tracked(batches), header)
+            failed = client.last_error is not None
+        finally:
+            writer.close_output_file()
+            batches.close()
+            client.clean_up()
+            if failed:
+                truncate(out_file_name, old_size)
+        if failed:
+            return -1
+
+        # Save the new high-water mark, only now that the rows are written.
+        if high[0] is not None:
+            type_name, value = encode_watermark(high[0])
+            self.state[key] = {
+                'column': watermark_column, 'type': type_name, 'value': value,
+                'extracted_at': datetime.now().isoformat(timespec='seconds')}
+            self.save_state()
+        self.last_rows = row_count
+        self.last_secs = perf_counter() - start
+        print('Extracted {} new rows from {} in {:.3f} seconds.'.format(
+            row_count, table, self.last_secs))
+        return row_count
+    # End of method extract.
+# End of Class IncrementalExtractor.
@@ -0,0 +1,428 @@
+""" IndexAdvisor.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import re
+from DBClient import DBClient
+from DBInstance import DBInstance
+from OutputWriter import OutputWriter
+from PlanCache import PlanCache, normalize_sql, table_aliases, EXPLAINABLE
+from SQLScriptSplitter import SQLScriptSplitter
+from TableCopier import TableCopier
+from constants import SQLITE
+
+# Most columns in a proposed index.
+MAX_INDEX_COLUMNS = 3
+
+# Prefix of the names of proposed indexes.
+INDEX_PREFIX = 'ix_advisor_'
+
+# Predicates, in normalized SQL (see PlanCache.normalize_sql): joins between
+# columns of two tables, equality or IN (...) or IS NULL, and ranges.
+COLUMN = r'(?<![\w.])(?:([a-z_][\w$#]*)\.)?([a-z_][\w$#]*)'
+JOIN_PRED = re.compile(r'(?<![\w.])([a-z_][\w$#]*)\.([a-z_][\w$#]*)\s*=\s*'
+                       r'([a-z_][\w$#]*)\.([a-z_][\w$#]*)(?![\w.(])')
+EQ_PRED = re.compile(COLUMN + r'\s*(?:=\s*\?|in\s*\(\s*\?|is\s+null\b)')
+RANGE_PRED = re.compile(COLUMN + r'\s*(?:[<>]=?\s*\?|between\s+\?)')
+
+
+class Workload(object):
+    """ The statements run through a DBClient, collected with
+        DBClient.set_workload, or read from a SQL script, for IndexAdvisor.
+
+    Attributes:
+        statements (dict): normalized SQL -> dict with the SQL and bind
+            variables of its first run, and the number of runs.
+    """
+    def __init__(self) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+        Returns:
+        """
+        self.statements: dict = dict()
+        return
+    # End of method __init__.
+
+    def record(self, sql: str, bind_vars=None) -> None:
+        """ Add a run of a statement to the workload.
+
+        Parameters:
+            sql (str): the statement.
+            bind_vars: its bind variables, if any.
+        Returns:
+        """
+        words = sql.split()
+        if not words or words[0].upper() not in EXPLAINABLE:
+            return
+        key = normalize_sql(sql)
+        if key not in self.statements:
+            self.statements[key] = {'sql': sql, 'bind_vars': bind_vars,
+                                    'count': 0}
+        self.statements[key]['count'] += 1
+        return
+    # End of method record.
+
+    def add_script(self, script_path: str, db_type: str) -> None:
+        """ Add the statements in a SQL script to the workload, without bind
+            variables.
+
+        Parameters:
+            script_path (str): path of the script.
+            db_type (str): the database type whose command line client would
+                run the script, see SQLScriptSplitter.
+        Returns:
+        """
+        for sql in SQLScriptSplitter(db_type).split_file(script_path):
+            self.record(sql)
+        return
+    # End of method add_script.
+# End of Class Workload.
+
+
+class IndexAdvisor(object):
+    """ Propose indexes for a workload.  The predicates and join conditions
+        of each statement are parsed, and for each table a composite index is
+        proposed on its equality and join columns, followed by one range
+        column, unless an existing index (found through the data dictionary
+        queries in MyQueries.py) already leads with those columns.
+
+        The estimated benefit of an index is the number of rows read by full
+        scans of its table, in the current plans of the statements that could
+        use it, times their number of runs.  The benefit is checked by
+        explaining those statements in a SQLite copy of the schema (no rows),
+        before and after creating the index there.
+
+    Attributes:
+        db_instance: the DBInstance of the database the workload runs on.
+        db_client: DBClient for reading the data dictionary.
+        plan_cache (PlanCache): explains statements, finds table sizes.
+        columns (dict): table -> dict of lower case column name -> name.
+        indexes (dict): table -> list of lists of lower case column names.
+        proposals (list): the proposals of the last advise, as dicts with
+            table, columns, create_sql, statements, runs, benefit, improved
+            (statements whose SQLite plan no longer reads the table in full
+            with the index, None if not validated).
+    """
+    def __init__(self, db_instance) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance of the database the workload runs on.
+        Returns:
+        """
+        self.db_instance = db_instance
+        self.db_client = DBClient(db_instance)
+        self.plan_cache = PlanCache()
+        self.columns: dict = dict()
+        self.indexes: dict = dict()
+        self.proposals: list = list()
+        return
+    # End of method __init__.
+
+    def clean_up(self) -> None:
+        """ Cleans up, in preparation for deletion.
+
+        Parameters:
+        Returns:
+        """
+        self.db_client.clean_up()
+        return
+    # End of method clean_up.
+
+    def get_columns(self, table: str) -> dict:
+        """ Get the columns of a table, once per table.
+
+        Parameters:
+            table (str): the table.
+        Returns:
+            columns (dict): lower case column name -> column name.  Empty if
+                the table was not found.
+        """
+        if table not in self.columns:
+            self.columns[table] = {
+                column[0].lower(): column[0]
+                for column in self.db_client.get_table_columns(table)}
+        return self.columns[table]
+    # End of method get_columns.
+
+    def get_indexes(self, table: str) -> list:
+        """ Get the columns of the indexes of a table, once per table.
+
+        Parameters:
+            table (str): the table.
+        Returns:
+            indexes (list): for each index, list of its lower case columns.
+        """
+        if table not in self.indexes:
+            self.indexes[table] = [
+                [column.lower() for column in index_columns]
+                for _, _, index_columns in
+                self.db_client.get_table_indexes(table)]
+        return self.indexes[table]
+    # End of method get_indexes.
+
+    def candidates(self, sql: str) -> list:
+        """ Find the indexes that could help a statement.
+
+        Parameters:
+            sql (str): the statement.
+        Returns:
+            candidates (list): tuples of table, columns (list), and the
+                number of equality and join columns (the rest is a range).
+        """
+        aliases = table_aliases(sql)
+        tables = list(dict.fromkeys(aliases.values()))
+        tables = [table for table in tables if self.get_columns(table)]
+        aliases = {alias: table for alias, table in aliases.items()
+                   if table in tables}
+
+        # Only the predicates: after FROM in queries, after WHERE otherwise.
+        text = normalize_sql(sql)
+        words = text.split()
+        marker = ' from ' if words[0] in {'select', 'with', 'insert'} \
+            else ' where '
+        if marker not in text:
+            return list()
+        text = text[text.index(marker):]
+
+        def resolve(qualifier, column):
+            if qualifier:
+                candidates = [aliases[qualifier]] if qualifier in aliases \
+                    else list()
+            else:
+                candidates = tables
+            for table in candidates:
+                if column in self.get_columns(table):
+                    return table, self.get_columns(table)[column]
+            return None, None
+
+        found = {table: {'eq': list(), 'join': list(), 'range': list()}
+                 for table in tables}
+        for q1, c1, q2, c2 in JOIN_PRED.findall(text):
+            if q1 == q2:
+                continue
+            for qualifier, column in ((q1, c1), (q2, c2)):
+                table, column = resolve(qualifier, column)
+                if table is not None:
+                    found[table]['join'].append(column)
+        for kind, pattern in (('eq', EQ_PRED), ('range', RANGE_PRED)):
+            for qualifier, column in pattern.findall(text):
+                table, column = resolve(qualifier, column)
+                if table is not None:
+                    found[table][kind].append(column)
+
+        candidates = list()
+        for table in tables:
+            columns = list(dict.fromkeys(found[table]['eq'] +
+                                         found[table]['join']))
+            columns = columns[:MAX_INDEX_COLUMNS]
+            equality = len(columns)
+            for column in found[table]['range']:
+                if column not in columns and len(columns) < MAX_INDEX_COLUMNS:
+                    columns.append(column)
+                    break
+            if columns and not self.is_indexed(table, columns, equality):
+                candidates.append((table, columns, equality))
+        return candidates
+    # End of method candidates.
+
+    def is_indexed(self, table: str, columns: list, equality: int) -> bool:
+        """ Whether an existing index leads with the equality columns, in
+            any order, then the range column, if any.
+
+        Parameters:
+            table (str): the table.
+            columns (list): the columns of the candidate index.
+            equality (int): number of equality and join columns in it.
+        Returns:
+            indexed (bool): True if an existing index serves as well.
+        """
+        wanted = [column.lower() for column in columns]
+        for index_columns in self.get_indexes(table):
+            if len(index_columns) < len(wanted):
+                continue
+            if set(index_columns[:equality]) == set(wanted[:equality]) and \
+                    index_columns[equality:len(wanted)] == wanted[equality:]:
+                return True
+        return False
+    # End of method is_indexed.
+
+    def advise(self, workload: Workload, validate: bool = True) -> list:
+        """ Propose indexes for a workload.
+
+        Parameters:
+            workload (Workload): the statements.
+            validate (bool): if True, check the proposals by explaining the
+                statements in a SQLite copy of the schema.
+        Returns:
+            proposals (list): see attribute proposals, most beneficial first.
+        """
+        proposals = dict()
+        for statement in workload.statements.values():
+            sql = statement['sql']
+            candidates = self.candidates(sql)
+            if not candidates:
+                continue
+            _, _, scans = self.plan_cache.explain(self.db_instance, sql,
+                                                  statement['bind_vars'])
+            if scans is not None:
+                scans = [scan.lower() for scan in scans]
+            for table, columns, equality in candidates:
+                key = (table, tuple(columns))
+                if key not in proposals:
+                    proposals[key] = {
+                        'table': table, 'columns': columns,
+                        'equality': equality, 'statements': list(),
+                        'runs': 0, 'benefit': 0, 'improved': None}
+                proposal = proposals[key]
+                proposal['statements'].append(sql)
+                proposal['runs'] += statement['count']
+                if scans is not None and table.lower() in scans:
+                    row_count = self.plan_cache.get_table_rows(
+                        self.db_instance, table)
+                    proposal['benefit'] += statement['count'] * \
+                        max(row_count, 0)
+
+        self.proposals = list(proposals.values())
+        for number, proposal in enumerate(self.proposals, 1):
+            proposal['name'] = '{}{}'.format(INDEX_PREFIX, number)
+            proposal['create_sql'] = 'CREATE INDEX ix_{}_{} ON {} ({})'.format(
+                proposal['table'], '_'.join(proposal['columns']),
+                proposal['table'], ', '.join(proposal['columns']))
+        if validate and self.proposals:
+            self.validate()
+        self.proposals = [
+            proposal for proposal in self.proposals
+            if proposal['benefit'] > 0 or proposal['improved']]
+        self.proposals.sort(key=lambda p: (p['benefit'], p['improved'] or 0),
+                            reverse=True)
+        return self.proposals
+    # End of method advise.
+
+    def schema_copy(self, tables: list):
+        """ Create the tables, and their indexes, in a new SQLite database in
+            memory, without rows.
+
+        Parameters:
+            tables (list): the tables to copy.
+        Returns:
+            copy: DBInstance of the SQLite copy.
+        """
+        copy = DBInstance(self.db_instance.os, SQLITE, ':memory:', '', '', '',
+                          0, '')
+        cursor = copy.get_connection().cursor()
+        for table in tables:
+            if self.db_instance.get_db_type() == SQLITE:
+                # Same DDL, so rowid aliases and the like are kept.
+                self.db_client.set_sql(
+                    "SELECT sql FROM sqlite_master WHERE tbl_name = '{}' "
+                    "COLLATE NOCASE AND sql IS NOT NULL "
+                    "ORDER BY type DESC".format(table))
+                _, rows, _ = self.db_client.run_sql()
+                statements = [row[0] for row in rows]
+            else:
+                columns = self.db_client.get_table_columns(table)
+                copier = TableCopier(self.db_instance, copy, writers=1)
+                statements = [copier.create_table_sql(columns, table)]
+                names = self.get_columns(table)
+                for number, (_, unique, index_columns) in enumerate(
+                        self.db_client.get_table_indexes(table)):
+                    if all(column.lower() in names for column in index_columns):
+                        statements.append('CREATE {}INDEX ix_copy_{}_{} ON {} '
+                                          '({})'.format(
+                                              'UNIQUE ' if unique else '',
+                                              table, number, table,
+                                              ', '.join(index_columns)))
+            for statement in statements:
+                cursor.execute(statement)
+        cursor.close()
+        copy.get_connection().commit()
+        return copy
+    # End of method schema_copy.
+
+    def validate(self) -> None:
+        """ Explain the statements of each proposal in a SQLite copy of the
+            schema, before and after creating the proposed index, and count
+            the statements whose plan stops reading the table in full.
+            Statements SQLite cannot parse are not counted.
+
+        Parameters:
+        Returns:
+        """
+        tables = list(dict.fromkeys(p['table'] for p in self.proposals))
+        copy = self.schema_copy(tables)
+        cursor = copy.get_connection().cursor()
+        for proposal in self.proposals:
+            table = proposal['table'].lower()
+            # Full scans without the index.
+            before = list()
+            for sql in proposal['statements']:
+                before.append(self._copy_scans(copy, sql))
+            cursor.execute('CREATE INDEX {} ON {} ({})'.format(
+                proposal['name'], proposal['table'],
+                ', '.join(proposal['columns'])))
+            improved = 0
+            for sql, scans in zip(proposal['statements'], before):
+                if scans is None or table not in scans:
+                    continue
+                after = self._copy_scans(copy, sql)
+                if after is not None and table not in after:
+                    improved += 1
+            proposal['improved'] = improved
+            cursor.execute('DROP INDEX {}'.format(proposal['name']))
+        cursor.close()
+        copy.close_connection(del_cursors=True)
+        return
+    # End of method validate.
+
+    def _copy_scans(self, copy, sql: str) -> list:
+        """ Explain a statement in the SQLite copy of the schema.  It is
+            normalized, so its literals and bind variables are all "?".
+
+        Parameters:
+            copy: DBInstance of the SQLite copy.
+            sql (str): the statement.
+        Returns:
+            scans (list): lower case names of the tables read in full, None
+                if SQLite could not explain the statement.
+        """
+        sql = normalize_sql(sql)
+        _, _, scans = self.plan_cache.explain(copy, sql,
+                                              (None,) * sql.count('?'))
+        if scans is None:
+            return None
+        return [scan.lower() for scan in scans]
+    # End of method _copy_scans.
+
+    def print_report(self) -> None:
+        """ Print the proposals of the last advise.
+
+        Parameters:
+        Returns:
+        """
+        print('\nPROPOSED INDEXES:')
+        if not self.proposals:
+            print('None.')
+            return
+        col_names = ['CREATE_SQL', 'STATEMENTS', 'RUNS', 'EST_ROWS_SAVED',
+                     'PLANS_IMPROVED']
+        rows = list()
+        for p in self.proposals:
+            improved = 'not checked' if p['improved'] is None else \
+                '{} of {}'.format(p['improved'], len(p['statements']))
+            rows.append((p['create_sql'], len(p['statements']), p['runs'],
+                         p['benefit'], improved))
+        writer = OutputWriter(out_file_name='', align_col=True, col_sep='|')
+        writer.write_rows(rows, col_names)
+        print('\nEST_ROWS_SAVED: rows read by full scans of the table, in the '
+              'current plans of the statements, times their runs.')
+        return
+    # End of method print_report.
+# End of Class IndexAdvisor.
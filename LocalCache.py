@@ -0,0 +1,396 @@
+""" LocalCache.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from os import close, remove
+from os.path import exists
+from time import monotonic
+from DBClient import DBClient
+from DBInstance import DBInstance
+from OutputWriter import OutputWriter
+from PlanCache import table_aliases
+from functions import portable_to_native, print_stacktrace
+from constants import NAMED, SQLITE
+
+# Seconds a copy is fresh, when not specified.  None for forever.
+DEFAULT_TTL = 600.0
+
+# Values sqlite3 stores as they are.
+PLAIN_TYPES = (type(None), int, float, str, bytes)
+
+
+def local_value(value, exact_decimals: bool = False):
+    """ Convert a value fetched from the source into one sqlite3 can store.
+
+    Parameters:
+        value: the value.
+        exact_decimals (bool): if True, store Decimals as text, exactly,
+            instead of as float.
+    Returns:
+        value: int, float, str, bytes or None.
+    """
+    if isinstance(value, PLAIN_TYPES):
+        return value
+    elif isinstance(value, Decimal):
+        return str(value) if exact_decimals else float(value)
+    elif isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    elif isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    return str(value)
+# End of function local_value.
+
+
+class LocalCache(object):
+    """ Copies of tables or query results from a source database, of any
+        type, in a local SQLite database (in memory, or in a temporary file),
+        with indexes on chosen columns.  Set it on a DBClient with
+        DBClient.set_local_cache, and each SELECT that reads only cached
+        copies is answered from them, with no round trip to the source.
+        SELECTs the local copy cannot answer, including those in SQL that
+        SQLite does not understand, go to the source as usual.
+
+        Each copy is fresh for ttl seconds.  When a stale copy is used, it is
+        refreshed first if auto_refresh, otherwise used as it is, with a
+        warning.  A copy with a key column, an ever-increasing key such as
+        ORDERS.ORDERID, is refreshed incrementally: only rows with a key past
+        the largest one copied are fetched.  This misses updates and
+        deletes, which a full refresh (refresh with full=True) picks up.
+
+        SQLite has no decimal type.  By default, Decimals (NUMERIC and
+        DECIMAL columns) are copied as float, so they compare and sort as
+        numbers, like in the source, but keep only about 15 significant
+        digits.  With exact_decimals, they are copied as text, with every
+        digit, but SQLite then compares and sorts them as text, so
+        conditions like "amount > 100" on them go wrong in local SELECTs.
+
+    Attributes:
+        source: the DBInstance copied from.
+        local: the DBInstance of the local SQLite database.
+        ttl (float): default seconds a copy is fresh, None for forever.
+        auto_refresh (bool): if True, refresh stale copies when used.
+        exact_decimals (bool): if True, copy Decimals as text, else as
+            float.
+        entries (dict): lower case copy name -> dict with name, sql, values,
+            key_column, indexes, ttl, rows, loaded (monotonic time of the
+            last load or refresh), and refreshes.
+        hits (int): SELECTs answered locally.
+        misses (int): SELECTs sent to the source, with a local cache set.
+    """
+    def __init__(self, source, cache_path: str = ':memory:',
+                 ttl: float = DEFAULT_TTL,
+                 auto_refresh: bool = True,
+                 exact_decimals: bool = False) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            source: the DBInstance to copy from.
+            cache_path (str): the local SQLite database file, ':memory:' to
+                keep it in memory, '' for a temporary file, deleted by
+                clean_up.
+            ttl (float): default seconds a copy is fresh, None for forever.
+            auto_refresh (bool): if True, refresh stale copies when used.
+            exact_decimals (bool): if True, copy Decimals as text, exactly,
+                else as float.
+        Returns:
+        """
+        self.source = source
+        self.temp_file: str = ''
+        if cache_path == '':
+            from tempfile import mkstemp
+            handle, cache_path = mkstemp(suffix='.sqlite3')
+            close(handle)
+            self.temp_file = cache_path
+        self.local = DBInstance(source.os, SQLITE, cache_path, '', '', '', 0,
+                                '', lazy_connect=True)
+        self.ttl = ttl
+        self.auto_refresh: bool = auto_refresh
+        self.exact_decimals: bool = exact_decimals
+        self.entries: dict = dict()
+        self.hits: int = 0
+        self.misses: int = 0
+        return
+    # End of method __init__.
+
+    def clean_up(self) -> None:
+        """ Cleans up, in preparation for deletion.  Drops all copies.
+
+        Parameters:
+        Returns:
+        """
+        self.local.close_connection(del_cursors=True)
+        if self.temp_file != '' and exists(self.temp_file):
+            remove(self.temp_file)
+        self.entries = dict()
+        return
+    # End of method clean_up.
+
+    def materialize(self, name: str, table: str = '', sql: str = '',
+                    values: dict = None, indexes: list = None,
+                    key_column: str = '', ttl: float = -1) -> int:
+        """ Copy a table, or the result of a query, from the source into a
+            local table, replacing any earlier copy with that name.
+
+        Parameters:
+            name (str): name of the local table, which SELECTs use.
+            table (str): the source table to copy, '' to copy sql.
+            sql (str): SELECT on the source whose result to copy, bind
+                variables written :name (see DBClient.set_portable_sql).
+            values (dict): the values of the bind variables in sql.
+            indexes (list): columns to index, each a column name or a list
+                of column names for a composite index.
+            key_column (str): ever-increasing column, for incremental
+                refreshes, '' for full refreshes only.
+            ttl (float): seconds the copy is fresh, None for forever, -1 for
+                the cache's default.
+        Returns:
+            rows (int): rows copied, -1 if the copy failed.
+        """
+        if sql == '':
+            if table == '':
+                print('Nothing to materialize as "{}".'.format(name))
+                return -1
+            sql = 'SELECT * FROM {}'.format(table)
+        entry = {'name': name, 'sql': sql, 'values': dict(values or dict()),
+                 'key_column': key_column, 'indexes': list(indexes or list()),
+                 'ttl': self.ttl if ttl == -1 else ttl, 'rows': 0,
+                 'loaded': None, 'refreshes': 0}
+        self.entries.pop(name.lower(), None)
+        rows = self._load(entry, full=True)
+        if rows >= 0:
+            self.entries[name.lower()] = entry
+        return rows
+    # End of method materialize.
+
+    def refresh(self, name: str, full: bool = False) -> int:
+        """ Bring a copy up to date: incrementally if it has a key column,
+            unless full, otherwise by copying it all again.
+
+        Parameters:
+            name (str): name of the copy.
+            full (bool): if True, copy it all again.
+        Returns:
+            rows (int): rows copied, -1 if the refresh failed.
+        """
+        entry = self.entries.get(name.lower())
+        if entry is None:
+            print('No cached copy named "{}".'.format(name))
+            return -1
+        rows = self._load(entry, full=full or entry['key_column'] == '')
+        if rows >= 0:
+            entry['refreshes'] += 1
+        return rows
+    # End of method refresh.
+
+    def _load(self, entry: dict, full: bool) -> int:
+        """ Copy the rows of a copy from the source.  If full, load them into
+            a new local table, which then replaces the old one, so the old
+            copy is kept if the load fails.  Otherwise append the rows past
+            the largest key already copied.
+
+        Parameters:
+            entry (dict): the copy, see entries.
+            full (bool): if True, copy all rows.
+        Returns:
+            rows (int): rows copied, -1 if the copy failed.
+        """
+        name = entry['name']
+        sql = entry['sql']
+        values = dict(entry['values'])
+        key_column = entry['key_column']
+        cursor = self.local.create_cursor(self)
+        try:
+            if not full:
+                cursor.execute('SELECT MAX({}) FROM {}'.format(key_column,
+                                                               name))
+                watermark = cursor.fetchone()[0]
+                if watermark is not None:
+                    sql = 'SELECT * FROM ({}) cache_src WHERE {} > ' \
+                          ':cache_watermark'.format(sql, key_column)
+                    values['cache_watermark'] = watermark
+                else:
+                    full = True
+
+            reader = DBClient(self.source)
+            reader.set_portable_sql(sql, values)
+            col_names, batches = reader.run_sql_stream()
+            if reader.last_error is not None:
+                reader.clean_up()
+                return -1
+
+            target = name
+            if full:
+                target = name + '_cache_load'
+                cursor.execute('DROP TABLE IF EXISTS {}'.format(target))
+                cursor.execute('CREATE TABLE {} ({})'.format(
+                    target, ', '.join(self._quote(col) for col in col_names)))
+            insert_sql = 'INSERT INTO {} VALUES ({})'.format(
+                target, ', '.join(['?'] * len(col_names)))
+            rows = 0
+            for batch in batches:
+                if not all(isinstance(value, PLAIN_TYPES)
+                           for row in batch for value in row):
+                    batch = [tuple(local_value(value, self.exact_decimals)
+                                   for value in row) for row in batch]
+                cursor.executemany(insert_sql, batch)
+                rows += len(batch)
+            failed = reader.last_error is not None
+            reader.clean_up()
+            if failed:
+                cursor.connection.rollback()
+                return -1
+
+            if full:
+                cursor.connection.commit()
+                cursor.execute('DROP TABLE IF EXISTS {}'.format(name))
+                cursor.execute('ALTER TABLE {} RENAME TO {}'.format(target,
+                                                                    name))
+                for number, index in enumerate(entry['indexes'], start=1):
+                    if isinstance(index, str):
+                        index = [index]
+                    cursor.execute('CREATE INDEX ix_{}_{} ON {} ({})'.format(
+                        name, number, name, ', '.join(index)))
+                entry['rows'] = rows
+            else:
+                entry['rows'] += rows
+            # Statistics for the query planner.
+            cursor.execute('ANALYZE {}'.format(name))
+            cursor.connection.commit()
+        except self.local.db_lib_obj.Error:
+            print_stacktrace()
+            print('Failed to copy "{}" into the local cache.'.format(name))
+            cursor.connection.rollback()
+            return -1
+        finally:
+            self.local.delete_cursor(self)
+        entry['loaded'] = monotonic()
+        return rows
+    # End of method _load.
+
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        """ Quote a column name, which may be an expression like COUNT(*).
+
+        Parameters:
+            identifier (str): the column name.
+        Returns:
+            quoted (str): the column name in double quotes.
+        """
+        return '"' + identifier.replace('"', '""') + '"'
+    # End of method _quote.
+
+    def age(self, name: str) -> float:
+        """ Seconds since a copy was last loaded or refreshed.
+
+        Parameters:
+            name (str): name of the copy.
+        Returns:
+            age (float): seconds, None if there is no such copy.
+        """
+        entry = self.entries.get(name.lower())
+        if entry is None:
+            return None
+        return monotonic() - entry['loaded']
+    # End of method age.
+
+    def is_stale(self, name: str) -> bool:
+        """ Whether a copy is older than its ttl.
+
+        Parameters:
+            name (str): name of the copy.
+        Returns:
+            stale (bool): True if stale, or if there is no such copy.
+        """
+        entry = self.entries.get(name.lower())
+        if entry is None:
+            return True
+        return entry['ttl'] is not None and self.age(name) > entry['ttl']
+    # End of method is_stale.
+
+    def covered(self, sql: str) -> list:
+        """ Find the copies a SELECT reads, if it reads only copies.
+
+        Parameters:
+            sql (str): the SELECT.
+        Returns:
+            names (list): lower case names of the copies, empty if the SELECT
+                reads anything else.
+        """
+        tables = {table.split('.')[-1].lower()
+                  for table in table_aliases(sql).values()}
+        if len(tables) == 0 or not tables.issubset(self.entries):
+            return list()
+        return sorted(tables)
+    # End of method covered.
+
+    def query(self, sql: str, values: dict = None) -> tuple:
+        """ Answer a SELECT from the local copies, if it reads only copies.
+            Stale copies are refreshed first if auto_refresh, otherwise a
+            warning is printed.
+
+        Parameters:
+            sql (str): the SELECT, bind variables written :name.
+            values (dict): the values of the bind variables.
+        Returns:
+            None if the SELECT cannot be answered locally, otherwise:
+            col_names (list): the names of the columns.
+            rows (list): list of tuples, each tuple is one row.
+            age (float): seconds since the oldest copy read was refreshed.
+            stale (bool): True if a copy read is older than its ttl.
+        """
+        names = self.covered(sql)
+        if len(names) == 0:
+            self.misses += 1
+            return None
+        for name in names:
+            if self.is_stale(name) and self.auto_refresh:
+                self.refresh(name)
+        age = max(self.age(name) for name in names)
+        stale = any(self.is_stale(name) for name in names)
+
+        cursor = self.local.create_cursor(self)
+        try:
+            local_sql, bind_vars = portable_to_native(sql, NAMED,
+                                                      values or dict())
+            cursor.execute(local_sql, bind_vars)
+            col_names = [item[0] for item in cursor.description]
+            rows = cursor.fetchall()
+        except (self.local.db_lib_obj.Error, KeyError):
+            # Not SQLite's dialect, or the like.  Let the source answer it.
+            self.misses += 1
+            return None
+        finally:
+            self.local.delete_cursor(self)
+        if stale:
+            print('CACHED COPY STALE: {:.1f} SECONDS OLD.'.format(age))
+        self.hits += 1
+        return col_names, rows, age, stale
+    # End of method query.
+
+    def print_report(self) -> None:
+        """ Print the copies, their sizes and staleness, and the hit count.
+
+        Parameters:
+        Returns:
+        """
+        print('\nLOCAL CACHE: {} SELECTS ANSWERED LOCALLY, {} SENT TO THE '
+              'SOURCE.'.format(self.hits, self.misses))
+        col_names = ['NAME', 'ROWS', 'KEY_COLUMN', 'AGE_SECS', 'TTL_SECS',
+                     'REFRESHES', 'STALE']
+        rows = [(entry['name'], entry['rows'], entry['key_column'],
+                 '{:.1f}'.format(self.age(name)), entry['ttl'],
+                 entry['refreshes'], 'YES' if self.is_stale(name) else 'NO')
+                for name, entry in sorted(self.entries.items())]
+        writer = OutputWriter(out_file_name='', align_col=True, col_sep='|')
+        writer.write_rows(rows, col_names)
+        return
+    # End of method print_report.
+# End of Class LocalCache.
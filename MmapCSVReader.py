@@ -0,0 +1,293 @@
+""" MmapCSVReader.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import csv
+import mmap
+import re
+from io import StringIO
+from itertools import islice
+from os.path import getsize
+
+# Processes parsing a file at once, when not specified.
+DEFAULT_PROCESSES = 4
+
+
+def record_pattern(quotechar: bytes):
+    """ Make the regular expression matching one CSV record on raw bytes:
+        unquoted runs and quoted fields up to the end of the line, so line
+        breaks inside quoted fields do not end the record.  A doubled quote
+        inside a quoted field reads as two quoted fields back to back, which
+        ends the record in the same place.
+
+    Parameters:
+        quotechar (bytes): the quote character, encoded.
+    Returns:
+        pattern: the compiled regular expression.
+    """
+    q = re.escape(quotechar)
+    unquoted = b'[^' + q + b'\\n]*'
+    quoted = q + b'[^' + q + b']*' + q
+    return re.compile(unquoted + b'(?:' + quoted + unquoted + b')*(?:\\n|\\Z)')
+# End of function record_pattern.
+
+
+def read_chunk(path: str, start: int, end: int, delimiter: str = ',',
+               quotechar: str = '"', encoding: str = 'utf8') -> list:
+    """ Parse the records in a byte range of a CSV file, for a worker
+        process.  Each process maps the file itself, so only the byte range
+        is sent to it, and the pages of the file are shared.
+
+    Parameters:
+        path (str): the CSV file.
+        start (int): byte offset of the first record, from chunks.
+        end (int): byte offset just past the last record, from chunks.
+        delimiter (str): the column delimiter.
+        quotechar (str): the quote character.
+        encoding (str): the encoding of the file.
+    Returns:
+        rows (list): list of lists of strings, one per record.
+    """
+    reader = MmapCSVReader(path, delimiter, quotechar, encoding)
+    try:
+        return [reader.row(record)
+                for _, record in reader.records(start, end)]
+    finally:
+        reader.close()
+# End of function read_chunk.
+
+
+class MmapCSVReader(object):
+    """ Read a CSV file through a memory map.  Record boundaries are found
+        on the raw bytes, quote-aware, without decoding, and records are
+        handed out as memoryview slices of the map, without copying.  Only
+        the records parsed are decoded.  Records without quotes are split
+        directly, the others are parsed by the csv module.
+
+        The byte offset just past each record is given with it, to save as a
+        checkpoint and resume from with records(start=offset).  For parallel
+        parsing, chunks splits the file into byte ranges on record
+        boundaries, and read_chunk parses one range in a worker process.
+
+    Attributes:
+        path (str): the CSV file.
+        delimiter (str): the column delimiter.
+        quotechar (str): the quote character.
+        encoding (str): the encoding of the file.
+        size (int): size of the file in bytes.
+        offset (int): byte offset just past the last record read.
+    """
+    def __init__(self, path: str, delimiter: str = ',',
+                 quotechar: str = '"', encoding: str = 'utf8') -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            path (str): the CSV file.
+            delimiter (str): the column delimiter.
+            quotechar (str): the quote character.
+            encoding (str): the encoding of the file.
+        Returns:
+        """
+        self.path: str = path
+        self.delimiter: str = delimiter
+        self.quotechar: str = quotechar
+        self.encoding: str = encoding
+        self._delimiter = delimiter.encode(encoding)
+        self._quote = quotechar.encode(encoding)
+        self._pattern = record_pattern(self._quote)
+        self.offset: int = 0
+
+        self.size: int = getsize(path)
+        self._file = open(path, 'rb')
+        if self.size > 0:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        else:
+            # Empty files cannot be mapped.
+            self._map = b''
+        self._view = memoryview(self._map)
+        return
+    # End of method __init__.
+
+    def close(self) -> None:
+        """ Unmap and close the file.  Release the records first.  While a
+            generator of this reader is unfinished, such as after an error,
+            the map is left for the garbage collector to close.
+
+        Parameters:
+        Returns:
+        """
+        try:
+            self._view.release()
+            if isinstance(self._map, mmap.mmap):
+                self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+        return
+    # End of method close.
+
+    def spans(self, start: int = 0, end: int = None):
+        """ Find the records in a byte range of the file.
+
+        Parameters:
+            start (int): byte offset of a record, 0 for the first.
+            end (int): byte offset to stop at, None for the end of the file.
+        Returns:
+            spans: yields (start, end) byte offsets of each record, including
+                its line terminator.
+        """
+        if end is None:
+            end = self.size
+        for found in self._pattern.finditer(self._map, start):
+            if start >= end:
+                return
+            if found.start() != start:
+                # No closing quote: the rest of the file is one record.
+                break
+            yield start, found.end()
+            start = found.end()
+        if start < end:
+            yield start, self.size
+        return
+    # End of method spans.
+
+    def records(self, start: int = 0, end: int = None):
+        """ The records in a byte range of the file, without copying them.
+            Sets offset just past each record as it is yielded.
+
+        Parameters:
+            start (int): byte offset of a record, 0 for the first, or a
+                checkpoint offset to resume from.
+            end (int): byte offset to stop at, None for the end of the file.
+        Returns:
+            records: yields (offset just past the record, memoryview of the
+                record).
+        """
+        view = self._view
+        for record_start, record_end in self.spans(start, end):
+            self.offset = record_end
+            yield record_end, view[record_start:record_end]
+        return
+    # End of method records.
+
+    def row(self, record, decode: bool = True) -> list:
+        """ Split a record into its fields.
+
+        Parameters:
+            record: memoryview or bytes of the record, from records.
+            decode (bool): if False, return the fields as bytes, for callers
+                that convert them without decoding, like int(b'42').
+        Returns:
+            fields (list): the fields, as str, or as bytes if not decode.
+        """
+        data = bytes(record).rstrip(b'\r\n')
+        if self._quote not in data:
+            if decode:
+                return data.decode(self.encoding).split(self.delimiter)
+            return data.split(self._delimiter)
+        fields = next(csv.reader([data.decode(self.encoding)],
+                                 delimiter=self.delimiter,
+                                 quotechar=self.quotechar))
+        if decode:
+            return fields
+        return [field.encode(self.encoding) for field in fields]
+    # End of method row.
+
+    def rows(self, start: int = 0, end: int = None):
+        """ The records in a byte range of the file, split into fields.
+
+        Parameters:
+            start (int): byte offset of a record, 0 for the first, or a
+                checkpoint offset to resume from.
+            end (int): byte offset to stop at, None for the end of the file.
+        Returns:
+            rows: yields (offset just past the record, list of fields).
+        """
+        for offset, record in self.records(start, end):
+            yield offset, self.row(record)
+        return
+    # End of method rows.
+
+    def batches(self, size: int, start: int = 0, end: int = None):
+        """ The records in a byte range of the file, split into fields,
+            size records at a time.  Each batch is decoded once and parsed in
+            one call to the csv module, much faster than record by record.
+
+        Parameters:
+            size (int): records per batch, such as rows per commit.
+            start (int): byte offset of a record, 0 for the first, or a
+                checkpoint offset to resume from.
+            end (int): byte offset to stop at, None for the end of the file.
+        Returns:
+            batches: yields (offset just past the batch, list of rows).
+        """
+        spans = self.spans(start, end)
+        size = max(1, size)
+        while True:
+            batch = list(islice(spans, size))
+            if len(batch) == 0:
+                return
+            batch_start, batch_end = batch[0][0], batch[-1][1]
+            text = str(self._view[batch_start:batch_end], self.encoding)
+            self.offset = batch_end
+            yield batch_end, list(csv.reader(StringIO(text, newline=''),
+                                             delimiter=self.delimiter,
+                                             quotechar=self.quotechar))
+    # End of method batches.
+
+    def chunks(self, parts: int, start: int = 0) -> list:
+        """ Split the file into byte ranges of about equal size, on record
+            boundaries, for parsing in parallel with read_chunk.
+
+        Parameters:
+            parts (int): number of ranges wanted.
+            start (int): byte offset of the first record, such as just past
+                the header.
+        Returns:
+            ranges (list): (start, end) byte offsets, fewer than parts if
+                there are too few records.
+        """
+        ranges = list()
+        target = (self.size - start) / max(1, parts)
+        chunk_start = start
+        for _, record_end in self.spans(start):
+            if record_end - chunk_start >= target or \
+                    record_end == self.size:
+                ranges.append((chunk_start, record_end))
+                chunk_start = record_end
+        return ranges
+    # End of method chunks.
+
+    def rows_parallel(self, processes: int = DEFAULT_PROCESSES,
+                      start: int = 0):
+        """ Parse the file in chunks in worker processes, in file order.
+
+        Parameters:
+            processes (int): number of worker processes, and of chunks.
+            start (int): byte offset of the first record, such as just past
+                the header.
+        Returns:
+            chunks: yields (offset just past the chunk, list of rows).
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        ranges = self.chunks(processes, start)
+        if len(ranges) == 0:
+            return
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(read_chunk, self.path, chunk_start,
+                                       chunk_end, self.delimiter,
+                                       self.quotechar, self.encoding)
+                       for chunk_start, chunk_end in ranges]
+            for (_, chunk_end), future in zip(ranges, futures):
+                self.offset = chunk_end
+                yield chunk_end, future.result()
+        return
+    # End of method rows_parallel.
+# End of Class MmapCSVReader.
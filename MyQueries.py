@@ -20,6 +20,7 @@ VIEWS = "VIEWS"
 VIEW_COL = "VIEW COLUMNS"
 INDEXES = "INDEXES"
 IND_COL = "INDEX COLUMNS"
+TABLE_ROWS = "TABLE ROWS"
 
 data_dict_sql = dict()
 
@@ -228,7 +229,18 @@ data_dict_sql[VIEW_COL, SQLSERVER] = tab_col_sqlserver.format('V', '{}')
 # QUERIES FOR FINDING INDEXES.
 
 data_dict_sql[INDEXES, ACCESS] = NOT_POSSIBLE_SQL
-data_dict_sql[INDEXES, MYSQL] = NOT_IMPLEMENTED
+data_dict_sql[INDEXES, MYSQL] = (
+    "SELECT index_name, MAX(index_type) AS index_type, '' AS table_type,\n"
+    "  CASE\n"
+    "    WHEN MAX(non_unique) = 0\n"
+    "      THEN 'Yes'\n"
+    "    ELSE 'No'\n"
+    "    END AS \"unique\"\n"
+    "FROM INFORMATION_SCHEMA.STATISTICS\n"
+    "WHERE table_name = '{}'\n"
+    "AND table_schema = database()\n"
+    "GROUP BY index_name\n"
+    "ORDER BY index_name")
 data_dict_sql[INDEXES, ORACLE] = (
     "SELECT index_name, index_type, table_type,\n"
     "  CASE\n"
@@ -238,7 +250,20 @@ data_dict_sql[INDEXES, ORACLE] = (
     "  END AS \"unique\"\n"
     "FROM user_indexes WHERE table_name = '{}'\n"
     "ORDER BY index_name")
-data_dict_sql[INDEXES, POSTGRESQL] = NOT_IMPLEMENTED
+data_dict_sql[INDEXES, POSTGRESQL] = (
+    "SELECT i.relname AS index_name, am.amname AS index_type,\n"
+    "  '' AS table_type,\n"
+    "  CASE\n"
+    "    WHEN x.indisunique\n"
+    "      THEN 'Yes'\n"
+    "    ELSE 'No'\n"
+    "    END AS \"unique\"\n"
+    "FROM pg_index x\n"
+    "INNER JOIN pg_class i ON i.oid = x.indexrelid\n"
+    "INNER JOIN pg_class t ON t.oid = x.indrelid\n"
+    "INNER JOIN pg_am am ON am.oid = i.relam\n"
+    "WHERE t.relname = lower('{}')\n"
+    "ORDER BY i.relname")
 data_dict_sql[INDEXES, SQLITE] = (
     "SELECT name AS index_name, '' AS index_type, '' AS table_type,\n"
     "  CASE\n"
@@ -252,12 +277,35 @@ data_dict_sql[INDEXES, SQLITE] = (
     "    ELSE 'No'\n"
     "    END AS partial\n"
     "FROM pragma_index_list('{}')")
-data_dict_sql[INDEXES, SQLSERVER] = NOT_IMPLEMENTED
+data_dict_sql[INDEXES, SQLSERVER] = (
+    "SELECT i.name AS index_name, i.type_desc AS index_type,\n"
+    "  '' AS table_type,\n"
+    "  CASE\n"
+    "    WHEN i.is_unique = 1\n"
+    "      THEN 'Yes'\n"
+    "    ELSE 'No'\n"
+    "    END AS \"unique\"\n"
+    "FROM sys.indexes i INNER JOIN sys.objects o\n"
+    "  ON o.object_id = i.object_id\n"
+    "WHERE o.name = '{}'\n"
+    "AND i.name IS NOT NULL\n"
+    "ORDER BY i.name")
 
 # QUERIES FOR FINDING INDEX COLUMNS.
 
 data_dict_sql[IND_COL, ACCESS] = NOT_POSSIBLE_SQL
-data_dict_sql[IND_COL, MYSQL] = NOT_IMPLEMENTED
+data_dict_sql[IND_COL, MYSQL] = (
+    "SELECT seq_in_index AS column_position, column_name,\n"
+    "  CASE\n"
+    "    WHEN collation = 'D'\n"
+    "      THEN 'DESC'\n"
+    "    ELSE 'ASC'\n"
+    "    END AS descend,\n"
+    "  '' AS column_expression\n"
+    "FROM INFORMATION_SCHEMA.STATISTICS\n"
+    "WHERE index_name = '{}'\n"
+    "AND table_schema = database()\n"
+    "ORDER BY seq_in_index")
 data_dict_sql[IND_COL, ORACLE] = (
     "SELECT ic.column_position, column_name, descend,\n"
     "  column_expression FROM user_ind_columns ic\n"
@@ -266,7 +314,25 @@ data_dict_sql[IND_COL, ORACLE] = (
     "AND ic.index_name = ie.index_name\n"
     "WHERE ic.index_name = '{}'\n"
     "ORDER BY ic.column_position")
-data_dict_sql[IND_COL, POSTGRESQL] = NOT_IMPLEMENTED
+data_dict_sql[IND_COL, POSTGRESQL] = (
+    "SELECT k.n AS column_position, a.attname AS column_name,\n"
+    "  CASE\n"
+    "    WHEN x.indoption[k.n::int - 1] & 1 = 1\n"
+    "      THEN 'DESC'\n"
+    "    ELSE 'ASC'\n"
+    "    END AS descend,\n"
+    "  CASE\n"
+    "    WHEN k.attnum = 0\n"
+    "      THEN pg_get_indexdef(x.indexrelid, k.n::int, true)\n"
+    "    ELSE ''\n"
+    "    END AS column_expression\n"
+    "FROM pg_index x\n"
+    "INNER JOIN pg_class i ON i.oid = x.indexrelid\n"
+    "CROSS JOIN LATERAL unnest(x.indkey) WITH ORDINALITY AS k(attnum, n)\n"
+    "LEFT JOIN pg_attribute a\n"
+    "  ON a.attrelid = x.indrelid AND a.attnum = k.attnum\n"
+    "WHERE i.relname = lower('{}')\n"
+    "ORDER BY k.n")
 data_dict_sql[IND_COL, SQLITE] = (
     "SELECT seqno AS column_position, name AS column_name,\n"
     "  CASE\n"
@@ -277,4 +343,140 @@ data_dict_sql[IND_COL, SQLITE] = (
     "  '' AS column_expression\n"
     "FROM pragma_index_xinfo('{}')\n"
     "WHERE key = 1")
-data_dict_sql[IND_COL, SQLSERVER] = NOT_IMPLEMENTED
+data_dict_sql[IND_COL, SQLSERVER] = (
+    "SELECT ic.key_ordinal AS column_position, c.name AS column_name,\n"
+    "  CASE\n"
+    "    WHEN ic.is_descending_key = 1\n"
+    "      THEN 'DESC'\n"
+    "    ELSE 'ASC'\n"
+    "    END AS descend,\n"
+    "  '' AS column_expression\n"
+    "FROM sys.index_columns ic\n"
+    "INNER JOIN sys.indexes i\n"
+    "  ON i.object_id = ic.object_id AND i.index_id = ic.index_id\n"
+    "INNER JOIN sys.columns c\n"
+    "  ON c.object_id = ic.object_id AND c.column_id = ic.column_id\n"
+    "WHERE i.name = '{}'\n"
+    "AND ic.key_ordinal > 0\n"
+    "ORDER BY ic.key_ordinal")
+
+# QUERIES FOR FINDING THE NUMBER OF ROWS IN A TABLE.  Estimates from the
+# optimizer statistics, or MAX(rowid) in SQLite, so as not to scan the table.
+
+data_dict_sql[TABLE_ROWS, ACCESS] = NOT_POSSIBLE_SQL
+data_dict_sql[TABLE_ROWS, MYSQL] = (
+    "SELECT table_rows AS row_count\n"
+    "FROM information_schema.tables\n"
+    "WHERE table_schema = database()\n"
+    "AND table_name = '{}'")
+data_dict_sql[TABLE_ROWS, ORACLE] = (
+    "SELECT num_rows AS row_count\n"
+    "FROM user_tables\n"
+    "WHERE table_name = UPPER('{}')")
+data_dict_sql[TABLE_ROWS, POSTGRESQL] = (
+    "SELECT reltuples::bigint AS row_count\n"
+    "FROM pg_class\n"
+    "WHERE relname = lower('{}')\n"
+    "AND relkind IN ('r', 'p')")
+data_dict_sql[TABLE_ROWS, SQLITE] = (
+    "SELECT MAX(_rowid_) AS row_count\n"
+    "FROM {}")
+data_dict_sql[TABLE_ROWS, SQLSERVER] = (
+    "SELECT SUM(p.rows) AS row_count\n"
+    "FROM sys.partitions p INNER JOIN sys.objects o\n"
+    "  ON o.object_id = p.object_id\n"
+    "WHERE o.name = '{}'\n"
+    "AND p.index_id IN (0, 1)")
+
+# SQL FOR EXPLAINING HOW A STATEMENT IS RUN, used by PlanCache.py.  The
+# statement replaces '{}'.  A list of SQL is run in order, and the plan is the
+# result set of the last SQL in it that returns rows.
+# PostgreSQL's ANALYZE runs the statement, so it is only used for queries.
+
+QUERY_PLAN = "QUERY PLAN"
+DML_PLAN = "DML PLAN"
+
+explain_sql = dict()
+
+explain_sql[QUERY_PLAN, ACCESS] = NOT_POSSIBLE_SQL
+explain_sql[QUERY_PLAN, MYSQL] = "EXPLAIN FORMAT=JSON {}"
+explain_sql[QUERY_PLAN, ORACLE] = [
+    "DELETE FROM plan_table WHERE statement_id = 'DBCLIENT'",
+    "EXPLAIN PLAN SET STATEMENT_ID = 'DBCLIENT' FOR {}",
+    "SELECT plan_table_output\n"
+    "FROM TABLE(DBMS_XPLAN.DISPLAY('PLAN_TABLE', 'DBCLIENT', 'TYPICAL'))"]
+explain_sql[QUERY_PLAN, POSTGRESQL] = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {}"
+explain_sql[QUERY_PLAN, SQLITE] = "EXPLAIN QUERY PLAN {}"
+explain_sql[QUERY_PLAN, SQLSERVER] = [
+    "SET SHOWPLAN_XML ON",
+    "{}",
+    "SET SHOWPLAN_XML OFF"]
+
+explain_sql[DML_PLAN, ACCESS] = NOT_POSSIBLE_SQL
+explain_sql[DML_PLAN, MYSQL] = explain_sql[QUERY_PLAN, MYSQL]
+explain_sql[DML_PLAN, ORACLE] = explain_sql[QUERY_PLAN, ORACLE]
+explain_sql[DML_PLAN, POSTGRESQL] = "EXPLAIN (FORMAT JSON) {}"
+explain_sql[DML_PLAN, SQLITE] = explain_sql[QUERY_PLAN, SQLITE]
+explain_sql[DML_PLAN, SQLSERVER] = explain_sql[QUERY_PLAN, SQLSERVER]
+
+# SQL FOR PROFILING TABLES, used by TableProfiler.py.  Filled in with
+# str.format: {column}, {table}, {percent} of rows to sample, {seed} of the
+# sample, {source} (the table, or its sample), and {buckets} in the histogram.
+# Samples are repeatable: the same seed gives the same rows, so the aggregate
+# query and each histogram query of a table see the same sample.
+# Approximate distinct counts fall back to exact where there is no function.
+# Histograms are equi-depth: NTILE puts the same number of rows in each bucket.
+
+DISTINCT = "DISTINCT"
+APPROX_DISTINCT = "APPROX DISTINCT"
+SAMPLE = "SAMPLE"
+HISTOGRAM = "HISTOGRAM"
+
+profile_sql = dict()
+
+histogram_sql = (
+    "SELECT bucket, MIN({column}) AS bucket_low, MAX({column}) AS bucket_high,\n"
+    "  COUNT(*) AS bucket_rows\n"
+    "FROM (SELECT {column}, NTILE({buckets}) OVER (ORDER BY {column}) AS bucket\n"
+    "      FROM {source}\n"
+    "      WHERE {column} IS NOT NULL) h\n"
+    "GROUP BY bucket\n"
+    "ORDER BY bucket")
+
+# Access has no COUNT(DISTINCT ...), NTILE, or sampling.
+profile_sql[DISTINCT, ACCESS] = NOT_POSSIBLE_SQL
+profile_sql[DISTINCT, MYSQL] = "COUNT(DISTINCT {column})"
+profile_sql[DISTINCT, ORACLE] = "COUNT(DISTINCT {column})"
+profile_sql[DISTINCT, POSTGRESQL] = "COUNT(DISTINCT {column})"
+profile_sql[DISTINCT, SQLITE] = "COUNT(DISTINCT {column})"
+profile_sql[DISTINCT, SQLSERVER] = "COUNT(DISTINCT {column})"
+
+profile_sql[APPROX_DISTINCT, ACCESS] = NOT_POSSIBLE_SQL
+profile_sql[APPROX_DISTINCT, MYSQL] = profile_sql[DISTINCT, MYSQL]
+profile_sql[APPROX_DISTINCT, ORACLE] = "APPROX_COUNT_DISTINCT({column})"
+profile_sql[APPROX_DISTINCT, POSTGRESQL] = profile_sql[DISTINCT, POSTGRESQL]
+profile_sql[APPROX_DISTINCT, SQLITE] = profile_sql[DISTINCT, SQLITE]
+profile_sql[APPROX_DISTINCT, SQLSERVER] = "APPROX_COUNT_DISTINCT({column})"
+
+profile_sql[HISTOGRAM, ACCESS] = NOT_POSSIBLE_SQL
+profile_sql[HISTOGRAM, MYSQL] = histogram_sql
+profile_sql[HISTOGRAM, ORACLE] = histogram_sql
+profile_sql[HISTOGRAM, POSTGRESQL] = histogram_sql
+profile_sql[HISTOGRAM, SQLITE] = histogram_sql
+profile_sql[HISTOGRAM, SQLSERVER] = histogram_sql
+
+profile_sql[SAMPLE, ACCESS] = NOT_POSSIBLE_SQL
+# MySQL: RAND with a seed repeats its sequence, for the same scan order.
+profile_sql[SAMPLE, MYSQL] = (
+    "(SELECT * FROM {table} WHERE RAND({seed}) * 100 < {percent}) s")
+profile_sql[SAMPLE, ORACLE] = "{table} SAMPLE ({percent}) SEED ({seed})"
+profile_sql[SAMPLE, POSTGRESQL] = (
+    "{table} TABLESAMPLE SYSTEM ({percent}) REPEATABLE ({seed})")
+# SQLite: random() takes no seed, so rows are picked by a hash of the rowid.
+profile_sql[SAMPLE, SQLITE] = (
+    "(SELECT * FROM {table}\n"
+    " WHERE abs((rowid + {seed}) * 1103515245 % 1000000)"
+    " < {percent} * 10000) s")
+profile_sql[SAMPLE, SQLSERVER] = (
+    "{table} TABLESAMPLE ({percent} PERCENT) REPEATABLE ({seed})")
+
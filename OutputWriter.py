@@ -9,9 +9,19 @@ VERSION: 0.7.6
 DATE: Jul 9, 2020
 """
 import sys
+from math import isfinite
 from functions import print_stacktrace
 from os.path import dirname, isdir
 
+# JSON library for write_rows_jsonl: orjson if installed (it is several times
+# faster), otherwise json.  Imported when first needed, to save startup time,
+# with the modules _json_default needs.
+_json_lib = None
+_b64encode = _date = _time = _timedelta = _Decimal = None
+
+# Number of rows serialized per call to write, when writing JSON Lines.
+JSONL_BATCH_SIZE = 1000
+
 
 class OutputWriter(object):
     """ Write output to standard out or file.
@@ -27,7 +37,8 @@ class OutputWriter(object):
             "|"
             ","
     """
-    def __init__(self, out_file_name: str = '', align_col: bool = True, col_sep: str = ',') -> None:
+    def __init__(self, out_file_name: str = '', align_col: bool = True, col_sep: str = ',',
+                 append: bool = False) -> None:
         """ Constructor method for this class.
 
         Parameters:
@@ -39,6 +50,7 @@ class OutputWriter(object):
                 chr(9) (aka the horizontal tab character)
                 "|"
                 ","
+            append (bool): if True, add to the end of the output file instead of replacing it.
         Returns:
         """
         out_file = None
@@ -46,7 +58,7 @@ class OutputWriter(object):
             out_file = sys.stdout
         else:
             try:
-                out_file = open(out_file_name, 'w')
+                out_file = open(out_file_name, 'a' if append else 'w')
             except OSError:
                 print_stacktrace()
                 # Can envision situations where exiting might be excessive.
@@ -152,24 +164,7 @@ class OutputWriter(object):
         Returns:
         """
         # Put quotes around columns containing col_sep.
-        if self.col_sep != '':
-            # Loop through rows.
-            for item_num1, row in enumerate(all_rows):
-                changed = False
-                # Loop through columns in each row.
-                for item_num2, column in enumerate(row):
-                    # Update row when needed.
-                    if self.col_sep in str(column):
-                        # Convert tuple to list to make row mutable.
-                        if not changed:
-                            row = list(row)
-                            changed = True
-                        # Enclose values containing col_sep in quotes,
-                        # double quotes to escape them.
-                        row[item_num2] = "'" + str(column).replace("'", "''") + "'"
-                # Save updated version of row if changed = True.
-                if changed:
-                    all_rows[item_num1] = tuple(row)
+        self._quote_col_sep(all_rows)
 
         # Column name widths.
         if col_names is not None:
@@ -210,4 +205,188 @@ class OutputWriter(object):
             print('Just wrote output to "{}".'.format(self.out_file_name))
         return
     # End of method write_rows.
+
+    def _quote_col_sep(self, all_rows: list) -> None:
+        """ Put quotes around values containing col_sep, in place.
+
+        Parameters:
+            all_rows (list): list of tuples, each tuple a row.
+        Returns:
+        """
+        if self.col_sep != '':
+            # Loop through rows.
+            for item_num1, row in enumerate(all_rows):
+                changed = False
+                # Loop through columns in each row.
+                for item_num2, column in enumerate(row):
+                    # Update row when needed.
+                    if self.col_sep in str(column):
+                        # Convert tuple to list to make row mutable.
+                        if not changed:
+                            row = list(row)
+                            changed = True
+                        # Enclose values containing col_sep in quotes,
+                        # double quotes to escape them.
+                        row[item_num2] = "'" + str(column).replace("'", "''") + "'"
+                # Save updated version of row if changed = True.
+                if changed:
+                    all_rows[item_num1] = tuple(row)
+        return
+    # End of method _quote_col_sep.
+
+    def write_rows_stream(self, batches, col_names: list) -> int:
+        """ Write rows in the output of SQL to chosen destination, a batch at
+            a time, so that the rows never all have to be in memory.  Columns
+            cannot be aligned, because the widest value is not known until
+            all rows are read.
+
+        Parameters:
+            batches: iterable of lists of tuples, each tuple a row.
+            col_names (list): list of column names.
+                None means do not write column headers.
+        Returns:
+            row_count (int): number of rows written.
+        """
+        if col_names is not None:
+            self.out_file.write(self.col_sep.join(col_names))
+        row_count = 0
+        row_fmt = None
+        for batch in batches:
+            if len(batch) == 0:
+                continue
+            batch = list(batch)
+            self._quote_col_sep(batch)
+            if row_fmt is None:
+                row_fmt = self.col_sep.join(['{}'] * len(batch[0]))
+            lines = list()
+            for row in batch:
+                row = ['' if x is None else x for x in row]
+                lines.append('\n' + row_fmt.format(*row))
+            self.out_file.write(''.join(lines))
+            row_count += len(batch)
+
+        # If printed to file, announce that.
+        if self.out_file_name != '':
+            print('Just wrote output to "{}".'.format(self.out_file_name))
+        return row_count
+    # End of method write_rows_stream.
+
+    def write_rows_jsonl(self, all_rows, col_names: list,
+                         batch_size: int = JSONL_BATCH_SIZE) -> int:
+        """ Write rows in the output of SQL as JSON Lines (aka NDJSON), one
+            JSON object per row, keyed by column name.  Rows are serialized in
+            batches, with one call to write per batch, so all_rows can be a
+            generator of rows that never fits in memory.
+
+        Parameters:
+            all_rows: iterable of tuples, each tuple a row.
+            col_names (list): list of column names, the keys of each object.
+            batch_size (int): number of rows to serialize per write.
+        Returns:
+            row_count (int): number of rows written.
+        """
+        row_count = 0
+        batch = list()
+        for row in all_rows:
+            batch.append(dict(zip(col_names, row)))
+            if len(batch) >= batch_size:
+                self.out_file.write(_jsonl_batch(batch))
+                row_count += len(batch)
+                batch = list()
+        if len(batch) > 0:
+            self.out_file.write(_jsonl_batch(batch))
+            row_count += len(batch)
+        # If printed to file, announce that.
+        if self.out_file_name != '':
+            print('Just wrote output to "{}".'.format(self.out_file_name))
+        return row_count
+    # End of method write_rows_jsonl.
 # End of Class OutputWriter.
+
+
+def _get_json_lib():
+    """ Import the JSON library, if not yet imported.
+
+    Parameters:
+    Returns:
+        _json_lib: the orjson module, or else the json module.
+    """
+    global _json_lib, _b64encode, _date, _time, _timedelta, _Decimal
+    if _json_lib is None:
+        from base64 import b64encode as _b64encode
+        from datetime import date as _date, time as _time
+        from datetime import timedelta as _timedelta
+        from decimal import Decimal as _Decimal
+        try:
+            import orjson as _json_lib
+        except ImportError:
+            import json as _json_lib
+    return _json_lib
+# End of function _get_json_lib.
+
+
+def _json_default(value):
+    """ Convert values that JSON cannot represent natively.
+        Used by both orjson and json.
+
+    Parameters:
+        value: a column value that the JSON encoder does not recognize.
+    Returns:
+        value converted to str, or to a type the JSON encoder recognizes.
+    """
+    if isinstance(value, (_date, _time)):
+        # datetime is a subclass of date.
+        return value.isoformat()
+    elif isinstance(value, _Decimal):
+        # str, not float, so no digits are lost.
+        return str(value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        return _b64encode(value).decode('ascii')
+    elif isinstance(value, _timedelta):
+        return value.total_seconds()
+    else:
+        raise TypeError('Cannot convert {} to JSON.'.format(type(value)))
+# End of function _json_default.
+
+
+def _jsonl_batch(batch: list) -> str:
+    """ Serialize a batch of rows to JSON Lines.
+
+    Parameters:
+        batch (list): list of dicts, one dict per row.
+    Returns:
+        text (str): one line of JSON per row, each line ending in a newline.
+    """
+    json_lib = _get_json_lib()
+    if json_lib.__name__ == 'orjson':
+        # orjson returns bytes, and serializes datetimes itself.
+        dumps = json_lib.dumps
+        lines = [dumps(row, default=_json_default) for row in batch]
+        return (b'\n'.join(lines) + b'\n').decode('utf-8')
+    else:
+        lines = list()
+        for row in batch:
+            try:
+                lines.append(_json_dumps(json_lib, row))
+            except ValueError:
+                # NaN and infinities are not JSON, write null, like orjson.
+                lines.append(_json_dumps(json_lib, {
+                    key: None if isinstance(value, float) and
+                    not isfinite(value) else value
+                    for key, value in row.items()}))
+        return '\n'.join(lines) + '\n'
+# End of function _jsonl_batch.
+
+
+def _json_dumps(json_lib, row: dict) -> str:
+    """ Serialize one row with the json module, refusing NaN and infinities.
+
+    Parameters:
+        json_lib: the json module.
+        row (dict): the row.
+    Returns:
+        text (str): the row as one line of JSON.
+    """
+    return json_lib.dumps(row, default=_json_default, ensure_ascii=False,
+                          separators=(',', ':'), allow_nan=False)
+# End of function _json_dumps.
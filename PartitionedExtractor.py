@@ -0,0 +1,482 @@
+""" PartitionedExtractor.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+from queue import Queue, Full
+from threading import Event
+from time import perf_counter
+from ConnectionPool import ConnectionPool
+from DBClient import DBClient
+from OutputWriter import OutputWriter
+from constants import SQLITE
+
+# Number of key ranges (slices) a table is split into, when not specified.
+DEFAULT_SLICES = 4
+
+# Output formats.
+TEXT = 'text'
+JSONL = 'jsonl'
+OUT_FILE_EXT = {TEXT: 'txt', JSONL: 'jsonl'}
+
+# Batches of rows a slice can fetch ahead of the merged stream.
+MERGE_QUEUE_BATCHES = 4
+
+
+class PartitionedExtractor(object):
+    """ Extract one large table over several connections at once.  The table
+        is split into slices by ranges of a numeric key column, preferably
+        a NOT NULL column leading a unique index, found in the data
+        dictionary.  Rows whose key is NULL are extracted as a slice of
+        their own.
+        The slices are fetched concurrently, each over its own pooled
+        connection, and written to one file per slice, or merged into one
+        stream in key order.
+
+        Slices are equal ranges of key values, between the key's MIN and MAX,
+        so they hold similar numbers of rows only if the key values are
+        spread evenly, as for most generated keys.
+
+    Attributes:
+        db_instance: the DBInstance of the database to extract from.
+        slices (int): number of slices.
+        pool (ConnectionPool): connections the slices are fetched over.
+        own_pool (bool): whether the pool was created here, and so is closed
+            by clean_up.
+        slice_stats (list): one dict per slice of the last extract: number,
+            low, high, rows, secs, out_file_name, error.
+        stop (Event): set to stop slices early.
+    """
+    def __init__(self, db_instance, slices: int = DEFAULT_SLICES,
+                 pool: ConnectionPool = None) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance of the database to extract from.
+            slices (int): number of slices.
+            pool (ConnectionPool): connections to fetch the slices over,
+                None to create a pool with one connection per slice.
+        Returns:
+        """
+        self.db_instance = db_instance
+        self.slices: int = max(1, slices)
+        self.own_pool: bool = pool is None
+        if pool is None:
+            pool = ConnectionPool(db_instance, self.slices)
+        self.pool: ConnectionPool = pool
+        self.slice_stats: list = list()
+        self.stop = Event()
+        return
+    # End of method __init__.
+
+    def clean_up(self) -> None:
+        """ Cleans up, in preparation for deletion.
+
+        Parameters:
+        Returns:
+        """
+        if self.own_pool:
+            self.pool.close()
+        return
+    # End of method clean_up.
+
+    def find_key_column(self, table: str) -> str:
+        """ Find a numeric column to split a table by: the first column of an
+            index, NOT NULL columns first, then unique indexes first, then
+            single column indexes first.  For SQLite, an INTEGER PRIMARY KEY
+            (the rowid) before all, and rowid before nullable columns.
+
+        Parameters:
+            table (str): the table to extract.
+        Returns:
+            key_column (str): the column, '' if none found.
+        """
+        client = DBClient(self.db_instance)
+        columns = {column_name.upper(): (group, nullable)
+                   for column_name, _, group, nullable
+                   in client.get_table_columns(table)}
+        indexes = client.get_table_indexes(table)
+        rowid_alias = ''
+        if self.db_instance.get_db_type() == SQLITE:
+            client.set_sql("SELECT name, type FROM pragma_table_info('{}') "
+                           "WHERE pk > 0".format(table))
+            _, rows, _ = client.run_sql()
+            if len(rows) == 1 and rows[0][1].upper() == 'INTEGER':
+                rowid_alias = rows[0][0]
+        client.clean_up()
+        if rowid_alias != '':
+            return rowid_alias
+
+        candidates = list()
+        for index_name, unique, index_columns in indexes:
+            if len(index_columns) == 0 or index_columns[0] is None:
+                continue
+            group, nullable = columns.get(index_columns[0].upper(),
+                                          (None, True))
+            if group == 'NUMBER':
+                candidates.append((nullable, not unique,
+                                   len(index_columns) > 1, index_columns[0]))
+        candidates.sort(key=lambda candidate: candidate[:3])
+        if len(candidates) > 0 and not candidates[0][0]:
+            return candidates[0][3]
+        if self.db_instance.get_db_type() == SQLITE:
+            # The key SQLite stores rows in order of, never NULL.
+            return 'rowid'
+        if len(candidates) > 0:
+            return candidates[0][3]
+        return ''
+    # End of method find_key_column.
+
+    def key_nullable(self, table: str, key_column: str) -> bool:
+        """ Whether the key column may be NULL, from the data dictionary.
+
+        Parameters:
+            table (str): the table to extract.
+            key_column (str): the column to split by.
+        Returns:
+            nullable (bool): False only if the column is known to be NOT NULL.
+        """
+        if self.db_instance.get_db_type() == SQLITE and \
+                key_column.lower() in {'rowid', 'oid', '_rowid_'}:
+            return False
+        client = DBClient(self.db_instance)
+        columns = client.get_table_columns(table)
+        client.clean_up()
+        for column_name, _, _, nullable in columns:
+            if column_name.upper() == key_column.upper():
+                return nullable
+        return True
+    # End of method key_nullable.
+
+    def key_ranges(self, table: str, key_column: str, where: str = '',
+                   nullable: bool = True) -> list:
+        """ Split the values of the key column into ranges.  An error in the
+            query is raised, not taken for a table without rows.
+
+        Parameters:
+            table (str): the table to extract.
+            key_column (str): the column to split by.
+            where (str): condition on the rows to extract, '' for all.
+            nullable (bool): whether the key column may be NULL, to add a
+                range for the rows whose key is NULL.
+        Returns:
+            ranges (list): (low, high, is_last) tuples, for
+                low <= key < high, or low <= key <= high if is_last, and
+                (None, None, True) for key IS NULL.  Empty if there are no
+                rows.
+        """
+        client = DBClient(self.db_instance)
+        sql = 'SELECT MIN({0}), MAX({0}) FROM {1}'.format(key_column, table)
+        if where != '':
+            sql += ' WHERE ' + where
+        client.set_sql(sql)
+        _, rows, _ = client.run_sql()
+        error = client.last_error
+        client.clean_up()
+        if error is not None:
+            raise error
+
+        ranges = list()
+        if len(rows) > 0 and rows[0][0] is not None:
+            low, high = rows[0][0], rows[0][1]
+            if isinstance(low, int) and isinstance(high, int):
+                bounds = [low + (high - low + 1) * n // self.slices
+                          for n in range(self.slices)]
+            else:
+                bounds = [low + (high - low) * n / self.slices
+                          for n in range(self.slices)]
+            # Fewer slices than asked for, if fewer key values.
+            bounds = sorted(set(bounds))
+            ranges = [(bounds[n], bounds[n + 1], False)
+                      for n in range(len(bounds) - 1)]
+            ranges.append((bounds[-1], high, True))
+        if nullable:
+            ranges.append((None, None, True))
+        return ranges
+    # End of method key_ranges.
+
+    def slice_sql(self, table: str, key_column: str, key_range: tuple,
+                  columns: str = '*', where: str = '') -> (str, dict):
+        """ Write the SELECT for one slice, with bind variables :low and
+            :high, for DBClient.set_portable_sql.
+
+        Parameters:
+            table (str): the table to extract.
+            key_column (str): the column to split by.
+            key_range (tuple): (low, high, is_last), from key_ranges.
+            columns (str): the columns to select, comma separated.
+            where (str): condition on the rows to extract, '' for all.
+        Returns:
+            sql (str): the SELECT.
+            values (dict): the values of its bind variables.
+        """
+        low, high, is_last = key_range
+        if low is None:
+            sql = 'SELECT {0} FROM {1} WHERE {2} IS NULL'.format(
+                columns, table, key_column)
+            values = dict()
+        else:
+            sql = 'SELECT {0} FROM {1} WHERE {2} >= :low AND {2} {3} :high'
+            sql = sql.format(columns, table, key_column,
+                             '<=' if is_last else '<')
+            values = {'low': low, 'high': high}
+        if where != '':
+            sql += ' AND ({})'.format(where)
+        return sql, values
+    # End of method slice_sql.
+
+    def _prepare(self, table: str, key_column: str, columns: str,
+                 where: str) -> list:
+        """ Find the key column if needed, and write the SELECT of each slice.
+
+        Parameters:
+            table (str): the table to extract.
+            key_column (str): the column to split by, '' to find one.
+            columns (str): the columns to select, comma separated.
+            where (str): condition on the rows to extract, '' for all.
+        Returns:
+            slice_sql (list): (sql, values) tuples, from slice_sql, empty if
+                no rows.  None if no key column.
+        """
+        self.stop.clear()
+        self.slice_stats = list()
+        if key_column == '':
+            key_column = self.find_key_column(table)
+            if key_column == '':
+                print('Found no numeric indexed column in table "{}".'.format(
+                    table))
+                return None
+            print('Splitting table "{}" by column "{}".'.format(table,
+                                                                 key_column))
+        nullable = self.key_nullable(table, key_column)
+        if nullable:
+            print('Column "{}" may be NULL, those rows are one more slice.'
+                  .format(key_column))
+        slice_sql = list()
+        for number, key_range in enumerate(
+                self.key_ranges(table, key_column, where, nullable), start=1):
+            slice_sql.append(self.slice_sql(table, key_column, key_range,
+                                            columns, where))
+            self.slice_stats.append({
+                'number': number, 'low': key_range[0], 'high': key_range[1],
+                'rows': 0, 'secs': 0.0, 'out_file_name': '', 'error': ''})
+        if len(slice_sql) == 0:
+            print('No rows to extract from table "{}".'.format(table))
+        return slice_sql
+    # End of method _prepare.
+
+    def _run_slice(self, number: int, sql: str, values: dict,
+                   consume) -> None:
+        """ Fetch one slice over a pooled connection, and pass its rows on.
+
+        Parameters:
+            number (int): the slice number, from 1.
+            sql (str): the slice's SELECT.
+            values (dict): the values of its bind variables.
+            consume: function(number, col_names, batches) returning the
+                number of rows it took from batches.
+        Returns:
+        """
+        stats = self.slice_stats[number - 1]
+        start = perf_counter()
+        with self.pool.borrow() as db_instance:
+            if db_instance is None:
+                stats['error'] = 'No connection.'
+                return
+            client = DBClient(db_instance)
+            client.set_portable_sql(sql, values)
+            col_names, batches = client.run_sql_stream()
+            try:
+                stats['rows'] = consume(number, col_names, batches)
+            finally:
+                if hasattr(batches, 'close'):
+                    batches.close()
+                if client.last_error is not None:
+                    stats['error'] = str(client.last_error)
+                client.clean_up()
+        stats['secs'] = perf_counter() - start
+        return
+    # End of method _run_slice.
+
+    def extract_to_files(self, table: str, out_dir: str,
+                         out_format: str = JSONL, key_column: str = '',
+                         columns: str = '*', where: str = '',
+                         col_sep: str = '|') -> int:
+        """ Extract a table into one file per slice, named
+            <table>_slice_<number>.<txt or jsonl>, fetching slices
+            concurrently.
+
+        Parameters:
+            table (str): the table to extract.
+            out_dir (str): folder for the files.
+            out_format (str): TEXT (unaligned) or JSONL.
+            key_column (str): the numeric column to split by, '' to find one.
+            columns (str): the columns to select, comma separated.
+            where (str): condition on the rows to extract, '' for all.
+            col_sep (str): character(s) to separate columns in TEXT output.
+        Returns:
+            failures (int): number of slices that failed.
+        """
+        if out_format not in OUT_FILE_EXT:
+            print('Invalid output format "{}".'.format(out_format))
+            exit(1)
+
+        def consume(number, col_names, batches):
+            stats = self.slice_stats[number - 1]
+            out_file_name = join(out_dir, '{}_slice_{:04d}.{}'.format(
+                table.lower(), number, OUT_FILE_EXT[out_format]))
+            writer = OutputWriter(out_file_name=out_file_name,
+                                  align_col=False, col_sep=col_sep)
+            try:
+                if out_format == JSONL:
+                    rows = (row for batch in batches for row in batch)
+                    return writer.write_rows_jsonl(rows, col_names)
+                return writer.write_rows_stream(batches, col_names)
+            finally:
+                writer.close_output_file()
+                stats['out_file_name'] = out_file_name
+
+        slice_sql = self._prepare(table, key_column, columns, where)
+        if slice_sql is None:
+            return 1
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = [executor.submit(self._run_slice, number, sql,
+                                       values, consume)
+                       for number, (sql, values) in enumerate(slice_sql,
+                                                                 start=1)]
+            for future in futures:
+                future.result()
+        return len([s for s in self.slice_stats if s['error'] != ''])
+    # End of method extract_to_files.
+
+    def extract_stream(self, table: str, key_column: str = '',
+                       columns: str = '*', where: str = '') -> (list, object):
+        """ Extract a table as one stream of batches of rows, in key order,
+            while later slices are fetched ahead concurrently.  The slices
+            start when the stream is first read, and stop when it ends or is
+            closed.  If a slice fails, the stream raises RuntimeError when it
+            gets to that slice, so no rows are silently missing.
+
+        Parameters:
+            table (str): the table to extract.
+            key_column (str): the numeric column to split by, '' to find one.
+            columns (str): the columns to select, comma separated.
+            where (str): condition on the rows to extract, '' for all.
+        Returns:
+            col_names: list of the names of the columns being fetched.
+            batches: generator of lists of tuples, each tuple is one row.
+        """
+        slice_sql = self._prepare(table, key_column, columns, where)
+        if not slice_sql:
+            return list(), iter(())
+
+        # Column names, without fetching any rows.
+        client = DBClient(self.db_instance)
+        client.set_sql('SELECT {} FROM {} WHERE 1 = 0'.format(columns, table))
+        col_names, _, _ = client.run_sql()
+        error = client.last_error
+        client.clean_up()
+        if error is not None:
+            raise error
+        return col_names, self._merge(slice_sql)
+    # End of method extract_stream.
+
+    def _put(self, queue: Queue, item) -> bool:
+        """ Put an item into a slice's queue, unless told to stop.
+
+        Parameters:
+            queue (Queue): the queue.
+            item: the item.
+        Returns:
+            put (bool): False if stopped.
+        """
+        while not self.stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+    # End of method _put.
+
+    def _merge(self, slice_sql: list):
+        """ Generator of the batches of all slices, in slice order.  Starts
+            fetching the slices when first read.
+
+        Parameters:
+            slice_sql (list): (sql, values) of each slice, from _prepare.
+        Returns:
+            rows (list): yields lists of tuples, each tuple is one row.
+        """
+        # One queue per slice, its column names first, then batches of rows,
+        # then None.
+        queues = [Queue(maxsize=MERGE_QUEUE_BATCHES) for _ in slice_sql]
+
+        def consume(number, col_names, batches):
+            queue = queues[number - 1]
+            self._put(queue, col_names)
+            row_count = 0
+            for batch in batches:
+                if not self._put(queue, batch):
+                    break
+                row_count += len(batch)
+            return row_count
+
+        def run_slice(number, sql, values):
+            try:
+                self._run_slice(number, sql, values, consume)
+            except Exception as e:
+                self.slice_stats[number - 1]['error'] = str(e) or repr(e)
+            finally:
+                self._put(queues[number - 1], None)
+
+        executor = ThreadPoolExecutor(max_workers=self.pool.size)
+        try:
+            for number, (sql, values) in enumerate(slice_sql, start=1):
+                executor.submit(run_slice, number, sql, values)
+            for stats, queue in zip(self.slice_stats, queues):
+                item = queue.get()
+                if item is not None:
+                    # Column names of this slice.
+                    item = queue.get()
+                while item is not None:
+                    yield item
+                    item = queue.get()
+                if stats['error'] != '':
+                    raise RuntimeError('Slice {} failed: {}'.format(
+                        stats['number'], stats['error']))
+        finally:
+            self.stop.set()
+            executor.shutdown(wait=True)
+        return
+    # End of method _merge.
+
+    def print_report(self) -> None:
+        """ Print the rows and time of each slice of the last extract.
+
+        Parameters:
+        Returns:
+        """
+        col_names = ['SLICE', 'LOW', 'HIGH', 'ROWS', 'SECS', 'STATUS', 'FILE']
+        rows = [(s['number'], s['low'], s['high'], s['rows'],
+                 '{:.4f}'.format(s['secs']),
+                 'OK' if s['error'] == '' else 'FAILED', s['out_file_name'])
+                for s in self.slice_stats]
+        print('\nSLICES:')
+        if len(rows) == 0:
+            print('No slices extracted.')
+            return
+        writer = OutputWriter(out_file_name='', align_col=True, col_sep='|')
+        writer.write_rows(rows, col_names)
+        print('\nTotal: {} rows.'.format(sum(s['rows']
+                                             for s in self.slice_stats)))
+        return
+    # End of method print_report.
+# End of Class PartitionedExtractor.
@@ -0,0 +1,587 @@
+""" PlanCache.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import json
+import re
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime
+from os import replace
+from os.path import exists
+import MyQueries as mq
+from functions import is_skip_operation, print_stacktrace
+from constants import MYSQL, ORACLE, POSTGRESQL, SQLITE, SQLSERVER
+from constants import FILE_DATABASES
+
+# A full scan is flagged if the table has at least this many rows.
+DEFAULT_LARGE_TABLE_ROWS = 100000
+
+# Captures between writes of the state file, when not specified.
+DEFAULT_SAVE_EVERY = 100
+
+# Statements that can be explained, and those that are queries.
+EXPLAINABLE = {'SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE'}
+QUERIES = {'SELECT', 'WITH'}
+
+# For normalizing SQL: string literals and comments, quoted identifiers,
+# numbers, bind variables (named, pyformat, format and qmark), and runs of
+# whitespace.
+LITERALS_COMMENTS = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.S)
+QUOTED = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/|"
+                    r'"(?:[^"]|"")*"|`[^`]*`', re.S)
+NUMBERS = re.compile(r"(?<![\w.$#])\d+(?:\.\d*)?(?:[eE][-+]?\d+)?")
+BIND_VARS = re.compile(r"(?<!:):[A-Za-z_]\w*|%\([^)]*\)s|%s|\?")
+WHITESPACE = re.compile(r"\s+")
+
+# A table in a FROM, JOIN, UPDATE or INSERT INTO clause, with its alias.
+TABLE_REF = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+([\w$#."\[\]]+)'
+                       r'(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?', re.I)
+NOT_ALIASES = {
+    'where', 'on', 'using', 'join', 'inner', 'left', 'right', 'full', 'outer',
+    'cross', 'natural', 'lateral', 'straight_join', 'set', 'values', 'select',
+    'group', 'order', 'having', 'limit', 'offset', 'fetch', 'for', 'window',
+    'union', 'intersect', 'except', 'minus', 'returning', 'default'}
+
+# Plan operations that read a whole table.
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\S+)(.*)$')
+ORACLE_FULL_SCANS = {'TABLE ACCESS FULL', 'TABLE ACCESS STORAGE FULL'}
+SQLSERVER_SCANS = {'Table Scan', 'Clustered Index Scan'}
+SQLSERVER_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+
+
+def normalize_sql(sql: str) -> str:
+    """ Normalize SQL, so that statements differing only in literal values,
+        bind variables, comments, whitespace or case have the same text.
+        Quoted identifiers are kept as they are.
+
+    Parameters:
+        sql (str): the SQL.
+    Returns:
+        normalized (str): the normalized SQL.
+    """
+    pieces = list()
+    code = list()
+
+    def add_code():
+        text = NUMBERS.sub('?', ''.join(code))
+        text = BIND_VARS.sub('?', text)
+        pieces.append(WHITESPACE.sub(' ', text).lower())
+        del code[:]
+
+    end = 0
+    for match in QUOTED.finditer(sql):
+        code.append(sql[end:match.start()])
+        end = match.end()
+        token = match.group(0)
+        if token.startswith("'"):
+            code.append('?')
+        elif token[0] in '"`':
+            add_code()
+            pieces.append(token)
+        else:
+            code.append(' ')
+    code.append(sql[end:])
+    add_code()
+    return ''.join(pieces).strip().rstrip(';').strip()
+# End of function normalize_sql.
+
+
+def table_aliases(sql: str) -> dict:
+    """ Find the tables named in SQL, and their aliases.
+
+    Parameters:
+        sql (str): the SQL.
+    Returns:
+        aliases (dict): lower case table name or alias -> table name.
+    """
+    aliases = dict()
+    for table, alias in TABLE_REF.findall(LITERALS_COMMENTS.sub(' ', sql)):
+        table = table.replace('"', '').replace('[', '').replace(']', '')
+        aliases[table.lower()] = table
+        aliases[table.split('.')[-1].lower()] = table
+        if alias and alias.lower() not in NOT_ALIASES:
+            aliases[alias.lower()] = table
+    return aliases
+# End of function table_aliases.
+
+
+class PlanCache(object):
+    """ Capture the plan the database uses to run each statement, keyed by
+        its normalized SQL (see normalize_sql), flag full scans of large
+        tables, and detect when the plan of a statement changes between runs.
+        Set it on a DBClient with DBClient.set_plan_cache, to capture the plan
+        of every statement it runs.
+
+        Plans come from EXPLAIN QUERY PLAN in SQLite, EXPLAIN (ANALYZE,
+        BUFFERS, FORMAT JSON) in PostgreSQL (without ANALYZE, which runs the
+        statement, for INSERT, UPDATE and DELETE), EXPLAIN FORMAT=JSON in
+        MySQL, DBMS_XPLAN in Oracle and SHOWPLAN_XML in SQL Server, see
+        MyQueries.explain_sql.  Plans are compared by their operations and
+        the tables and indexes they use, not by their costs or timings.
+
+    Attributes:
+        large_table_rows (int): a full scan is flagged if the table has at
+            least this many rows.
+        state_file (str): JSON file keeping the plans between program runs,
+            '' to keep them in memory only.
+        save_every (int): captures between writes of the state file, which
+            is also written by clean_up.
+        unsaved (int): captures since the state file was written.
+        plans (dict): plan key (see plan_key) -> dict with the normalized SQL,
+            plan, signature (its operations), full scans, runs, plan changes,
+            previous signature, and time captured.
+        table_rows (dict): (database key, lower case table name) -> number
+            of rows, -1 if unknown.
+        changed (list): plan keys of the plans that changed in this run.
+    """
+    def __init__(self, large_table_rows: int = DEFAULT_LARGE_TABLE_ROWS,
+                 state_file: str = '',
+                 save_every: int = DEFAULT_SAVE_EVERY) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            large_table_rows (int): a full scan is flagged if the table has
+                at least this many rows.
+            state_file (str): JSON file keeping the plans between program
+                runs, created if it does not exist.  '' for none.
+            save_every (int): captures between writes of the state file.
+        Returns:
+        """
+        self.large_table_rows: int = large_table_rows
+        self.state_file: str = state_file
+        self.save_every: int = max(1, save_every)
+        self.unsaved: int = 0
+        self.plans: dict = self.load_state()
+        self.table_rows: dict = dict()
+        self.changed: list = list()
+        return
+    # End of method __init__.
+
+    def clean_up(self) -> None:
+        """ Cleans up, in preparation for deletion.  Writes the state file,
+            if any captures are not yet saved.
+
+        Parameters:
+        Returns:
+        """
+        if self.unsaved > 0:
+            self.save_state()
+        return
+    # End of method clean_up.
+
+    def load_state(self) -> dict:
+        """ Read the state file.
+
+        Parameters:
+        Returns:
+            plans (dict): the plans saved, empty if no state file.
+        """
+        if self.state_file == '' or not exists(self.state_file):
+            return dict()
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print_stacktrace()
+            print('Cannot read state file "{}".'.format(self.state_file))
+            exit(1)
+    # End of method load_state.
+
+    def save_state(self) -> None:
+        """ Write the state file, replacing it in one step, so that it is
+            never left half written.
+
+        Parameters:
+        Returns:
+        """
+        if self.state_file == '':
+            return
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.plans, f, indent=2, sort_keys=True, default=str)
+        replace(temp_file, self.state_file)
+        self.unsaved = 0
+        return
+    # End of method save_state.
+
+    @staticmethod
+    def db_key(db_instance) -> str:
+        """ Identify a database: its type, and its file or instance.
+
+        Parameters:
+            db_instance: the DBInstance of the database.
+        Returns:
+            key (str): the key.
+        """
+        if db_instance.get_db_type() in FILE_DATABASES:
+            where = db_instance.db_path
+        else:
+            where = '{}:{}/{}'.format(db_instance.hostname,
+                                      db_instance.port_num,
+                                      db_instance.instance)
+        return '{}|{}'.format(db_instance.get_db_type(), where)
+    # End of method db_key.
+
+    def plan_key(self, db_instance, sql: str) -> str:
+        """ Key of a statement's plan: its database and normalized SQL.
+
+        Parameters:
+            db_instance: the DBInstance the statement runs on.
+            sql (str): the statement.
+        Returns:
+            key (str): the key.
+        """
+        return '{}|{}'.format(self.db_key(db_instance), normalize_sql(sql))
+    # End of method plan_key.
+
+    def get_plan(self, db_instance, sql: str) -> dict:
+        """ Get the plan captured for a statement.
+
+        Parameters:
+            db_instance: the DBInstance the statement runs on.
+            sql (str): the statement.
+        Returns:
+            entry (dict): see attribute plans, None if not captured.
+        """
+        return self.plans.get(self.plan_key(db_instance, sql))
+    # End of method get_plan.
+
+    def explain(self, db_instance, sql: str, bind_vars=None) -> tuple:
+        """ Explain a statement, without saving its plan.
+
+        Parameters:
+            db_instance: the DBInstance to run the statement on.
+            sql (str): the statement.
+            bind_vars: its bind variables, if any.
+        Returns:
+            plan: the plan, as returned by the database (parsed if JSON).
+            signature (list): the plan's operations, with their objects.
+            scans (list): tables read in full.
+            All None if the statement cannot be explained.
+        """
+        words = sql.split()
+        if not words or words[0].upper() not in EXPLAINABLE:
+            return None, None, None
+        db_type = db_instance.get_db_type()
+        plan_type = mq.QUERY_PLAN if words[0].upper() in QUERIES \
+            else mq.DML_PLAN
+        explain = mq.explain_sql[plan_type, db_type]
+        if is_skip_operation(explain):
+            return None, None, None
+        if isinstance(explain, str):
+            explain = [explain]
+        if db_type == ORACLE:
+            # EXPLAIN PLAN does not take values for bind variables.
+            bind_vars = None
+        # Bind variables go with the SQL containing the statement.
+        explain = [(item.replace('{}', sql), bind_vars if '{}' in item else None)
+                   for item in explain]
+
+        rows = self._run(db_instance, explain)
+        if rows is None:
+            return None, None, None
+        aliases = table_aliases(sql)
+        if db_type == SQLITE:
+            return self._parse_sqlite(rows, aliases)
+        elif db_type == POSTGRESQL:
+            return self._parse_postgresql(rows)
+        elif db_type == MYSQL:
+            return self._parse_mysql(rows, aliases)
+        elif db_type == ORACLE:
+            return self._parse_oracle(rows)
+        elif db_type == SQLSERVER:
+            return self._parse_sqlserver(rows)
+        return None, None, None
+    # End of method explain.
+
+    def capture(self, db_instance, sql: str, bind_vars=None) -> dict:
+        """ Explain a statement and save its plan.  Prints a warning if the
+            plan has full scans of large tables, when first captured, and if
+            the plan differs from the one captured before.  The state file is
+            written every save_every captures, and by clean_up.
+
+        Parameters:
+            db_instance: the DBInstance to run the statement on.
+            sql (str): the statement.
+            bind_vars: its bind variables, if any.
+        Returns:
+            entry (dict): see attribute plans, None if the statement cannot
+                be explained.
+        """
+        plan, signature, scans = self.explain(db_instance, sql, bind_vars)
+        if signature is None:
+            return None
+
+        # Full scans of large tables.
+        full_scans = list()
+        for table in dict.fromkeys(scans):
+            row_count = self.get_table_rows(db_instance, table)
+            if row_count >= self.large_table_rows:
+                full_scans.append([table, row_count])
+
+        key = self.plan_key(db_instance, sql)
+        entry = self.plans.get(key)
+        if entry is None:
+            entry = {'sql': normalize_sql(sql), 'runs': 0, 'plan_changes': 0,
+                     'previous_signature': None}
+            self.plans[key] = entry
+            report = True
+        elif entry['signature'] != signature:
+            print('PLAN CHANGED FOR: {}'.format(entry['sql']))
+            print('WAS:\n  {}'.format('\n  '.join(entry['signature'])))
+            print('NOW:\n  {}'.format('\n  '.join(signature)))
+            entry['plan_changes'] += 1
+            entry['previous_signature'] = entry['signature']
+            self.changed.append(key)
+            report = True
+        else:
+            report = False
+        if report:
+            for table, row_count in full_scans:
+                z = 'FULL SCAN OF LARGE TABLE {} ({} ROWS) IN: {}'
+                print(z.format(table, row_count, entry['sql']))
+        entry['plan'] = plan
+        entry['signature'] = signature
+        entry['full_scans'] = full_scans
+        entry['runs'] += 1
+        entry['captured_at'] = datetime.now().isoformat(timespec='seconds')
+        self.unsaved += 1
+        if self.unsaved >= self.save_every:
+            self.save_state()
+        return entry
+    # End of method capture.
+
+    def get_table_rows(self, db_instance, table: str) -> int:
+        """ Find the number of rows in a table, from optimizer statistics, so
+            without scanning it.  Only asks the database once per table.
+
+        Parameters:
+            db_instance: the DBInstance of the database with the table.
+            table (str): the table.
+        Returns:
+            row_count (int): number of rows, -1 if unknown.
+        """
+        key = (self.db_key(db_instance), table.lower())
+        if key not in self.table_rows:
+            sql = mq.data_dict_sql[mq.TABLE_ROWS, db_instance.get_db_type()]
+            row_count = -1
+            if not is_skip_operation(sql):
+                rows = self._run(db_instance,
+                                 [(sql.replace('{}', table), None)],
+                                 quiet=True)
+                if rows and rows[0][0] is not None:
+                    row_count = int(rows[0][0])
+            self.table_rows[key] = row_count
+        return self.table_rows[key]
+    # End of method get_table_rows.
+
+    @staticmethod
+    def _run(db_instance, sql_list: list, quiet: bool = False) -> list:
+        """ Run SQL on a cursor of its own.
+
+        Parameters:
+            db_instance: the DBInstance to run the SQL on.
+            sql_list (list): the SQL to run, in order, as tuples of SQL and
+                its bind variables (None for none).
+            quiet (bool): if True, do not report errors.
+        Returns:
+            rows (list): the result set of the last SQL returning rows, None
+                if the SQL failed.
+        """
+        cursor = db_instance.get_connection().cursor()
+        rows = list()
+        try:
+            for sql, bind_vars in sql_list:
+                if bind_vars:
+                    cursor.execute(sql, bind_vars)
+                else:
+                    cursor.execute(sql)
+                if cursor.description is not None:
+                    rows = cursor.fetchall()
+        except db_instance.db_lib_obj.Error as e:
+            if not quiet:
+                print('CANNOT EXPLAIN: {}'.format(str(e).strip()))
+            if db_instance.get_db_type() == SQLSERVER:
+                cursor.execute('SET SHOWPLAN_XML OFF')
+            elif db_instance.get_db_type() == POSTGRESQL:
+                # The transaction is aborted after any error.
+                db_instance.get_connection().rollback()
+            rows = None
+        finally:
+            cursor.close()
+        return rows
+    # End of method _run.
+
+    @staticmethod
+    def _parse_sqlite(rows: list, aliases: dict) -> (list, list, list):
+        """ Parse the result of EXPLAIN QUERY PLAN.
+
+        Parameters:
+            rows (list): rows of id, parent, notused, detail.
+            aliases (dict): see table_aliases.
+        Returns:
+            plan (list): the steps, indented to show their nesting.
+            signature (list): same as plan.
+            scans (list): tables read in full.
+        """
+        depth = {0: -1}
+        plan = list()
+        scans = list()
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            plan.append('  ' * depth[node_id] + detail)
+            match = SQLITE_SCAN.match(detail)
+            if match and 'INDEX' not in match.group(2) \
+                    and not match.group(1).startswith('(') \
+                    and detail != 'SCAN CONSTANT ROW':
+                scans.append(aliases.get(match.group(1).lower(),
+                                         match.group(1)))
+        return plan, plan, scans
+    # End of method _parse_sqlite.
+
+    @staticmethod
+    def _parse_postgresql(rows: list) -> (list, list, list):
+        """ Parse the result of EXPLAIN (FORMAT JSON).
+
+        Parameters:
+            rows (list): one row, with the plan as JSON.
+        Returns:
+            plan (list): the plan as parsed JSON.
+            signature (list): node types, with their tables and indexes.
+            scans (list): tables read in full.
+        """
+        plan = rows[0][0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        signature = list()
+        scans = list()
+
+        def walk(node, depth):
+            step = [node.get('Node Type', '')]
+            for name in ('Relation Name', 'Index Name'):
+                if name in node:
+                    step.append(node[name])
+            signature.append('  ' * depth + ' '.join(step))
+            if node.get('Node Type') == 'Seq Scan':
+                scans.append(node['Relation Name'])
+            for child in node.get('Plans', list()):
+                walk(child, depth + 1)
+
+        for item in plan:
+            walk(item['Plan'], 0)
+        return plan, signature, scans
+    # End of method _parse_postgresql.
+
+    @staticmethod
+    def _parse_mysql(rows: list, aliases: dict) -> (dict, list, list):
+        """ Parse the result of EXPLAIN FORMAT=JSON.
+
+        Parameters:
+            rows (list): one row, with the plan as JSON.
+            aliases (dict): see table_aliases.
+        Returns:
+            plan (dict): the plan as parsed JSON.
+            signature (list): tables, with their access types and indexes.
+            scans (list): tables read in full.
+        """
+        plan = json.loads(rows[0][0])
+        signature = list()
+        scans = list()
+
+        def walk(node):
+            if isinstance(node, dict):
+                if 'table_name' in node and 'access_type' in node:
+                    table = aliases.get(node['table_name'].lower(),
+                                        node['table_name'])
+                    signature.append('{} {} {}'.format(
+                        node['access_type'], table, node.get('key', '')).strip())
+                    if node['access_type'] == 'ALL':
+                        scans.append(table)
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+
+        walk(plan)
+        return plan, signature, scans
+    # End of method _parse_mysql.
+
+    @staticmethod
+    def _parse_oracle(rows: list) -> (str, list, list):
+        """ Parse the output of DBMS_XPLAN.DISPLAY.
+
+        Parameters:
+            rows (list): one row per line of output.
+        Returns:
+            plan (str): the output.
+            signature (list): operations, with their objects.
+            scans (list): tables read in full.
+        """
+        lines = [row[0] if row[0] is not None else '' for row in rows]
+        signature = list()
+        scans = list()
+        for line in lines:
+            fields = line.split('|')
+            if len(fields) < 4 or \
+                    not fields[1].replace('*', '').strip().isdigit():
+                continue
+            operation = fields[2].rstrip()
+            name = fields[3].strip()
+            signature.append('{} {}'.format(operation, name).rstrip())
+            if operation.strip() in ORACLE_FULL_SCANS:
+                scans.append(name)
+        return '\n'.join(lines), signature, scans
+    # End of method _parse_oracle.
+
+    @staticmethod
+    def _parse_sqlserver(rows: list) -> (str, list, list):
+        """ Parse the output of SHOWPLAN_XML.
+
+        Parameters:
+            rows (list): one row, with the plan as XML.
+        Returns:
+            plan (str): the XML.
+            signature (list): physical operators, with their tables.
+            scans (list): tables read in full.
+        """
+        plan = rows[0][0]
+        signature = list()
+        scans = list()
+        for rel_op in ElementTree.fromstring(plan).iter(SQLSERVER_NS + 'RelOp'):
+            operator = rel_op.get('PhysicalOp', '')
+            table = ''
+            obj = rel_op.find('./*/' + SQLSERVER_NS + 'Object')
+            if obj is not None:
+                table = obj.get('Table', '').strip('[]')
+            signature.append('{} {}'.format(operator, table).strip())
+            if operator in SQLSERVER_SCANS and table != '':
+                scans.append(table)
+        return plan, signature, scans
+    # End of method _parse_sqlserver.
+
+    def print_report(self) -> None:
+        """ Print the statements whose plans were captured, with their full
+            scans of large tables and plan changes.
+
+        Parameters:
+        Returns:
+        """
+        print('\nQUERY PLANS:')
+        for key, entry in self.plans.items():
+            print('\n{} (RUNS: {}, PLAN CHANGES: {}{})'.format(
+                entry['sql'], entry['runs'], entry['plan_changes'],
+                ', CHANGED IN THIS RUN' if key in self.changed else ''))
+            print('  ' + '\n  '.join(entry['signature']))
+            for table, row_count in entry['full_scans']:
+                print('  FULL SCAN OF LARGE TABLE {} ({} ROWS).'.format(
+                    table, row_count))
+        return
+    # End of method print_report.
+# End of Class PlanCache.
@@ -0,0 +1,196 @@
+""" Row.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+from constants import ORACLEDB, SQLITE3
+
+
+def column_index(col_names: list) -> dict:
+    """ Create map from column name to item #, so items accessible by column
+        name instead of by item #.  Build once per result set, and share it
+        among all the rows in that result set.
+
+    Parameters:
+        col_names (list): list of column names.
+    Returns:
+        index (dict): lower case column name -> item #.
+    """
+    return {name.lower(): item_num for item_num, name in enumerate(col_names)}
+# End of function column_index.
+
+
+class Row(object):
+    """ One row of a result set, accessible by item #, by column name, or as
+        an attribute.  Wraps the tuple fetched by the database library, and
+        shares one column index with all other rows in the result set, so no
+        dict is allocated per row.
+
+    Attributes:
+        _values (tuple): the values in this row, as fetched.
+        _index (dict): lower case column name -> item #, from column_index.
+    """
+    __slots__ = ('_values', '_index')
+
+    def __init__(self, values, index: dict) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            values: the values in this row, as fetched.
+            index (dict): lower case column name -> item #, from column_index.
+        Returns:
+        """
+        self._values = values
+        self._index = index
+        return
+    # End of method __init__.
+
+    def __getitem__(self, key):
+        """ Get a value by item # (or slice), or by column name.
+
+        Parameters:
+            key: item #, slice, or column name (any case).
+        Returns:
+            the value(s).
+        """
+        if isinstance(key, str):
+            try:
+                return self._values[self._index[key]]
+            except KeyError:
+                try:
+                    return self._values[self._index[key.lower()]]
+                except KeyError:
+                    raise KeyError(key) from None
+        return self._values[key]
+    # End of method __getitem__.
+
+    def __getattr__(self, name: str):
+        """ Get a value by column name, as an attribute.
+            Only called when normal attribute lookup fails.  Names starting
+            with "_" are not looked up, so copy and pickle, which look for
+            special methods, and a Row with no slots set yet, do not recurse.
+            Get columns with such names by item instead.
+
+        Parameters:
+            name (str): column name (any case).
+        Returns:
+            the value.
+        """
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+    # End of method __getattr__.
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Row):
+            other = other._values
+        try:
+            return tuple(self._values) == tuple(other)
+        except TypeError:
+            # Not iterable.
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self._values))
+
+    def __add__(self, other) -> tuple:
+        return tuple(self._values) + tuple(other)
+
+    def __repr__(self) -> str:
+        return 'Row({!r})'.format(tuple(self._values))
+
+    def __reduce__(self):
+        return Row, (tuple(self._values), self._index)
+
+    def get(self, key, default=None):
+        """ Get a value by column name, or default if no such column.
+
+        Parameters:
+            key (str): column name (any case).
+            default: value to return if there is no such column.
+        Returns:
+            the value, or default.
+        """
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+    # End of method get.
+
+    def as_dict(self) -> dict:
+        """ Copy this row into a dict, keyed by lower case column name.
+
+        Parameters:
+        Returns:
+            row (dict): lower case column name -> value.
+        """
+        return {name: self._values[item_num]
+                for name, item_num in self._index.items()}
+    # End of method as_dict.
+# End of Class Row.
+
+
+def set_row_factory(cursor, db_lib_name: str, index: dict) -> bool:
+    """ Make the database library itself create Row objects while fetching,
+        for libraries that support a row factory.
+
+    Parameters:
+        cursor: cursor that has just executed a SELECT.
+        db_lib_name (str): name of the database library of the cursor.
+        index (dict): column index for the result set, from column_index.
+    Returns:
+        is_set (bool): False if the library has no row factory, so fetched
+            rows have to be wrapped with wrap_rows.
+    """
+    if db_lib_name == SQLITE3:
+        cursor.row_factory = lambda cur, values: Row(values, index)
+    elif db_lib_name == ORACLEDB:
+        cursor.rowfactory = lambda *values: Row(values, index)
+    else:
+        return False
+    return True
+# End of function set_row_factory.
+
+
+def clear_row_factory(cursor, db_lib_name: str) -> None:
+    """ Undo set_row_factory, so the cursor fetches plain tuples again.
+
+    Parameters:
+        cursor: cursor passed to set_row_factory.
+        db_lib_name (str): name of the database library of the cursor.
+    Returns:
+    """
+    if db_lib_name == SQLITE3:
+        cursor.row_factory = None
+    elif db_lib_name == ORACLEDB:
+        cursor.rowfactory = None
+    return
+# End of function clear_row_factory.
+
+
+def wrap_rows(rows: list, index: dict) -> list:
+    """ Wrap fetched rows in Row objects, for database libraries without a
+        row factory.
+
+    Parameters:
+        rows (list): list of tuples, each tuple a row.
+        index (dict): column index for the result set, from column_index.
+    Returns:
+        rows (list): list of Row objects.
+    """
+    return [Row(values, index) for values in rows]
+# End of function wrap_rows.
@@ -0,0 +1,492 @@
+""" SQLScriptSplitter.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import re
+from constants import ACCESS, MYSQL, ORACLE, POSTGRESQL, SQLITE, SQLSERVER
+
+# Characters read from a script file at a time.
+CHUNK_SIZE = 65536
+
+# Longer lines are never command line client commands, so need not be read
+# to their end to decide.
+MAX_COMMAND_LINE = 1000
+
+# Oracle statements that are PL/SQL blocks, ended by "/" on a line by itself,
+# not by ";".
+PLSQL_BLOCK = re.compile(
+    r'(DECLARE|BEGIN|CREATE\s+(OR\s+REPLACE\s+)?'
+    r'((NON)?EDITIONABLE\s+)?(PROCEDURE|FUNCTION|PACKAGE|TRIGGER|TYPE|'
+    r'LIBRARY|JAVA))\b', re.IGNORECASE)
+# SQLite and MySQL triggers, with ";" inside BEGIN ... END.
+TRIGGER = re.compile(r'CREATE\s+((TEMP|TEMPORARY)\s+)?TRIGGER\b',
+                     re.IGNORECASE)
+# Counting BEGIN/CASE against END in the body of a trigger.  END IF, END LOOP,
+# END WHILE and END REPEAT close blocks not counted, so are matched first.
+BLOCK_WORD = re.compile(
+    r'\b(END\s+(IF|CASE|LOOP|WHILE|REPEAT)|BEGIN|CASE|END)\b', re.IGNORECASE)
+# Leading whitespace and comments of a statement.
+LEADING_COMMENTS = re.compile(r'(\s+|--[^\n]*(\n|$)|/\*.*?\*/)*', re.DOTALL)
+# Quoted strings and comments, removed before counting BLOCK_WORDs.
+STRINGS_COMMENTS = re.compile(r"'[^']*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/",
+                              re.DOTALL)
+# PostgreSQL dollar quote, $$ or $tag$.
+DOLLAR_QUOTE = re.compile(r'\$([A-Za-z_][A-Za-z0-9_]*)?\$')
+# SQL Server batch separator, with optional count of times to run the batch.
+GO_LINE = re.compile(r'\s*go(\s+\d+)?\s*(--.*)?$', re.IGNORECASE)
+# MySQL client command changing the statement delimiter.
+DELIMITER_LINE = re.compile(r'\s*delimiter\s+(\S+)\s*$', re.IGNORECASE)
+# SQL*Plus commands, not sent to the database.  SET is SQL*Plus unless
+# followed by one of SQL_SET.
+SQLPLUS_COMMANDS = {
+    '@', '@@', 'ACCEPT', 'BREAK', 'BTITLE', 'CLEAR', 'COL', 'COLUMN',
+    'COMPUTE', 'CONNECT', 'DEFINE', 'DISCONNECT', 'EXIT', 'HOST', 'PAUSE',
+    'PRINT', 'PROMPT', 'QUIT', 'REM', 'REMARK', 'SET', 'SHOW', 'SPOOL',
+    'START', 'TIMING', 'TTITLE', 'UNDEFINE', 'VAR', 'VARIABLE', 'WHENEVER'}
+SQL_SET = {'TRANSACTION', 'ROLE', 'CONSTRAINT', 'CONSTRAINTS'}
+
+
+class SQLScriptSplitter(object):
+    """ Split SQL scripts into statements, following the rules of each
+        database type's command line client.  Text is fed in chunks, and each
+        statement is returned as soon as its end is read, so a script of any
+        size is read once, and never all held in memory.
+
+        Respected everywhere: quoted strings, quoted identifiers, -- and /* */
+        comments.  Per database type:
+        - Oracle: PL/SQL blocks end with "/" on a line by itself, and SQL*Plus
+          commands (SET, PROMPT, etc) are dropped.
+        - SQL Server: statements are the batches between "GO" lines.  A batch
+          ended by "GO n" is returned n times, as sqlcmd runs it n times.
+        - PostgreSQL: dollar quoting ($$ or $tag$), backslash escapes in E''
+          strings, psql "\\" commands dropped.
+        - MySQL: DELIMITER commands, backtick identifiers, # comments.
+        - SQLite: dot-commands dropped.
+        - SQLite and MySQL: ";" inside BEGIN ... END of triggers.
+        Statements are returned without their terminator, except that PL/SQL
+        blocks keep their final "END;".
+
+    Attributes:
+        db_type (str): the type of database (Oracle, SQL Server, etc).
+        buf (str): text fed but not yet returned as part of a statement.
+        pos (int): position in buf up to which it has been scanned.
+        line_start (bool): whether buf starts at the start of a line.
+        has_code (bool): whether the statement in buf has anything but
+            whitespace and comments.
+        delimiter (str): the statement terminator, normally ";".
+        mode (str): '' for ordinary SQL, 'plsql' for an Oracle PL/SQL block,
+            'trigger' for a SQLite or MySQL trigger.
+        repeat (int): times to return the statement just ended, from
+            "GO n".
+    """
+    def __init__(self, db_type: str) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_type (str): the type of database (Oracle, SQL Server, etc).
+        Returns:
+        """
+        self.db_type: str = db_type
+        self.buf: str = ''
+        self.pos: int = 0
+        self.line_start: bool = True
+        self.has_code: bool = False
+        self.mode: str = ''
+        self.delimiter: str = ';'
+        self.repeat: int = 1
+        self.special = None
+        self._set_special()
+        return
+    # End of method __init__.
+
+    def _set_special(self) -> None:
+        """ Compile the regular expression finding the next character that
+            might start or end something.
+
+        Parameters:
+        Returns:
+        """
+        chars = '\'"\n-/'
+        if self.db_type != SQLSERVER:
+            chars += self.delimiter[0]
+        if self.db_type == MYSQL:
+            chars += '`#'
+        elif self.db_type in {SQLSERVER, ACCESS}:
+            chars += '['
+        elif self.db_type == POSTGRESQL:
+            chars += '$'
+        self.special = re.compile('[' + re.escape(chars) + ']')
+        return
+    # End of method _set_special.
+
+    def split_file(self, script):
+        """ Generator of the statements in a script file.
+
+        Parameters:
+            script: file object opened in text mode, or path of the file.
+        Returns:
+            statement (str): yields each statement.
+        """
+        if isinstance(script, str):
+            with open(script, 'r', encoding='utf-8') as f:
+                yield from self.split_file(f)
+            return
+        while True:
+            chunk = script.read(CHUNK_SIZE)
+            if chunk == '':
+                break
+            yield from self.feed(chunk)
+        yield from self.close()
+        return
+    # End of method split_file.
+
+    def split(self, text: str) -> list:
+        """ Split all of a script held in a string.
+
+        Parameters:
+            text (str): the script.
+        Returns:
+            statements (list): the statements.
+        """
+        statements = list(self.feed(text))
+        statements.extend(self.close())
+        return statements
+    # End of method split.
+
+    def feed(self, text: str):
+        """ Generator of the statements completed by more text of a script.
+
+        Parameters:
+            text (str): the next part of the script.
+        Returns:
+            statement (str): yields each completed statement.
+        """
+        self.buf += text
+        yield from self._scan(final=False)
+        return
+    # End of method feed.
+
+    def close(self):
+        """ Generator of the statement at the end of a script, which may have
+            no terminator.  Resets the splitter for another script.
+
+        Parameters:
+        Returns:
+            statement (str): yields the last statement, if any.
+        """
+        yield from self._scan(final=True)
+        if self.has_code:
+            statement = self.buf.strip()
+            if self.db_type == ORACLE and self.mode == '':
+                statement = statement.rstrip(';').rstrip()
+            yield statement
+        self.buf = ''
+        self.pos = 0
+        self.line_start = True
+        self.has_code = False
+        self.mode = ''
+        return
+    # End of method close.
+
+    def _emit(self, end: int, resume: int):
+        """ Return the statement ending at buf[end], and drop it from buf.
+
+        Parameters:
+            end (int): position in buf just past the end of the statement,
+                not counting its terminator.
+            resume (int): position in buf to continue scanning from.
+        Returns:
+            statement (str): the statement, or '' if it has no code.
+        """
+        statement = self.buf[:end].strip() if self.has_code else ''
+        self.line_start = resume > 0 and self.buf[resume - 1] == '\n'
+        self.buf = self.buf[resume:]
+        self.pos = 0
+        self.has_code = False
+        self.mode = ''
+        return statement
+    # End of method _emit.
+
+    def _scan(self, final: bool):
+        """ Scan buf from pos, yielding each statement whose end is found.
+
+        Parameters:
+            final (bool): True if no more text will be fed.
+        Returns:
+            statement (str): yields each statement found.
+        """
+        while True:
+            buf = self.buf
+            i = self.pos
+            # Line commands, only at the start of a line.
+            if i == 0 and self.line_start or i > 0 and buf[i - 1] == '\n':
+                line_end = buf.find('\n', i)
+                if line_end == -1:
+                    if not final and len(buf) - i < MAX_COMMAND_LINE:
+                        return
+                    line_end = len(buf)
+                result = self._line_command(buf[i:line_end], i, line_end)
+                if result is not None:
+                    if result != '':
+                        for _ in range(self.repeat):
+                            yield result
+                    self.repeat = 1
+                    continue
+
+            m = self.special.search(buf, i)
+            if m is None:
+                if buf[i:].strip() != '':
+                    self.has_code = True
+                self.pos = len(buf)
+                return
+            j = m.start()
+            if not self.has_code and buf[i:j].strip() != '':
+                self.has_code = True
+            ch = buf[j]
+
+            if ch == '\n':
+                self.pos = j + 1
+                continue
+            elif ch == '-' or ch == '#':
+                if ch == '-' and not buf.startswith('--', j):
+                    if j + 1 == len(buf) and not final:
+                        self.pos = j
+                        return
+                    self._code(j + 1)
+                    continue
+                # Comment to the end of the line.
+                k = buf.find('\n', j)
+                if k == -1:
+                    if not final:
+                        self.pos = j
+                        return
+                    k = len(buf)
+                self.pos = k
+                continue
+            elif ch == '/' and j + 1 == len(buf) and not final:
+                # Maybe the start of a comment cut off by the chunk.
+                self.pos = j
+                return
+            elif ch == '/' and buf.startswith('/*', j):
+                k = buf.find('*/', j + 2)
+                if k == -1:
+                    if not final:
+                        self.pos = j
+                        return
+                    k = len(buf) - 2
+                self.pos = k + 2
+                continue
+            elif ch in '\'"`[':
+                k = self._end_quote(buf, j, ch)
+                if k == -1:
+                    if not final:
+                        self.pos = j
+                        return
+                    k = len(buf)
+                self.has_code = True
+                self.pos = k
+                continue
+            elif ch == '$':
+                # Dollar quote, unless part of an identifier like a$b.
+                dq = DOLLAR_QUOTE.match(buf, j)
+                if dq is None or (j > 0 and (buf[j - 1].isalnum() or
+                                             buf[j - 1] == '_')):
+                    if dq is None and j + 1 == len(buf) and not final:
+                        self.pos = j
+                        return
+                    self._code(j + 1)
+                    continue
+                k = buf.find(dq.group(0), dq.end())
+                if k == -1:
+                    if not final:
+                        self.pos = j
+                        return
+                    k = len(buf) - len(dq.group(0))
+                self.has_code = True
+                self.pos = k + len(dq.group(0))
+                continue
+            elif buf.startswith(self.delimiter, j):
+                if self.mode == '' and self.has_code:
+                    self._set_mode(buf[:j])
+                if self.mode == 'plsql':
+                    self._code(j + len(self.delimiter))
+                    continue
+                if self.mode == 'trigger' and self._block_depth(buf[:j]) > 0:
+                    self._code(j + len(self.delimiter))
+                    continue
+                statement = self._emit(j, j + len(self.delimiter))
+                if statement != '':
+                    yield statement
+                continue
+            elif len(buf) - j < len(self.delimiter) and not final and \
+                    self.delimiter.startswith(buf[j:]):
+                # Maybe the start of a delimiter cut off by the chunk.
+                self.pos = j
+                return
+            else:
+                self._code(j + 1)
+                continue
+    # End of method _scan.
+
+    def _code(self, pos: int) -> None:
+        """ Move past a character of code.
+
+        Parameters:
+            pos (int): position in buf to continue scanning from.
+        Returns:
+        """
+        self.has_code = True
+        self.pos = pos
+        return
+    # End of method _code.
+
+    def _end_quote(self, buf: str, start: int, quote: str) -> int:
+        """ Find the end of a quoted string or identifier.
+
+        Parameters:
+            buf (str): the text.
+            start (int): position of the opening quote.
+            quote (str): the opening quote.
+        Returns:
+            end (int): position just past the closing quote, or -1 if not in
+                buf.
+        """
+        close = ']' if quote == '[' else quote
+        backslash = self.db_type == MYSQL and quote in '\'"'
+        if self.db_type == POSTGRESQL and quote == "'" and start > 0 and \
+                buf[start - 1] in 'Ee' and (start == 1 or not (
+                    buf[start - 2].isalnum() or buf[start - 2] == '_')):
+            # Escape string, E'...', with backslash escapes.
+            backslash = True
+        k = start + 1
+        while True:
+            k = buf.find(close, k)
+            if k == -1:
+                return -1
+            if backslash:
+                # Count backslashes before the quote.
+                n = 0
+                while buf[k - 1 - n] == '\\':
+                    n += 1
+                if n % 2 == 1:
+                    k += 1
+                    continue
+            if k + 1 < len(buf) and buf[k + 1] == close:
+                # Doubled quote, part of the string.
+                k += 2
+                continue
+            if k + 1 == len(buf):
+                # Cannot tell a doubled quote yet.
+                return -1
+            return k + 1
+    # End of method _end_quote.
+
+    def _set_mode(self, statement: str) -> None:
+        """ Find from its first words whether a statement is an Oracle PL/SQL
+            block or a SQLite/MySQL trigger.
+
+        Parameters:
+            statement (str): the text of the statement so far.
+        Returns:
+            is_plsql (bool): True if an Oracle PL/SQL block.
+        """
+        head = statement[LEADING_COMMENTS.match(statement).end():]
+        if self.db_type == ORACLE and PLSQL_BLOCK.match(head):
+            self.mode = 'plsql'
+        elif (self.db_type in {SQLITE, MYSQL} and self.delimiter == ';' and
+              TRIGGER.match(head)):
+            self.mode = 'trigger'
+        return self.mode == 'plsql'
+    # End of method _set_mode.
+
+    def _block_depth(self, statement: str) -> int:
+        """ Count how many BEGIN and CASE blocks are open in a statement.
+
+        Parameters:
+            statement (str): the text of the statement so far.
+        Returns:
+            depth (int): number of BEGIN/CASE without a matching END.
+        """
+        depth = 0
+        for m in BLOCK_WORD.finditer(STRINGS_COMMENTS.sub(' ', statement)):
+            word = ' '.join(m.group(1).upper().split())
+            if word in {'BEGIN', 'CASE'}:
+                depth += 1
+            elif word in {'END', 'END CASE'}:
+                depth -= 1
+        return depth
+    # End of method _block_depth.
+
+    def _line_command(self, line: str, start: int, end: int):
+        """ Handle a line that is a command to the command line client.
+
+        Parameters:
+            line (str): the line, without its line ending.
+            start (int): position of the line in buf.
+            end (int): position of the end of the line in buf.
+        Returns:
+            None if the line is not a command.  Otherwise, the statement the
+            line ends, or '' if none.
+        """
+        stripped = line.strip()
+        if stripped == '':
+            return None
+        resume = min(end + 1, len(self.buf))
+
+        # Lines ending statements.
+        if self.db_type == SQLSERVER:
+            m = GO_LINE.match(line)
+            if m is not None:
+                if m.group(1) is not None:
+                    self.repeat = int(m.group(1))
+                    if self.repeat < 1:
+                        print('Count in "{}" is not positive, running the '
+                              'batch once.'.format(stripped))
+                        self.repeat = 1
+                return self._emit(start, resume)
+        if self.db_type == ORACLE and stripped == '/':
+            plsql = self.mode == 'plsql' or (
+                self.has_code and self._set_mode(self.buf[:start]))
+            statement = self._emit(start, resume)
+            if not plsql and statement.endswith(';'):
+                statement = statement[:-1].rstrip()
+            return statement
+        if self.db_type == MYSQL:
+            m = DELIMITER_LINE.match(line)
+            if m is not None:
+                statement = self._emit(start, resume)
+                self.delimiter = m.group(1)
+                self._set_special()
+                return statement
+
+        # Lines dropped, only where a statement starts.
+        if self.has_code:
+            return None
+        drop = False
+        if self.db_type == SQLITE:
+            drop = stripped.startswith('.')
+        elif self.db_type == POSTGRESQL:
+            drop = stripped.startswith('\\')
+        elif self.db_type == SQLSERVER:
+            drop = stripped.startswith(':')
+        elif self.db_type == ORACLE:
+            words = stripped.upper().split()
+            first = words[0]
+            if first.startswith('@'):
+                first = '@@' if first.startswith('@@') else '@'
+            drop = first in SQLPLUS_COMMANDS
+            if first == 'SET' and len(words) > 1 and words[1] in SQL_SET:
+                drop = False
+        if not drop:
+            return None
+        self.buf = self.buf[:start] + self.buf[resume:]
+        self.pos = start
+        return ''
+    # End of method _line_command.
+# End of Class SQLScriptSplitter.
@@ -0,0 +1,137 @@
+""" SQLitePool.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+from contextlib import contextmanager
+from threading import Lock
+from ConnectionPool import ConnectionPool, DEFAULT_POOL_SIZE
+from constants import SQLITE
+
+# Bytes of the database file each connection memory-maps, read without
+# copying into the page cache.
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+# KiB of page cache per connection.
+DEFAULT_CACHE_KIB = 64 * 1024
+
+
+class SQLitePool(ConnectionPool):
+    """ A ConnectionPool for a SQLite database file: read-only connections,
+        lent to one thread at a time by borrow, plus one writer connection
+        for INSERT, UPDATE, DELETE and DDL, lent by write.  The file is
+        switched to WAL journaling, so readers do not block the writer or
+        each other.  sqlite3 releases the GIL while SQLite runs a statement,
+        so reads on several connections use several cores.
+        With immutable=True, for a snapshot file that nothing changes, the
+        readers skip locking entirely, and there is no writer.
+
+    Attributes:
+        (those of ConnectionPool, whose members are the readers.)
+        immutable (bool): True if the file is a frozen snapshot.
+        writer: the DBInstance that writes, None if immutable.
+        write_lock (Lock): held by the thread using the writer.
+        journal_mode (str): the journal mode of the file, 'wal' if switched.
+    """
+    def __init__(self, db_instance, size: int = DEFAULT_POOL_SIZE,
+                 immutable: bool = False,
+                 mmap_size: int = DEFAULT_MMAP_SIZE,
+                 cache_kib: int = DEFAULT_CACHE_KIB) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance of the SQLite database file.
+            size (int): number of read-only connections.
+            immutable (bool): if True, the file is a snapshot that no process
+                changes: read it without locking, and do not write it.
+            mmap_size (int): bytes of the file each connection memory-maps,
+                0 for none.
+            cache_kib (int): KiB of page cache per connection.
+        Returns:
+        """
+        if db_instance.get_db_type() != SQLITE or db_instance.is_in_memory():
+            print('SQLitePool is only for SQLite database files.')
+            exit(1)
+        pragmas = ['PRAGMA mmap_size = {}'.format(int(mmap_size)),
+                   'PRAGMA cache_size = -{}'.format(int(cache_kib))]
+        self.immutable: bool = immutable
+        self.write_lock = Lock()
+        self.journal_mode: str = ''
+
+        # The writer switches the file to WAL, before any reader opens it.
+        self.writer = None
+        if not immutable:
+            self.writer = db_instance.clone()
+            self.writer.set_thread_local(False)
+            self.writer.set_sqlite_options(pragmas=pragmas + [
+                'PRAGMA journal_mode = WAL',
+                # Safe in WAL mode, and no fsync per commit.
+                'PRAGMA synchronous = NORMAL'])
+            cursor = self.writer.get_connection().cursor()
+            cursor.execute('PRAGMA journal_mode')
+            self.journal_mode = str(cursor.fetchone()[0]).lower()
+            cursor.close()
+            if self.journal_mode != 'wal':
+                print('Could not switch to WAL, journal mode is "{}".'
+                      .format(self.journal_mode))
+
+        # The readers.
+        super().__init__(db_instance, size)
+        for member in self.members:
+            member.set_sqlite_options(read_only=True, immutable=immutable,
+                                      pragmas=pragmas)
+        return
+    # End of method __init__.
+
+    @contextmanager
+    def write(self, timeout: float = None):
+        """ Context manager: the writer DBInstance for the "with" block, for
+            one thread at a time.  Any transaction left open is rolled back.
+
+        Parameters:
+            timeout (float): seconds to wait for the writer, None for no
+                limit.
+        Returns:
+            db_instance: yields the writer, None if timed out, immutable, or
+                pool closed.
+        """
+        if self.writer is None or self.closed:
+            print('The SQLite pool has no writer.')
+            yield None
+            return
+        if not self.write_lock.acquire(timeout=-1 if timeout is None
+                                       else timeout):
+            print('Writer not free after {} seconds.'.format(timeout))
+            yield None
+            return
+        try:
+            yield self.writer
+        finally:
+            connection = self.writer.connection
+            if connection is not None:
+                try:
+                    connection.rollback()
+                except self.writer.db_lib_obj.Error:
+                    # Broken connection, reconnect when next used.
+                    self.writer.connection = None
+            self.write_lock.release()
+    # End of method write.
+
+    def close(self) -> None:
+        """ Close the readers and the writer.  Call this when all threads
+            using the pool are done.
+
+        Parameters:
+        Returns:
+        """
+        super().close()
+        if self.writer is not None and self.writer.connection is not None:
+            self.writer.close_connection(del_cursors=True)
+        return
+    # End of method close.
+# End of Class SQLitePool.
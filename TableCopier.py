@@ -0,0 +1,311 @@
+""" TableCopier.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+from queue import Queue
+from threading import Thread, Lock
+from time import perf_counter
+from DBClient import DBClient
+from TypeMapper import TypeMapper
+from functions import print_stacktrace
+from constants import ACCESS, SQLITE, SQLSERVER
+import constants as c
+
+# Rows per INSERT batch.
+DEFAULT_BATCH_SIZE = 5000
+# Writer threads, each with its own connection to the target.
+DEFAULT_WRITERS = 2
+# Batches waiting for a writer, per writer.  Bounds memory use, and makes the
+# reader wait when the writers fall behind.
+QUEUE_BATCHES_PER_WRITER = 2
+
+# Positional placeholder for the n-th value in an INSERT, per db library.
+PLACEHOLDER_FOR_LIB = {
+    c.ORACLEDB: ':{}',
+    c.PSYCOPG2: '%s',
+    c.PYMYSQL: '%s',
+    c.PYODBC: '?',
+    c.SQLITE3: '?'}
+
+
+class TableCopier(object):
+    """ Copy a table from one database into another, of any supported type,
+        without going through text files.  One reader streams rows from the
+        source through a server-side cursor (DBClient.run_sql_stream) into a
+        bounded queue, and several writer threads, each with its own
+        connection to the target, take batches of rows from the queue and
+        insert them with executemany, or the library's faster bulk insert.
+        The target table can be created from the source table's columns.
+
+    Attributes:
+        source: the DBInstance to copy from.
+        target: the DBInstance to copy to.
+        writers (int): number of writer threads.
+        batch_size (int): rows per INSERT batch, each committed separately.
+        rows_read (int): rows read from the source by the last copy.
+        rows_written (int): rows inserted into the target by the last copy.
+        elapsed (float): seconds taken by the last copy.
+        errors (list): exceptions raised by writers in the last copy.
+        lock (Lock): protects rows_written and errors.
+    """
+    def __init__(self,
+                 source,
+                 target,
+                 writers: int = DEFAULT_WRITERS,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            source: the DBInstance to copy from.
+            target: the DBInstance to copy to.
+            writers (int): number of writer threads.  SQLite allows only one
+                writer at a time, so always 1 for a SQLite target.
+            batch_size (int): rows per INSERT batch.
+        Returns:
+        """
+        if target.get_db_type() == ACCESS:
+            print('NO BIND VARIABLES ALLOWED IN MICROSOFT ACCESS.')
+            print('Cannot copy into a Microsoft Access database.')
+            exit(1)
+        self.source = source
+        self.target = target
+        if target.get_db_type() == SQLITE:
+            writers = 1
+        self.writers: int = max(1, writers)
+        self.batch_size: int = max(1, batch_size)
+        self.rows_read: int = 0
+        self.rows_written: int = 0
+        self.elapsed: float = 0.0
+        self.errors: list = list()
+        self.lock = Lock()
+        return
+    # End of method __init__.
+
+    def create_table_sql(self, columns: list, table: str) -> str:
+        """ Write the CREATE TABLE statement for the target table.
+
+        Parameters:
+            columns (list): the source table's columns, from
+                DBClient.get_table_columns.
+            table (str): name of the table to create in the target.
+        Returns:
+            sql (str): the CREATE TABLE statement.
+        """
+        source_db_type = self.source.get_db_type()
+        mapper = TypeMapper(self.target.get_db_type())
+        col_specs = list()
+        for column_name, data_type, group, nullable in columns:
+            spec = '{} {}'.format(column_name, mapper.source_type(
+                data_type, group, source_db_type))
+            if not nullable:
+                spec += ' NOT NULL'
+            col_specs.append(spec)
+        return 'CREATE TABLE {} (\n  {})'.format(table,
+                                                 ',\n  '.join(col_specs))
+    # End of method create_table_sql.
+
+    def insert_sql(self, col_names: list, table: str) -> str:
+        """ Write the INSERT statement for the target table.
+
+        Parameters:
+            col_names (list): names of the columns to insert.
+            table (str): name of the target table.
+        Returns:
+            sql (str): the INSERT statement, with positional placeholders.
+        """
+        placeholder = PLACEHOLDER_FOR_LIB[self.target.get_db_lib_name()]
+        values = ', '.join(placeholder.format(n)
+                           for n in range(1, len(col_names) + 1))
+        return 'INSERT INTO {} ({}) VALUES ({})'.format(
+            table, ', '.join(col_names), values)
+    # End of method insert_sql.
+
+    def copy_table(self,
+                   source_table: str,
+                   target_table: str = '',
+                   create_table: bool = True,
+                   where: str = '') -> bool:
+        """ Copy rows of a table in the source into a table in the target.
+
+        Parameters:
+            source_table (str): the table to copy.
+            target_table (str): the table to copy into, '' for the same name.
+            create_table (bool): if True, create the target table, with
+                columns like those of the source table.  If False, the target
+                table must exist, with the same column names.
+            where (str): condition on the rows to copy, '' for all.
+        Returns:
+            success (bool): False if anything failed.
+        """
+        if target_table == '':
+            target_table = source_table
+
+        # Find the columns of the source table.
+        reader = DBClient(self.source)
+        columns = reader.get_table_columns(source_table)
+        if len(columns) == 0:
+            print('Found no columns for table "{}".'.format(source_table))
+            reader.clean_up()
+            return False
+        col_names = [column[0] for column in columns]
+
+        if create_table:
+            create_sql = self.create_table_sql(columns, target_table)
+            print(create_sql)
+            cursor = self.target.create_cursor(self)
+            try:
+                cursor.execute(create_sql)
+                cursor.connection.commit()
+            except self.target.db_lib_obj.Error:
+                print_stacktrace()
+                print('Failed to create table "{}".'.format(target_table))
+                reader.clean_up()
+                return False
+            finally:
+                self.target.delete_cursor(self)
+
+        sql = 'SELECT {} FROM {}'.format(', '.join(col_names), source_table)
+        if where != '':
+            sql += ' WHERE ' + where
+        reader.set_sql(sql)
+        insert_sql = self.insert_sql(col_names, target_table)
+        success = self.copy_rows(reader, insert_sql)
+        reader.clean_up()
+        return success
+    # End of method copy_table.
+
+    def copy_rows(self, reader, insert_sql: str) -> bool:
+        """ Run the reader's SELECT on the source, and insert its rows into
+            the target with insert_sql, through the writer threads.
+
+        Parameters:
+            reader (DBClient): DBClient on the source, its SQL already set.
+            insert_sql (str): INSERT statement for the target, from
+                insert_sql, with one placeholder per column selected.
+        Returns:
+            success (bool): False if anything failed.
+        """
+        self.rows_read = 0
+        self.rows_written = 0
+        self.errors = list()
+        start = perf_counter()
+
+        queue = Queue(maxsize=self.writers * QUEUE_BATCHES_PER_WRITER)
+        threads = list()
+        for _ in range(self.writers):
+            thread = Thread(target=self._write_batches,
+                            args=(queue, insert_sql))
+            thread.start()
+            threads.append(thread)
+
+        try:
+            col_names, batches = reader.run_sql_stream()
+            batch = list()
+            for rows in batches:
+                if self.errors:
+                    # A writer failed, stop reading.
+                    batches.close()
+                    break
+                self.rows_read += len(rows)
+                batch.extend(rows)
+                while len(batch) >= self.batch_size:
+                    queue.put(batch[:self.batch_size])
+                    batch = batch[self.batch_size:]
+            if batch and not self.errors:
+                queue.put(batch)
+        finally:
+            for _ in threads:
+                queue.put(None)
+            for thread in threads:
+                thread.join()
+
+        self.elapsed = perf_counter() - start
+        return reader.last_error is None and not self.errors
+    # End of method copy_rows.
+
+    def _write_batches(self, queue: Queue, insert_sql: str) -> None:
+        """ Writer thread: insert batches of rows from the queue into the
+            target, over its own connection, committing after each batch.
+            After a failure, keeps taking batches off the queue, so the
+            reader is never blocked, but inserts no more.
+
+        Parameters:
+            queue (Queue): lists of rows, None at the end.
+            insert_sql (str): the INSERT statement.
+        Returns:
+        """
+        target = self.target.clone()
+        cursor = None
+        failed = False
+        while True:
+            batch = queue.get()
+            if batch is None:
+                break
+            if failed:
+                continue
+            try:
+                if cursor is None:
+                    cursor = target.create_cursor(self)
+                    if target.get_db_type() == SQLSERVER:
+                        # Send all rows of a batch in one round trip.
+                        cursor.fast_executemany = True
+                self._insert(cursor, insert_sql, batch)
+                cursor.connection.commit()
+                with self.lock:
+                    self.rows_written += len(batch)
+            except Exception as e:
+                print_stacktrace()
+                failed = True
+                with self.lock:
+                    self.errors.append(e)
+        if cursor is not None:
+            target.delete_cursor(self)
+            target.close_connection(del_cursors=True)
+        return
+    # End of method _write_batches.
+
+    def _insert(self, cursor, insert_sql: str, batch: list) -> None:
+        """ Insert a batch of rows, as fast as the library allows.
+
+        Parameters:
+            cursor: cursor on the target.
+            insert_sql (str): the INSERT statement.
+            batch (list): the rows to insert.
+        Returns:
+        """
+        if self.target.get_db_lib_name() == c.PSYCOPG2:
+            # Many rows per INSERT statement, instead of one statement per row.
+            from psycopg2.extras import execute_values
+            values = '(' + ', '.join(['%s'] * len(batch[0])) + ')'
+            sql = insert_sql[:insert_sql.rindex(' VALUES ')] + ' VALUES %s'
+            execute_values(cursor, sql, batch, template=values,
+                           page_size=len(batch))
+        else:
+            # pymysql turns this into multi-row INSERTs, oracledb sends all
+            # rows in one round trip.
+            cursor.executemany(insert_sql, batch)
+        return
+    # End of method _insert.
+
+    def print_report(self) -> None:
+        """ Print the rows copied and the throughput of the last copy.
+
+        Parameters:
+        Returns:
+        """
+        rate = self.rows_written / self.elapsed if self.elapsed > 0 else 0.0
+        z = ('Read {} rows, wrote {} rows in {:.3f} seconds, {:.0f} rows/sec, '
+             'with {} writer(s).')
+        print(z.format(self.rows_read, self.rows_written, self.elapsed, rate,
+                       self.writers))
+        if self.errors:
+            print('{} writer(s) failed.'.format(len(self.errors)))
+        return
+    # End of method print_report.
+# End of Class TableCopier.
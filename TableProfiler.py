@@ -0,0 +1,301 @@
+""" TableProfiler.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from ConnectionPool import ConnectionPool, DEFAULT_POOL_SIZE
+from DBClient import DBClient
+from OutputWriter import OutputWriter
+import MyQueries as mq
+from functions import is_skip_operation
+from constants import ORACLE, SQLSERVER
+
+# Tables with more rows than this, by the optimizer statistics, are sampled.
+DEFAULT_SAMPLE_THRESHOLD = 1000000
+
+# Rows to sample from a large table, roughly.
+DEFAULT_SAMPLE_ROWS = 100000
+
+# Seed of the samples, so every query of a table sees the same rows.
+SAMPLE_SEED = 42
+
+# Buckets in each histogram, 0 for no histograms.
+DEFAULT_BUCKETS = 10
+
+# Groups of data types (see functions.data_type_group) with distinct counts,
+# and those also with minimum, maximum and histogram.
+DISTINCT_GROUPS = {'NUMBER', 'STRING', 'UNICODE', 'DATETIME', 'BOOLEAN'}
+ORDERED_GROUPS = {'NUMBER', 'STRING', 'UNICODE', 'DATETIME'}
+
+# Data types that cannot be compared or counted distinct, by database type.
+UNCOMPARABLE_TYPES = {
+    ORACLE: ('clob', 'long'),
+    SQLSERVER: ('text', 'xml')}
+
+
+class TableProfiler(object):
+    """ Compute statistics of the columns of tables: row count, fraction of
+        nulls, distinct count, minimum, maximum, and equi-depth histogram.
+        The work is done by the database, with one aggregate query per table
+        and one NTILE query per histogram (see MyQueries.profile_sql), so no
+        rows are fetched.  Tables larger than sample_threshold rows are
+        sampled, to about sample_rows rows, with a repeatable sample, so all
+        the queries of a table see the same rows.  The distinct counts,
+        minimums, maximums and histograms of a sampled table are those of
+        the sample.  Tables are profiled in parallel, each over its own
+        pooled connection.
+
+    Attributes:
+        db_instance: the DBInstance of the database to profile.
+        pool (ConnectionPool): connections the tables are profiled over.
+        sample_threshold (int): tables with more rows than this are sampled.
+        sample_rows (int): rows to sample from a large table, roughly.
+        buckets (int): buckets in each histogram, 0 for no histograms.
+        exact_distinct (bool): if False, distinct counts are approximate
+            (HyperLogLog) in databases with APPROX_COUNT_DISTINCT.
+        profiles (dict): table -> its profile, see profile_table.
+    """
+    def __init__(self, db_instance,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 sample_threshold: int = DEFAULT_SAMPLE_THRESHOLD,
+                 sample_rows: int = DEFAULT_SAMPLE_ROWS,
+                 buckets: int = DEFAULT_BUCKETS,
+                 exact_distinct: bool = False) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            db_instance: the DBInstance of the database to profile.
+            pool_size (int): number of tables profiled at once.
+            sample_threshold (int): tables with more rows than this, by the
+                optimizer statistics, are sampled.
+            sample_rows (int): rows to sample from a large table, roughly.
+            buckets (int): buckets in each histogram, 0 for no histograms.
+            exact_distinct (bool): if True, always count distinct values
+                exactly.
+        Returns:
+        """
+        self.db_instance = db_instance
+        self.pool = ConnectionPool(db_instance, pool_size)
+        self.sample_threshold: int = sample_threshold
+        self.sample_rows: int = max(1, sample_rows)
+        self.buckets: int = max(0, buckets)
+        self.exact_distinct: bool = exact_distinct
+        self.profiles: dict = dict()
+        return
+    # End of method __init__.
+
+    def clean_up(self) -> None:
+        """ Cleans up, in preparation for deletion.
+
+        Parameters:
+        Returns:
+        """
+        self.pool.close()
+        return
+    # End of method clean_up.
+
+    def profile_tables(self, tables: list = None) -> dict:
+        """ Profile tables in parallel.
+
+        Parameters:
+            tables (list): the tables to profile, None for all the tables
+                owned by the current login.
+        Returns:
+            profiles (dict): table -> its profile, see profile_table.
+        """
+        db_type = self.db_instance.get_db_type()
+        if is_skip_operation(mq.profile_sql[mq.DISTINCT, db_type]):
+            print('Cannot profile tables in {}.'.format(db_type))
+            return dict()
+        if tables is None:
+            with self.pool.borrow() as db_instance:
+                db_client = DBClient(db_instance)
+                tables = db_client.get_table_names()
+                db_client.clean_up()
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = [executor.submit(self._profile_pooled, table)
+                       for table in tables]
+            for table, future in zip(tables, futures):
+                self.profiles[table] = future.result()
+        return {table: self.profiles[table] for table in tables}
+    # End of method profile_tables.
+
+    def _profile_pooled(self, table: str) -> dict:
+        """ Profile a table over a pooled connection.
+
+        Parameters:
+            table (str): the table.
+        Returns:
+            profile (dict): see profile_table.
+        """
+        with self.pool.borrow() as db_instance:
+            db_client = DBClient(db_instance)
+            try:
+                return self.profile_table(db_client, table)
+            finally:
+                db_client.clean_up()
+    # End of method _profile_pooled.
+
+    def profile_table(self, db_client, table: str) -> dict:
+        """ Profile one table.
+
+        Parameters:
+            db_client: the DBClient to run the SQL with.
+            table (str): the table.
+        Returns:
+            profile (dict): row_count (estimated from the statistics if
+                sampled), sampled (bool), sample_percent, sample_rows (rows
+                in the sample, or in the table), secs, error ('' if none),
+                and columns: list of dicts with column, data_type, group,
+                null_fraction, distinct, min, max, and histogram (list of
+                bucket low, high, and rows), all from the sample if sampled.
+        """
+        start = perf_counter()
+        db_type = db_client.db_type
+        profile = {'table': table, 'row_count': 0, 'sampled': False,
+                   'sample_percent': 100.0, 'sample_rows': 0, 'secs': 0.0,
+                   'error': '', 'columns': list()}
+        columns = db_client.get_table_columns(table)
+        if not columns:
+            profile['error'] = 'Table not found.'
+            return profile
+
+        # Sample large tables.
+        estimate = db_client.get_table_rows(table)
+        source = table
+        sample = mq.profile_sql[mq.SAMPLE, db_type]
+        if estimate > self.sample_threshold and not is_skip_operation(sample):
+            percent = max(0.0001, min(100.0, round(
+                100.0 * self.sample_rows / estimate, 4)))
+            source = sample.format(table=table, percent=percent,
+                                   seed=SAMPLE_SEED)
+            profile.update(sampled=True, sample_percent=percent)
+
+        # One aggregate query for all the columns.
+        distinct = mq.profile_sql[mq.DISTINCT if self.exact_distinct
+                                  else mq.APPROX_DISTINCT, db_type]
+        select = ['COUNT(*)']
+        for column_name, data_type, group, _ in columns:
+            stats = {'column': column_name, 'data_type': data_type,
+                     'group': group, 'null_fraction': None, 'distinct': None,
+                     'min': None, 'max': None, 'histogram': None}
+            profile['columns'].append(stats)
+            select.append('COUNT({})'.format(column_name))
+            if self._comparable(stats, db_type, DISTINCT_GROUPS):
+                select.append(distinct.format(column=column_name))
+            if self._comparable(stats, db_type, ORDERED_GROUPS):
+                select.append('MIN({})'.format(column_name))
+                select.append('MAX({})'.format(column_name))
+        db_client.set_sql('SELECT {}\nFROM {}'.format(',\n  '.join(select),
+                                                      source))
+        db_client.set_bind_vars(db_client.db_instance.init_bind_vars())
+        _, rows, _ = db_client.run_sql()
+        if db_client.last_error is not None:
+            profile['error'] = str(db_client.last_error)
+            return profile
+        values = iter(rows[0])
+        sample_rows = next(values)
+        profile['sample_rows'] = sample_rows
+        profile['row_count'] = estimate if profile['sampled'] else sample_rows
+        for stats in profile['columns']:
+            not_null = next(values)
+            if sample_rows > 0:
+                stats['null_fraction'] = 1.0 - not_null / sample_rows
+            if self._comparable(stats, db_type, DISTINCT_GROUPS):
+                stats['distinct'] = next(values)
+            if self._comparable(stats, db_type, ORDERED_GROUPS):
+                stats['min'] = next(values)
+                stats['max'] = next(values)
+
+        # Equi-depth histograms.
+        histogram = mq.profile_sql[mq.HISTOGRAM, db_type]
+        if self.buckets > 0 and not is_skip_operation(histogram):
+            for stats in profile['columns']:
+                if not self._comparable(stats, db_type, ORDERED_GROUPS) or \
+                        stats['distinct'] == 0:
+                    continue
+                db_client.set_sql(histogram.format(
+                    column=stats['column'], buckets=self.buckets,
+                    source=source))
+                _, rows, _ = db_client.run_sql()
+                if db_client.last_error is not None:
+                    profile['error'] = str(db_client.last_error)
+                    break
+                stats['histogram'] = [list(row[1:]) for row in rows]
+        profile['secs'] = perf_counter() - start
+        return profile
+    # End of method profile_table.
+
+    @staticmethod
+    def _comparable(stats: dict, db_type: str, groups: set) -> bool:
+        """ Whether a column is in a group of data types, and can be counted
+            distinct and compared.
+
+        Parameters:
+            stats (dict): the column's statistics, with data_type and group.
+            db_type (str): the type of database.
+            groups (set): the groups of data types.
+        Returns:
+            comparable (bool): True if so.
+        """
+        if stats['group'] not in groups:
+            return False
+        data_type = str(stats['data_type']).lower()
+        return not any(name in data_type
+                       for name in UNCOMPARABLE_TYPES.get(db_type, ()))
+    # End of method _comparable.
+
+    def save(self, out_file_name: str) -> None:
+        """ Write the profiles to a JSON file.
+
+        Parameters:
+            out_file_name (str): the file.
+        Returns:
+        """
+        with open(out_file_name, 'w', encoding='utf-8') as f:
+            json.dump(self.profiles, f, indent=2, default=str)
+        return
+    # End of method save.
+
+    def print_report(self) -> None:
+        """ Print the profiles.
+
+        Parameters:
+        Returns:
+        """
+        writer = OutputWriter(out_file_name='', align_col=True, col_sep='|')
+        for table, profile in self.profiles.items():
+            # Distinct counts of a sample are not scaled up to the table.
+            col_names = ['COLUMN', 'DATA_TYPE', 'NULL_FRACTION',
+                         'DISTINCT_IN_SAMPLE' if profile['sampled']
+                         else 'DISTINCT', 'MIN', 'MAX', 'HISTOGRAM_BOUNDS']
+            z = '\nTABLE {}: {} ROWS'.format(table, profile['row_count'])
+            if profile['sampled']:
+                z += ', SAMPLED {}% ({} ROWS)'.format(
+                    profile['sample_percent'], profile['sample_rows'])
+            print(z + ', {:.3f} SECONDS.'.format(profile['secs']))
+            if profile['error'] != '':
+                print('FAILED: {}'.format(profile['error']))
+            rows = list()
+            for stats in profile['columns']:
+                null_fraction = stats['null_fraction']
+                if null_fraction is not None:
+                    null_fraction = '{:.4f}'.format(null_fraction)
+                bounds = stats['histogram']
+                if bounds is not None:
+                    bounds = ' '.join(str(bucket[1]) for bucket in bounds)
+                rows.append((stats['column'], stats['data_type'],
+                             null_fraction, stats['distinct'], stats['min'],
+                             stats['max'], bounds))
+            writer.write_rows(rows, col_names)
+        return
+    # End of method print_report.
+# End of Class TableProfiler.
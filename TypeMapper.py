@@ -0,0 +1,516 @@
+""" TypeMapper.py
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+"""
+import re
+import string
+from datetime import date, datetime
+from decimal import Decimal
+from constants import ACCESS, MYSQL, ORACLE, POSTGRESQL, SQLITE, SQLSERVER
+from constants import DB_TYPES
+
+# Data types in CREATE TABLE, per target database type.
+STRING_TYPE = {
+    ACCESS: 'VARCHAR({})', MYSQL: 'VARCHAR({})', ORACLE: 'VARCHAR2({})',
+    POSTGRESQL: 'VARCHAR({})', SQLITE: 'VARCHAR({})',
+    SQLSERVER: 'VARCHAR({})'}
+UNICODE_TYPE = {
+    ACCESS: 'VARCHAR({})', MYSQL: 'VARCHAR({})', ORACLE: 'NVARCHAR2({})',
+    POSTGRESQL: 'VARCHAR({})', SQLITE: 'VARCHAR({})',
+    SQLSERVER: 'NVARCHAR({})'}
+# Fixed-length strings, where they are stored more compactly than VARCHAR.
+CHAR_TYPE = {
+    ACCESS: 'CHAR({})', MYSQL: 'CHAR({})', ORACLE: 'CHAR({})',
+    POSTGRESQL: None, SQLITE: None, SQLSERVER: 'CHAR({})'}
+NCHAR_TYPE = dict(CHAR_TYPE, **{
+    ORACLE: 'NCHAR({})', SQLSERVER: 'NCHAR({})'})
+# Longest CHAR.
+MAX_CHAR = 255
+# Longest VARCHAR, anything longer or of unknown length is a LONG_STRING.
+MAX_STRING = {
+    ACCESS: 255, MYSQL: 16383, ORACLE: 4000, POSTGRESQL: 10485760,
+    SQLITE: 1000000000, SQLSERVER: 8000}
+MAX_UNICODE = dict(MAX_STRING, **{ORACLE: 2000, SQLSERVER: 4000})
+LONG_STRING_TYPE = {
+    ACCESS: 'MEMO', MYSQL: 'LONGTEXT', ORACLE: 'CLOB', POSTGRESQL: 'TEXT',
+    SQLITE: 'TEXT', SQLSERVER: 'VARCHAR(MAX)'}
+LONG_UNICODE_TYPE = dict(LONG_STRING_TYPE, **{
+    ORACLE: 'NCLOB', SQLSERVER: 'NVARCHAR(MAX)'})
+INTEGER_TYPE = {
+    ACCESS: 'INTEGER', MYSQL: 'INT', ORACLE: 'NUMBER(10)',
+    POSTGRESQL: 'INTEGER', SQLITE: 'INTEGER', SQLSERVER: 'INT'}
+BIGINT_TYPE = {
+    ACCESS: 'DECIMAL(19,0)', MYSQL: 'BIGINT', ORACLE: 'NUMBER(19)',
+    POSTGRESQL: 'BIGINT', SQLITE: 'INTEGER', SQLSERVER: 'BIGINT'}
+# Integer types from narrowest to widest, with the values they hold.
+# Oracle stores NUMBER(p) by digits, SQLite stores integers in as few bytes
+# as they need, whatever the declared type.
+INTEGER_TYPES = {
+    ACCESS: ((0, 255, 'BYTE'), (-2**15, 2**15 - 1, 'SMALLINT'),
+             (-2**31, 2**31 - 1, 'INTEGER')),
+    MYSQL: ((-2**7, 2**7 - 1, 'TINYINT'), (-2**15, 2**15 - 1, 'SMALLINT'),
+            (-2**23, 2**23 - 1, 'MEDIUMINT'), (-2**31, 2**31 - 1, 'INT'),
+            (-2**63, 2**63 - 1, 'BIGINT')),
+    ORACLE: tuple((1 - 10**p, 10**p - 1, 'NUMBER({})'.format(p))
+                  for p in range(1, 39)),
+    POSTGRESQL: ((-2**15, 2**15 - 1, 'SMALLINT'),
+                 (-2**31, 2**31 - 1, 'INTEGER'),
+                 (-2**63, 2**63 - 1, 'BIGINT')),
+    SQLITE: ((-2**63, 2**63 - 1, 'INTEGER'),),
+    SQLSERVER: ((0, 255, 'TINYINT'), (-2**15, 2**15 - 1, 'SMALLINT'),
+                (-2**31, 2**31 - 1, 'INT'), (-2**63, 2**63 - 1, 'BIGINT'))}
+DECIMAL_TYPE = {
+    ACCESS: 'DECIMAL({},{})', MYSQL: 'DECIMAL({},{})',
+    ORACLE: 'NUMBER({},{})', POSTGRESQL: 'NUMERIC({},{})',
+    SQLITE: 'NUMERIC({},{})', SQLSERVER: 'DECIMAL({},{})'}
+# Most digits in a DECIMAL.
+MAX_PRECISION = {
+    ACCESS: 28, MYSQL: 65, ORACLE: 38, POSTGRESQL: 1000, SQLITE: 1000,
+    SQLSERVER: 38}
+# Numbers of unknown precision and scale.
+NUMBER_TYPE = {
+    ACCESS: 'DOUBLE', MYSQL: 'DECIMAL(38,10)', ORACLE: 'NUMBER',
+    POSTGRESQL: 'NUMERIC', SQLITE: 'NUMERIC', SQLSERVER: 'DECIMAL(38,10)'}
+FLOAT_TYPE = {
+    ACCESS: 'DOUBLE', MYSQL: 'DOUBLE', ORACLE: 'BINARY_DOUBLE',
+    POSTGRESQL: 'DOUBLE PRECISION', SQLITE: 'REAL', SQLSERVER: 'FLOAT'}
+DATE_TYPE = {
+    ACCESS: 'DATETIME', MYSQL: 'DATE', ORACLE: 'DATE', POSTGRESQL: 'DATE',
+    SQLITE: 'DATE', SQLSERVER: 'DATE'}
+TIMESTAMP_TYPE = {
+    ACCESS: 'DATETIME', MYSQL: 'DATETIME(6)', ORACLE: 'TIMESTAMP',
+    POSTGRESQL: 'TIMESTAMP', SQLITE: 'TIMESTAMP', SQLSERVER: 'DATETIME2'}
+BOOLEAN_TYPE = {
+    ACCESS: 'YESNO', MYSQL: 'BOOLEAN', ORACLE: 'NUMBER(1)',
+    POSTGRESQL: 'BOOLEAN', SQLITE: 'BOOLEAN', SQLSERVER: 'BIT'}
+BINARY_TYPE = {
+    ACCESS: 'LONGBINARY', MYSQL: 'LONGBLOB', ORACLE: 'BLOB',
+    POSTGRESQL: 'BYTEA', SQLITE: 'BLOB', SQLSERVER: 'VARBINARY(MAX)'}
+# Autoincrement primary key.
+AUTOINCREMENT_KEY_TYPE = {
+    ACCESS: 'COUNTER PRIMARY KEY',
+    MYSQL: 'INT AUTO_INCREMENT PRIMARY KEY',
+    ORACLE: 'NUMBER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY',
+    POSTGRESQL: 'SERIAL PRIMARY KEY',
+    SQLITE: 'INTEGER PRIMARY KEY AUTOINCREMENT',
+    SQLSERVER: 'INT IDENTITY PRIMARY KEY'}
+
+# Numbers in a data type, like the 10 and 2 in "NUMBER(10,2)".
+TYPE_ARGS = re.compile(r'\(\s*(\d+)\s*(,\s*(\d+)\s*)?\)')
+
+# Kinds of values in text, such as a csv file.  Numbers with leading zeros,
+# like zip codes, are strings.
+INTEGER_TEXT = re.compile(r'[+-]?(0|[1-9]\d*)')
+DECIMAL_TEXT = re.compile(r'[+-]?(0|[1-9]\d*)\.(\d+)')
+FLOAT_TEXT = re.compile(r'[+-]?(0|[1-9]\d*)(\.\d+)?[eE][+-]?\d+')
+DATE_TEXT = re.compile(r'\d{4}-\d\d-\d\d')
+TIMESTAMP_TEXT = re.compile(
+    r'\d{4}-\d\d-\d\d[ T]\d\d:\d\d(:\d\d(\.\d{1,6})?)?')
+BOOLEAN_TEXT = {'true', 'false'}
+
+# Kind of a column holding values of two kinds.
+WIDER_KIND = {
+    frozenset({'INTEGER', 'DECIMAL'}): 'DECIMAL',
+    frozenset({'INTEGER', 'FLOAT'}): 'FLOAT',
+    frozenset({'DECIMAL', 'FLOAT'}): 'FLOAT',
+    frozenset({'DATE', 'TIMESTAMP'}): 'TIMESTAMP'}
+
+# Characters kept in column names made from column headings.
+NAME_CHARS = set(string.ascii_lowercase + string.digits + '_ ')
+
+
+def column_name(heading: str) -> str:
+    """ Make a column name from a column heading, such as in a csv file:
+        lower case, "#" spelled "num", spaces as underscores, and only
+        letters, digits and underscores.
+
+    Parameters:
+        heading (str): the column heading.
+    Returns:
+        name (str): the column name.
+    """
+    heading = heading.lower().replace('#', 'num')
+    return ''.join(char for char in heading
+                   if char in NAME_CHARS).replace(' ', '_')
+# End of function column_name.
+
+
+def profile_columns(headings: list, rows) -> list:
+    """ Profile the columns of rows of text, such as from a csv file.
+
+    Parameters:
+        headings (list): the column headings, made into column names.
+        rows: iterable of lists of strings.  Values past the last heading
+            are ignored.
+    Returns:
+        profiles (list): a ColumnProfile per column.
+    """
+    profiles = [ColumnProfile(column_name(heading)) for heading in headings]
+    for row in rows:
+        for profile, value in zip(profiles, row):
+            profile.add(value)
+    return profiles
+# End of function profile_columns.
+
+
+class ColumnProfile(object):
+    """ What the values of a column of text, such as from a csv file, hold,
+        to choose its tightest data type.  Empty values are nulls.
+
+    Attributes:
+        name (str): the column name.
+        kind (str): 'NULL' (only nulls so far), 'BOOLEAN', 'INTEGER',
+            'DECIMAL', 'FLOAT', 'DATE', 'TIMESTAMP' or 'STRING'.
+        rows (int): values seen.
+        nullable (bool): True if any value was empty.
+        min_int (int): smallest integer, None if none.
+        max_int (int): largest integer, None if none.
+        digits (int): most digits before the decimal point.
+        scale (int): most digits after the decimal point, ignoring trailing
+            zeros.
+        min_len (int): length of the shortest non-empty value, None if none.
+        max_len (int): length of the longest value.
+        unicode (bool): True if any value is not ASCII.
+    """
+    def __init__(self, name: str) -> None:
+        """ Constructor method for this class.
+
+        Parameters:
+            name (str): the column name.
+        Returns:
+        """
+        self.name: str = name
+        self.kind: str = 'NULL'
+        self.rows: int = 0
+        self.nullable: bool = False
+        self.min_int = None
+        self.max_int = None
+        self.digits: int = 0
+        self.scale: int = 0
+        self.min_len = None
+        self.max_len: int = 0
+        self.unicode: bool = False
+        return
+    # End of method __init__.
+
+    def add(self, value: str) -> None:
+        """ Add a value to the profile.
+
+        Parameters:
+            value (str): the value, as text.
+        Returns:
+        """
+        self.rows += 1
+        length = len(value)
+        if length > self.max_len:
+            self.max_len = length
+        if not self.unicode and not value.isascii():
+            self.unicode = True
+        value = value.strip()
+        if value == '':
+            self.nullable = True
+            return
+        if self.min_len is None or length < self.min_len:
+            self.min_len = length
+        if self.kind == 'STRING':
+            # Nothing is wider.
+            return
+        kind = self._kind_of(value)
+        if kind != self.kind:
+            if self.kind == 'NULL':
+                self.kind = kind
+            else:
+                self.kind = WIDER_KIND.get(frozenset({kind, self.kind}),
+                                           'STRING')
+        return
+    # End of method add.
+
+    def _kind_of(self, value: str) -> str:
+        """ Find the kind of a non-empty value, and update the ranges of
+            numbers.
+
+        Parameters:
+            value (str): the value, stripped.
+        Returns:
+            kind (str): its kind, see kind.
+        """
+        if INTEGER_TEXT.fullmatch(value):
+            number = int(value)
+            if self.min_int is None or number < self.min_int:
+                self.min_int = number
+            if self.max_int is None or number > self.max_int:
+                self.max_int = number
+            self.digits = max(self.digits, len(value.lstrip('+-')))
+            return 'INTEGER'
+        m = DECIMAL_TEXT.fullmatch(value)
+        if m is not None:
+            self.digits = max(self.digits, len(m.group(1)))
+            self.scale = max(self.scale, len(m.group(2).rstrip('0')))
+            return 'DECIMAL'
+        if FLOAT_TEXT.fullmatch(value):
+            return 'FLOAT'
+        if value.lower() in BOOLEAN_TEXT:
+            return 'BOOLEAN'
+        try:
+            if DATE_TEXT.fullmatch(value):
+                date.fromisoformat(value)
+                return 'DATE'
+            if TIMESTAMP_TEXT.fullmatch(value):
+                datetime.fromisoformat(value)
+                return 'TIMESTAMP'
+        except ValueError:
+            pass
+        return 'STRING'
+    # End of method _kind_of.
+# End of Class ColumnProfile.
+
+
+class TypeMapper(object):
+    """ Choose data types for CREATE TABLE in a type of database, from
+        column profiles of text (see ColumnProfile), or from data types in
+        the data dictionary of another database.  Columns of text get the
+        tightest native types that hold their values, so rows are smaller,
+        more fit in a page, and scans are faster.  Matching converters parse
+        each value once, in the client, so the database does not cast it.
+
+    Attributes:
+        db_type (str): the type of database, one of constants.DB_TYPES.
+    """
+    def __init__(self, db_type: str) -> None:
+        """ Constructor method for this class.  Exits on an unknown database
+            type.
+
+        Parameters:
+            db_type (str): the type of database to create tables in.
+        Returns:
+        """
+        if db_type not in DB_TYPES:
+            print('Unknown database type "{}".'.format(db_type))
+            exit(1)
+        self.db_type: str = db_type
+        return
+    # End of method __init__.
+
+    def native_type(self, profile: ColumnProfile) -> str:
+        """ The tightest data type for a profiled column.
+
+        Parameters:
+            profile (ColumnProfile): the column's profile.
+        Returns:
+            data_type (str): the data type.
+        """
+        db_type = self.db_type
+        kind = profile.kind
+        if kind == 'INTEGER':
+            for low, high, data_type in INTEGER_TYPES[db_type]:
+                if low <= profile.min_int and profile.max_int <= high:
+                    return data_type
+            kind = 'DECIMAL'
+        if kind == 'DECIMAL':
+            precision = profile.digits + profile.scale
+            if precision > MAX_PRECISION[db_type]:
+                return NUMBER_TYPE[db_type]
+            return DECIMAL_TYPE[db_type].format(max(1, precision),
+                                                profile.scale)
+        elif kind == 'FLOAT':
+            return FLOAT_TYPE[db_type]
+        elif kind == 'BOOLEAN':
+            return BOOLEAN_TYPE[db_type]
+        elif kind == 'DATE':
+            return DATE_TYPE[db_type]
+        elif kind == 'TIMESTAMP':
+            return TIMESTAMP_TYPE[db_type]
+        elif kind == 'STRING':
+            if profile.unicode:
+                char_type, types, long_types, most = \
+                    NCHAR_TYPE, UNICODE_TYPE, LONG_UNICODE_TYPE, MAX_UNICODE
+            else:
+                char_type, types, long_types, most = \
+                    CHAR_TYPE, STRING_TYPE, LONG_STRING_TYPE, MAX_STRING
+            size = profile.max_len
+            if size > most[db_type]:
+                return long_types[db_type]
+            if profile.min_len == size and size <= MAX_CHAR and \
+                    not profile.nullable and char_type[db_type] is not None:
+                return char_type[db_type].format(size)
+            return types[db_type].format(size)
+        # Only nulls: any text.
+        return LONG_STRING_TYPE[db_type]
+    # End of method native_type.
+
+    def create_table_sql(self, table: str, profiles: list,
+                         typed: bool = True, primary_key: str = '') -> str:
+        """ Write the CREATE TABLE statement for profiled columns.
+
+        Parameters:
+            table (str): name of the table.
+            profiles (list): the ColumnProfile of each column.
+            typed (bool): if False, all columns are nullable text.
+            primary_key (str): name of an autoincrement primary key column
+                to add first, '' for none.
+        Returns:
+            sql (str): the CREATE TABLE statement.
+        """
+        col_specs = list()
+        if primary_key != '':
+            col_specs.append('{} {}'.format(
+                primary_key, AUTOINCREMENT_KEY_TYPE[self.db_type]))
+        for profile in profiles:
+            if not typed:
+                col_specs.append('{} {}'.format(
+                    profile.name, LONG_STRING_TYPE[self.db_type]))
+                continue
+            spec = '{} {}'.format(profile.name, self.native_type(profile))
+            if not profile.nullable and profile.kind != 'NULL':
+                spec += ' NOT NULL'
+            col_specs.append(spec)
+        return 'CREATE TABLE {} (\n  {})'.format(table,
+                                                 ',\n  '.join(col_specs))
+    # End of method create_table_sql.
+
+    def converter(self, profile: ColumnProfile):
+        """ Function converting the text values of a profiled column into
+            values of its data type, for the db library to bind.  Empty
+            values become None.
+
+        Parameters:
+            profile (ColumnProfile): the column's profile.
+        Returns:
+            converter: function of one str.
+        """
+        db_type = self.db_type
+        kind = profile.kind
+        parse = None
+        if kind == 'INTEGER':
+            parse = int
+            if db_type == SQLITE and (profile.min_int < -2**63 or
+                                      profile.max_int >= 2**63):
+                parse = float
+        elif kind == 'DECIMAL':
+            # sqlite3 cannot bind Decimals.
+            parse = float if db_type == SQLITE else Decimal
+        elif kind == 'FLOAT':
+            parse = float
+        elif kind == 'BOOLEAN':
+            # Oracle and SQLite store booleans as numbers.
+            as_number = db_type in (ORACLE, SQLITE)
+
+            def parse(value: str):
+                is_true = (value.lower() == 'true')
+                return int(is_true) if as_number else is_true
+        elif kind == 'DATE' and db_type != SQLITE:
+            parse = date.fromisoformat
+        elif kind == 'TIMESTAMP' and db_type != SQLITE:
+            parse = datetime.fromisoformat
+
+        if parse is None:
+            # Text, kept as it is.
+            def convert(value: str):
+                return value if value.strip() != '' else None
+        else:
+            def convert(value: str):
+                value = value.strip()
+                return parse(value) if value != '' else None
+        return convert
+    # End of method converter.
+
+    def converters(self, profiles: list) -> list:
+        """ Converters for profiled columns, see converter.
+
+        Parameters:
+            profiles (list): the ColumnProfile of each column.
+        Returns:
+            converters (list): a converter per column.
+        """
+        return [self.converter(profile) for profile in profiles]
+    # End of method converters.
+
+    @staticmethod
+    def convert_rows(converters: list, rows) -> list:
+        """ Convert rows of text values with converters.
+
+        Parameters:
+            converters (list): a converter per column, from converters.
+            rows: iterable of lists of strings.
+        Returns:
+            rows (list): list of tuples of converted values.
+        """
+        return [tuple(convert(value) for convert, value in
+                      zip(converters, row)) for row in rows]
+    # End of method convert_rows.
+
+    def source_type(self, data_type: str, group: str,
+                    source_db_type: str) -> str:
+        """ Translate a column's data type from the data dictionary of a
+            source database into a data type for CREATE TABLE in this type
+            of database.
+
+        Parameters:
+            data_type (str): the data type in the source database.
+            group (str): its group, from functions.data_type_group.
+            source_db_type (str): the type of the source database.
+        Returns:
+            data_type (str): the data type for this type of database.
+        """
+        target_db_type = self.db_type
+        data_type_low = data_type.lower()
+        m = TYPE_ARGS.search(data_type)
+        size = int(m.group(1)) if m is not None else None
+        scale = int(m.group(3)) if m is not None and m.group(3) else None
+
+        if group in {'STRING', 'UNICODE'}:
+            if size is None or size > MAX_STRING[target_db_type] or \
+                    data_type_low.find('lob') > -1:
+                types = LONG_STRING_TYPE if group == 'STRING' else \
+                    LONG_UNICODE_TYPE
+                return types[target_db_type]
+            types = STRING_TYPE if group == 'STRING' else UNICODE_TYPE
+            return types[target_db_type].format(size)
+        elif group == 'NUMBER':
+            if data_type_low.find('bigint') > -1:
+                return BIGINT_TYPE[target_db_type]
+            elif data_type_low.find('int') > -1:
+                # SQLite INTEGER may be 64 bits.
+                if source_db_type == SQLITE:
+                    return BIGINT_TYPE[target_db_type]
+                return INTEGER_TYPE[target_db_type]
+            elif data_type_low.find('money') > -1 or \
+                    data_type_low.find('currency') > -1:
+                return DECIMAL_TYPE[target_db_type].format(19, 4)
+            elif (data_type_low.find('float') > -1 or
+                  data_type_low.find('real') > -1 or
+                  data_type_low.find('double') > -1):
+                return FLOAT_TYPE[target_db_type]
+            elif size is not None:
+                if scale is None:
+                    scale = 0
+                if scale == 0 and size <= 9:
+                    return INTEGER_TYPE[target_db_type]
+                elif scale == 0 and size <= 18:
+                    return BIGINT_TYPE[target_db_type]
+                return DECIMAL_TYPE[target_db_type].format(size, scale)
+            return NUMBER_TYPE[target_db_type]
+        elif group == 'DATETIME':
+            if data_type_low.find('year') > -1:
+                return INTEGER_TYPE[target_db_type]
+            elif data_type_low.find('interval') > -1:
+                return STRING_TYPE[target_db_type].format(64)
+            elif data_type_low == 'date' and source_db_type != ORACLE:
+                # Oracle DATEs include the time.
+                return DATE_TYPE[target_db_type]
+            return TIMESTAMP_TYPE[target_db_type]
+        elif group == 'BOOLEAN':
+            return BOOLEAN_TYPE[target_db_type]
+        elif group == 'BINARY':
+            return BINARY_TYPE[target_db_type]
+        # Anything else, such as SQLite columns with no declared type, and
+        # types peculiar to one database, is copied as text.
+        return LONG_STRING_TYPE[target_db_type]
+    # End of method source_type.
+# End of Class TypeMapper.
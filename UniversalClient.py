@@ -20,10 +20,11 @@ ORACLE OK
 """
 # -------- IMPORTS
 
+import json
 from DBClient import DBClient
 from OutputWriter import OutputWriter
 from DBInstance import DBInstance
-from functions import os_python_version_info, sql_cmdline
+from functions import os_name, os_python_version_info, sql_cmdline_stream
 from constants import ACCESS, MYSQL, ORACLE, POSTGRESQL, SQLITE, SQLSERVER
 import constants as c
 
@@ -81,14 +82,18 @@ sample_db_path[SQLITE] = home + sample_db_path[SQLITE]
 # -------- MAIN PROGRAM
 
 
-def main() -> None:
+def main(verbose: bool = True) -> None:
     """ Code to execute.
 
     Parameters:
+        verbose (bool): if True, print OS and Python version info.
     Returns:
     """
     # OS AND PYTHON VERSION STUFF
-    os, py_version_major, py_version_minor = os_python_version_info()
+    if verbose:
+        os, py_version_major, py_version_minor = os_python_version_info()
+    else:
+        os = os_name()
 
     # GET DATABASE CONNECTION INFO TO USE.
     prompt = "Enter the number for the database type you want:"
@@ -224,15 +229,19 @@ def main() -> None:
         z = '\nRUNNING THESE COMMANDS IN {} COMMAND-LINE CLIENT:\n{}'
         print(z.format(db_client_exe, client_cmds))
         cmdline_list = db_instance1.get_cmdline_list()
-        sql_out = sql_cmdline(cmdline_list, client_cmds)
 
-        # SHOW OUTPUT FROM RUNNING ABOVE COMMANDS IN DB COMMAND-LINE CLIENT.
+        # SHOW OUTPUT FROM RUNNING ABOVE COMMANDS IN DB COMMAND-LINE CLIENT,
+        # AS IT IS WRITTEN.
         # Don't use write_rows, output often not all columnar, will cause crash.
-        if len(sql_out) > 0:
-            z = '\nTHE OUTPUT FROM RUNNING COMMANDS IN {} COMMAND-LINE CLIENT:'
-            print(z.format(db_client_exe))
-            for line in sql_out:
-                print(line)
+        any_output = False
+        for line in sql_cmdline_stream(cmdline_list, client_cmds):
+            if not any_output:
+                z = ('\nTHE OUTPUT FROM RUNNING COMMANDS IN {} '
+                     'COMMAND-LINE CLIENT:')
+                print(z.format(db_client_exe))
+                any_output = True
+            print(line)
+        if any_output:
             print('ALL DONE WITH {} COMMAND-LINE CLIENT.'.format(db_client_exe))
 
     # DONE WITH COMMANDS IN DATABASE COMMAND-LINE CLIENT.
@@ -241,36 +250,22 @@ def main() -> None:
         print("\nLET'S RUN THE SAME SQL THROUGH A DB API 2.0 LIBRARY")
     else:
         print("\nLET'S RUN SOME SQL THROUGH A DB API 2.0 LIBRARY")
-    paramstyle2 = db_instance1.get_paramstyle()
 
     # SQL & BIND VARIABLES TO EXECUTE THROUGH DB API 2.0 LIBRARY.
-    query2 = ''
-    bind_vars2 = ''
-    if paramstyle2 == c.NOBINDVARS:
-        # MS Access does not support bind variables/parameterization.
-        query2 = query.format("'CHEVY FOSTER'", "35.0", terminator='')
-    elif paramstyle2 == c.NAMED:
-        # oracle/oracledb and sqlite/sqlite3.
-        query2 = query.format(':actor', ':price', terminator='')
-        bind_vars2 = {'actor': 'CHEVY FOSTER', 'price': 35.0}
-    elif paramstyle2 == c.PYFORMAT:
-        # mysql/pymysql and postgresql/psycopg2.
-        query2 = query.format("%(actor)s", "%(price)s", terminator='')
-        bind_vars2 = {'actor': 'CHEVY FOSTER', 'price': 35.0}
-    elif paramstyle2 == c.QMARK:
-        # sqlserver/pyodbc.
-        query2 = query.format('?', '?', terminator='')
-        bind_vars2 = ('CHEVY FOSTER', 35.0)
+    # Written once with :name bind variables, which DBClient translates into
+    # the parameter style of the database library.  MS Access does not
+    # support bind variables/parameterization, so it gets literals instead.
+    query2 = query.format(':actor', ':price', terminator='')
+    my_db_client.set_portable_sql(query2, {'actor': 'CHEVY FOSTER',
+                                           'price': 35.0})
 
     # SHOW THE SQL & BIND VARIABLES TO EXECUTE THROUGH DB API 2.0 LIBRARY.
-    print("\nHERE'S THE SQL:\n{}".format(query2))
-    my_db_client.set_sql(query2)
-    if len(bind_vars2) > 0:
-        print('HERE ARE THE BIND VARIABLES:\n{}'.format(bind_vars2))
-        my_db_client.set_bind_vars(bind_vars2)
+    print("\nHERE'S THE SQL:\n{}".format(my_db_client.sql))
+    if my_db_client.bind_vars:
+        print('HERE ARE THE BIND VARIABLES:\n{}'.format(
+            my_db_client.bind_vars))
     else:
         print('NO BIND VARIABLES.\n')
-        my_db_client.set_bind_vars(bind_vars2)
 
     # EXECUTE THE SQL & BIND VARIABLES THROUGH DB API 2.0 LIBRARY.
     print('\nGETTING THE OUTPUT OF THAT SQL:')
@@ -299,5 +294,130 @@ def main() -> None:
 # End of function main.
 
 
+def batch_main(argv: list = None) -> int:
+    """ Run a SQL script without prompting, for scheduled jobs.
+
+    Parameters:
+        argv (list): command line arguments, None for sys.argv[1:].
+    Returns:
+        failures (int): number of statements that failed.
+    """
+    from argparse import ArgumentParser
+    from BatchRunner import BatchRunner, TEXT, JSONL
+
+    parser = ArgumentParser(description='Universal database client.  With '
+                            '--script, runs a SQL script without prompting.')
+    parser.add_argument('--script', default='',
+                        help='SQL script file, split into statements as '
+                             'the command line client of the database type '
+                             'would split it.  A line "--@bind <JSON>" sets '
+                             'bind variables for the next statement.')
+    parser.add_argument('--profile', required=True,
+                        help='JSON connection profile, with keys db_type, '
+                             'db_path, username, password, hostname, '
+                             'port_num and instance.')
+    parser.add_argument('--out-dir', default='',
+                        help='Folder for one output file per statement.  '
+                             'Default: standard output.')
+    parser.add_argument('--format', default=TEXT, choices=[TEXT, JSONL],
+                        help='Output format.')
+    parser.add_argument('--col-sep', default='|',
+                        help='Column separator for text output.')
+    parser.add_argument('--no-align', action='store_true',
+                        help='Do not pad text output to align columns.')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='Run the next statement while writing the output '
+                             'of the previous one.')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Seconds a statement may run before it is '
+                             'cancelled and counted as failed.  Default: '
+                             'no limit.')
+    parser.add_argument('--explain', action='store_true',
+                        help='Capture the plan of each statement, flag full '
+                             'scans of large tables and plan changes, and '
+                             'print the plans at the end.')
+    parser.add_argument('--plan-file', default='',
+                        help='With --explain, JSON file keeping the plans, '
+                             'to detect plan changes between runs.')
+    parser.add_argument('--advise-indexes', action='store_true',
+                        help='Propose indexes for the statements in the '
+                             'script, and print them at the end.')
+    parser.add_argument('--profile-tables', nargs='*', default=None,
+                        metavar='TABLE',
+                        help='Print row counts, null fractions, distinct '
+                             'counts, minimums, maximums and histograms of '
+                             'the columns of these tables, or of all tables '
+                             'if none are named.')
+    parser.add_argument('--profile-out', default='',
+                        help='With --profile-tables, JSON file to write the '
+                             'statistics to.')
+    args = parser.parse_args(argv)
+    if args.script == '' and args.profile_tables is None:
+        parser.error('--script or --profile-tables is required.')
+
+    with open(args.profile, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    db_type = profile.get('db_type', '')
+    if db_type not in c.DB_TYPES:
+        print('UNKNOWN DATABASE TYPE "{}".'.format(db_type))
+        return 1
+
+    db_instance = DBInstance(os_name(),
+                             db_type,
+                             profile.get('db_path', ''),
+                             profile.get('username', ''),
+                             profile.get('password', ''),
+                             profile.get('hostname', ''),
+                             int(profile.get('port_num', 0)),
+                             profile.get('instance', ''),
+                             lazy_connect=True)
+    runner = BatchRunner(db_instance, out_dir=args.out_dir,
+                         out_format=args.format, col_sep=args.col_sep,
+                         align_col=not args.no_align,
+                         pipelined=args.pipelined,
+                         timeout=args.timeout)
+    plan_cache = None
+    if args.explain:
+        from PlanCache import PlanCache
+        plan_cache = PlanCache(state_file=args.plan_file)
+        runner.db_client.set_plan_cache(plan_cache)
+    workload = None
+    if args.advise_indexes:
+        from IndexAdvisor import Workload
+        workload = Workload()
+        runner.db_client.set_workload(workload)
+    failures = 0
+    if args.script != '':
+        failures = runner.run_script(args.script)
+        runner.print_report()
+    if plan_cache is not None:
+        plan_cache.print_report()
+        plan_cache.clean_up()
+    if workload is not None:
+        from IndexAdvisor import IndexAdvisor
+        advisor = IndexAdvisor(db_instance)
+        advisor.advise(workload)
+        advisor.print_report()
+        advisor.clean_up()
+    if args.profile_tables is not None:
+        from TableProfiler import TableProfiler
+        profiler = TableProfiler(db_instance)
+        profiler.profile_tables(args.profile_tables or None)
+        profiler.print_report()
+        if args.profile_out != '':
+            profiler.save(args.profile_out)
+        profiler.clean_up()
+
+    # CLEAN UP.
+    runner.clean_up()
+    db_instance.close_connection(del_cursors=True)
+    return failures
+# End of function batch_main.
+
+
 if __name__ == '__main__':
-    main()
+    import sys
+    if len(sys.argv) > 1:
+        exit(1 if batch_main() > 0 else 0)
+    else:
+        main()
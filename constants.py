@@ -57,6 +57,32 @@ DB_CLIENT_EXES = {
     SQLITE: 'sqlite3',
     SQLSERVER: 'sqlcmd'}
 
+# COMMANDS FOR A PERSISTENT SESSION OF A DATABASE CLIENT EXECUTABLE.
+# Run when the session starts.
+DB_CLIENT_SETUP = {
+    MYSQL: '',
+    ORACLE: ('SET SQLPROMPT ""\n'
+             'SET SQLNUMBER OFF\n'
+             'SET TRIMOUT ON\n'
+             'SET TAB OFF\n'),
+    POSTGRESQL: '',
+    SQLITE: '',
+    SQLSERVER: ''}
+# Print a marker line ("{}"), to find the end of the output of a statement.
+DB_CLIENT_ECHO = {
+    MYSQL: "SELECT '{}' AS marker;\n",
+    ORACLE: 'PROMPT {}\n',
+    POSTGRESQL: '\\echo {}\n',
+    SQLITE: '.print {}\n',
+    SQLSERVER: "PRINT '{}'\ngo\n"}
+# End the session.
+DB_CLIENT_EXIT = {
+    MYSQL: '\\quit\n',
+    ORACLE: 'exit\n',
+    POSTGRESQL: '\\quit\n',
+    SQLITE: '.exit\n',
+    SQLSERVER: 'exit\n'}
+
 # PARAMETERIZATION/BIND VARIABLE FORMAT USED HERE.
 NAMED = 'named'
 PYFORMAT = 'pyformat'
@@ -68,3 +94,13 @@ PARAMSTYLE_FOR_LIB = {
     PYMYSQL: PYFORMAT,
     PYODBC: QMARK,
     SQLITE3: NAMED}
+
+# FETCH TUNING.  ROWS FETCHED PER ROUND TRIP TO THE DATABASE SERVER.
+# Used for cursor.arraysize in all libraries, for cursor.prefetchrows in
+# oracledb, and for cursor.itersize in server-side psycopg2 cursors.
+DEFAULT_ARRAYSIZE = 1000
+DEFAULT_PREFETCH_ROWS = 1000
+# Limits and byte target for tuning arraysize from the observed row width.
+MIN_ARRAYSIZE = 100
+MAX_ARRAYSIZE = 50000
+FETCH_TARGET_BYTES = 4 * 1024 * 1024
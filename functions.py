@@ -8,14 +8,15 @@ VERSION: 0.7.6
 
 DATE: Jul 9, 2020
 """
+import re
 import sys
+from functools import lru_cache
 from traceback import print_exception
 from MyQueries import NOT_IMPLEMENTED, NOT_POSSIBLE_SQL
-from platform import uname, python_implementation
-from struct import calcsize
-from os import pathsep, environ, scandir
-from os.path import exists
-from subprocess import Popen, PIPE
+from constants import ORACLE, SQLSERVER, NAMED, PYFORMAT, QMARK
+from os import pathsep, environ, stat
+# platform, struct and subprocess are imported where used, to save startup
+# time when they are not needed.
 
 
 def print_stacktrace() -> None:
@@ -45,6 +46,83 @@ def is_skip_operation(sql: str) -> bool:
 # End of function is_skip_operation.
 
 
+def data_type_group(data_type: str, db_type: str) -> str:
+    """ Find the group of a data type, as described in a database's data
+        dictionary.  Used in DBClient.py and TableCopier.py.
+
+    Parameters:
+        data_type (str): the data type, such as "varchar(20)" or "NUMBER".
+        db_type (str): the type of database the data type is from.
+    Returns:
+        data_type_group (str): 'UNICODE', 'BINARY', 'STRING', 'NUMBER',
+            'DATETIME', 'BOOLEAN', 'OTHER', or 'NOT FOUND'.
+    """
+    if data_type is None:
+        data_type = ''
+    data_type_low = data_type.lower()
+    if data_type == 'NOT FOUND':
+        group = data_type
+    elif ((data_type_low.find('nchar') > -1) or
+          (data_type_low.find('nvarchar') > -1) or
+          (data_type_low.find('nclob') > -1)):
+        group = 'UNICODE'
+    elif ((data_type_low.find('bit') > -1 and db_type != SQLSERVER) or
+          (data_type_low.find('raw') > -1) or
+          (data_type_low.find('image') > -1) or
+          (data_type_low.find('binary') > -1) or
+          (data_type_low.find('blob') > -1) or
+          (data_type_low.find('byte') > -1 and db_type != ORACLE)):
+        # Includes Oracle Long Raw, listed before Long.
+        # Image is Sql server
+        group = 'BINARY'
+    elif ((data_type_low.find('char') > -1) or
+          (data_type_low.find('text') > -1) or
+          (data_type_low.find('long') > -1) or
+          (data_type_low.find('clob') > -1)):
+        group = 'STRING'
+    elif ((data_type_low.find('int') > -1) or
+          (data_type_low.find('number') > -1) or
+          (data_type_low.find('numeric') > -1) or
+          (data_type_low.find('decimal') > -1) or
+          (data_type_low.find('real') > -1) or
+          (data_type_low.find('float') > -1) or
+          (data_type_low.find('double') > -1) or
+          (data_type_low.find('money') > -1) or
+          (data_type_low.find('currency') > -1)):
+        group = 'NUMBER'
+    elif ((data_type_low.find('date') > -1) or
+          (data_type_low.find('time') > -1) or
+          (data_type_low.find('interval') > -1) or
+          (data_type_low.find('year') > -1)):
+        group = 'DATETIME'
+    elif ((data_type_low.find('bool') > -1) or
+          (data_type_low.find('bit') > -1 and db_type == SQLSERVER)):
+        group = 'BOOLEAN'
+    else:
+        group = 'OTHER'
+    return group
+# End of function data_type_group.
+
+
+def os_name() -> str:
+    """ Find the OS this is running on, without the cost of platform.uname.
+
+    Parameters:
+    Returns:
+        os (str): 'Windows', 'Linux', or 'Darwin'
+    """
+    if sys.platform.startswith('win'):
+        return 'Windows'
+    elif sys.platform == 'darwin':
+        return 'Darwin'
+    elif sys.platform.startswith('linux'):
+        return 'Linux'
+    else:
+        from platform import system
+        return system()
+# End of function os_name.
+
+
 def os_python_version_info() -> (str, int, int):
     """ Method to print OS and Python version info.
         Only used in UniversalClient*.py.
@@ -55,6 +133,9 @@ def os_python_version_info() -> (str, int, int):
         Python major version (int): 2 or 3
         Python minor version (int)
     """
+    from platform import uname, python_implementation
+    from struct import calcsize
+
     q = ('OS: {}\nHost Name: {}\nOS Major Version: {}\nOS Full Version: {}'
          '\nProcessor Type: {}\nProcessor: {}')
     u = uname()
@@ -70,9 +151,76 @@ def os_python_version_info() -> (str, int, int):
 # End of function os_python_version_info.
 
 
+# Cache for find_executable.  Key: (os, lower case filename).
+# Value: (PATH, modification times of the folders in PATH, path found).
+_executable_cache = dict()
+
+
+def find_executable(os: str, filename: str) -> str:
+    """ Find the full path of an executable in PATH, like shutil.which.
+        Results are cached, and a cached result is reused until PATH or the
+        modification time of a folder in PATH changes.
+        Used in DBInstance.py, and anything else that runs a db command line
+        client (sqlplus, psql, sqlcmd, sqlite3, mysqlsh).
+
+    Parameters:
+        os (str): 'Windows', 'Linux', or 'Darwin'
+        filename (str): the name of the executable to find in PATH.
+    Returns:
+        exe_path (str): full path of the executable, or '' if not found.
+    """
+    path = environ.get('PATH', '')
+    # Ignore the current folder, as is_file_in_path always did.
+    folders = [folder for folder in path.split(pathsep)
+               if folder not in {'', '.'}]
+    mtimes = tuple(_folder_mtime(folder) for folder in folders)
+
+    key = (os, filename.lower())
+    cached = _executable_cache.get(key)
+    if cached is not None and cached[0] == path and cached[1] == mtimes:
+        return cached[2]
+
+    from shutil import which
+    if os == 'Windows' and not filename.lower().endswith('.exe'):
+        filename += '.exe'
+    exe_path = which(filename, path=pathsep.join(folders))
+    if exe_path is None:
+        exe_path = ''
+    _executable_cache[key] = (path, mtimes, exe_path)
+    return exe_path
+# End of function find_executable.
+
+
+def _folder_mtime(folder: str):
+    """ Modification time of a folder, which changes when files are added to
+        it or removed from it.  Only used in find_executable.
+
+    Parameters:
+        folder (str): the folder.
+    Returns:
+        mtime (int): modification time in nanoseconds, or None if the folder
+            does not exist.
+    """
+    try:
+        return stat(folder).st_mtime_ns
+    except OSError:
+        return None
+# End of function _folder_mtime.
+
+
+def clear_executable_cache() -> None:
+    """ Forget all the results of find_executable.
+
+    Parameters:
+    Returns:
+    """
+    _executable_cache.clear()
+    return
+# End of function clear_executable_cache.
+
+
 def is_file_in_path(os: str, filename: str) -> bool:
     """ Method to find if file in PATH.
-        Only used in DBInstance.py.
 
     Parameters:
         os (str): 'Windows', 'Linux', or 'Darwin'
@@ -80,21 +228,7 @@ def is_file_in_path(os: str, filename: str) -> bool:
     Returns:
         found (bool): whether or not the file was found in PATH.
     """
-    filename = filename.lower()
-    if os == 'Windows':
-        filename += '.exe'
-
-    found = False
-    for folder in environ['PATH'].split(pathsep):
-        if folder not in {'', '.'}:
-            # Ignore invalid folders in PATH.
-            if exists(folder):
-                for f in scandir(folder):
-                    if f.is_file():
-                        if f.name.lower() == filename:
-                            found = True
-                            break
-    return found
+    return find_executable(os, filename) != ''
 # End of function is_file_in_path.
 
 
@@ -145,6 +279,14 @@ def pick_one(choices: list, choice_type: str) -> int:
 # End of function pick_one.
 
 
+# MySQL Shell warning, written to stderr, to ignore.
+MYSQLSH_PASSWORD_WARNING = ('WARNING: Using a password on the command line '
+                            'interface can be insecure.')
+
+# Seconds a command line client may take to exit after its output ends.
+CLIENT_EXIT_WAIT = 10
+
+
 def sql_cmdline(cmdline_list: list, sql: str) -> list:
     """ Run SQL against database using command line client.
 
@@ -154,6 +296,8 @@ def sql_cmdline(cmdline_list: list, sql: str) -> list:
     Returns:
         sql_output (list): rows of output.
     """
+    from subprocess import Popen, PIPE
+
     if cmdline_list[0] == 'Error':
         print(cmdline_list[1])
         return list()
@@ -162,8 +306,7 @@ def sql_cmdline(cmdline_list: list, sql: str) -> list:
     (stdout, stderr) = p.communicate(sql.encode('utf-8'))
     stderr = stderr.decode('utf-8').split("\n")
     # MySQL warning to ignore.
-    z = [('WARNING: Using a password on the command line interface can be '
-          'insecure.'), '']
+    z = [MYSQLSH_PASSWORD_WARNING, '']
     if len(stderr) > 0 and stderr != [''] and stderr != z:
         print("PROBLEM IN SQL_CMDLINE:")
         print('cmd: ', cmdline_list)
@@ -174,6 +317,113 @@ def sql_cmdline(cmdline_list: list, sql: str) -> list:
 # End of function sql_cmdline.
 
 
+def sql_cmdline_stream(cmdline_list: list, sql: str, timeout: float = None):
+    """ Run SQL against database using command line client, and yield its
+        output one line at a time, as the client writes it.  Unlike
+        sql_cmdline, the output is never all held in memory.  The SQL is
+        written to the client's stdin on one thread, while stderr is read and
+        filtered on another.  If the generator is closed before the output
+        ends, or the timeout expires, the client is killed.  After the output
+        ends, the client has CLIENT_EXIT_WAIT seconds to exit, and a nonzero
+        exit status is reported with its stderr.
+
+    Parameters:
+        cmdline_list (list): the list of commands for Popen.
+        sql (str): text of the SQL to run.
+        timeout (float): seconds to let the client run, None for no limit.
+    Returns:
+        line (str): yields rows of output, without line endings.
+    """
+    from subprocess import Popen, PIPE, TimeoutExpired
+    from threading import Thread, Timer
+
+    if cmdline_list[0] == 'Error':
+        print(cmdline_list[1])
+        return
+
+    p = Popen(cmdline_list, stdin=PIPE, stdout=PIPE, stderr=PIPE,
+              encoding='utf-8', errors='replace', bufsize=1)
+
+    def write_stdin() -> None:
+        # Client may exit before reading all its input.
+        try:
+            p.stdin.write(sql)
+        except OSError:
+            pass
+        finally:
+            try:
+                p.stdin.close()
+            except OSError:
+                pass
+        return
+
+    stderr = list()
+
+    def read_stderr() -> None:
+        for err_line in p.stderr:
+            err_line = err_line.rstrip('\r\n')
+            if err_line not in {'', MYSQLSH_PASSWORD_WARNING}:
+                stderr.append(err_line)
+        return
+
+    timed_out = list()
+
+    def kill_on_timeout() -> None:
+        timed_out.append(True)
+        p.kill()
+        return
+
+    writer = Thread(target=write_stdin, daemon=True)
+    reader = Thread(target=read_stderr, daemon=True)
+    writer.start()
+    reader.start()
+    timer = None
+    if timeout is not None:
+        timer = Timer(timeout, kill_on_timeout)
+        timer.daemon = True
+        timer.start()
+
+    output_ended = False
+    try:
+        for line in p.stdout:
+            yield line.rstrip('\r\n')
+        output_ended = True
+    finally:
+        killed = False
+        if output_ended:
+            # Let the client finish exiting, to get its exit status.
+            try:
+                p.wait(timeout=CLIENT_EXIT_WAIT)
+            except TimeoutExpired:
+                killed = True
+        elif p.poll() is None:
+            # Generator closed before the output ended: cancel the client.
+            killed = True
+        if killed:
+            p.kill()
+        p.wait()
+        if timer is not None:
+            timer.cancel()
+        p.stdout.close()
+        writer.join()
+        reader.join()
+        p.stderr.close()
+        if timed_out:
+            print('SQL_CMDLINE_STREAM TIMED OUT AFTER {} SECONDS.'.format(
+                timeout))
+        elif output_ended and killed:
+            print('SQL_CMDLINE_STREAM: CLIENT KILLED, STILL RUNNING {} SECONDS'
+                  ' AFTER ITS OUTPUT ENDED.'.format(CLIENT_EXIT_WAIT))
+        if len(stderr) > 0 or (output_ended and p.returncode != 0):
+            print("PROBLEM IN SQL_CMDLINE_STREAM:")
+            print('cmd: ', cmdline_list)
+            print('sql: ', sql)
+            print('exit status: ', p.returncode)
+            print('stderr: ', stderr)
+    return
+# End of function sql_cmdline_stream.
+
+
 def quote_a_string(quote_me: str) -> str:
     """ Enclose a string in single quotes, after escaping slashes and single
         quotes.
@@ -186,3 +436,126 @@ def quote_a_string(quote_me: str) -> str:
     quote_me2 = quote_me.replace("'", "''")
     return "'" + quote_me2 + "'"
 # End of function quote_a_string.
+
+
+def sql_literal(value) -> str:
+    """ Write a value as a SQL literal, for databases with no bind variables
+        (Microsoft Access).
+
+    Parameters:
+        value: a number, string, date or datetime, or None.  Anything else,
+            such as bytes, raises TypeError, and NaN or infinity raises
+            ValueError, since they have no SQL literal.
+    Returns:
+        literal (str): the value as a SQL literal.
+    """
+    from datetime import date, datetime
+    from decimal import Decimal
+    from math import isfinite
+    if value is None:
+        return 'NULL'
+    elif isinstance(value, bool):
+        return str(int(value))
+    elif isinstance(value, datetime):
+        # Access date literal.
+        return '#' + value.isoformat(sep=' ') + '#'
+    elif isinstance(value, date):
+        return '#' + value.isoformat() + '#'
+    elif isinstance(value, str):
+        return quote_a_string(value)
+    elif isinstance(value, int):
+        return str(value)
+    elif isinstance(value, (float, Decimal)):
+        if not isfinite(value):
+            raise ValueError('No SQL literal for {}.'.format(value))
+        return str(value)
+    raise TypeError('No SQL literal for type {}.'.format(
+        type(value).__name__))
+# End of function sql_literal.
+
+
+# Number of SQL texts kept translated into a parameter style.
+PORTABLE_SQL_CACHE_SIZE = 256
+
+# Bind variables in portable SQL, written :name, found outside string
+# literals, quoted identifiers and comments.  "::" is a PostgreSQL cast.
+PORTABLE_BIND_VAR = re.compile(
+    r"'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/|::|:([A-Za-z_]\w*)",
+    re.DOTALL)
+
+
+@lru_cache(maxsize=PORTABLE_SQL_CACHE_SIZE)
+def compile_portable_sql(sql: str, paramstyle: str) -> (str, tuple, tuple):
+    """ Translate SQL with bind variables written :name into a parameter
+        style.  Cached, so translating the same SQL again is a dict lookup.
+
+    Parameters:
+        sql (str): the SQL, with bind variables written :name.
+        paramstyle (str): the parameter style, from DBInstance.get_paramstyle.
+    Returns:
+        native_sql (str): the SQL in the parameter style, '' for NOBINDVARS.
+        names (tuple): the names of the bind variables, in order of
+            appearance, repeated if they appear more than once.
+        parts (tuple): the SQL before, between and after the bind variables,
+            to put literals between for NOBINDVARS.
+    """
+    parts = list()
+    names = list()
+    start = 0
+    for match in PORTABLE_BIND_VAR.finditer(sql):
+        if match.group(1) is not None:
+            parts.append(sql[start:match.start()])
+            names.append(match.group(1))
+            start = match.end()
+    parts.append(sql[start:])
+    if len(names) == 0:
+        # Run without bind variables, so nothing to translate.
+        return sql, tuple(), tuple(parts)
+
+    if paramstyle == NAMED:
+        placeholders = [':' + name for name in names]
+    elif paramstyle == PYFORMAT:
+        # With bind variables, every % is a placeholder unless doubled.
+        parts = [part.replace('%', '%%') for part in parts]
+        placeholders = ['%(' + name + ')s' for name in names]
+    elif paramstyle == QMARK:
+        placeholders = ['?'] * len(names)
+    else:
+        return '', tuple(names), tuple(parts)
+    native_sql = parts[0] + ''.join(placeholder + part for placeholder, part
+                                    in zip(placeholders, parts[1:]))
+    return native_sql, tuple(names), tuple(parts)
+# End of function compile_portable_sql.
+
+
+def portable_to_native(sql: str, paramstyle: str, values: dict) -> (str,
+                                                                    object):
+    """ Translate SQL with bind variables written :name, and their values,
+        into a parameter style.  For qmark, the values are put in the order
+        their bind variables appear in.  For NOBINDVARS (Microsoft Access),
+        the values are put into the SQL as SQL literals, see sql_literal for
+        the errors it raises.  Raises KeyError if a bind variable in the SQL
+        has no value.
+
+    Parameters:
+        sql (str): the SQL, with bind variables written :name.
+        paramstyle (str): the parameter style, from DBInstance.get_paramstyle.
+        values (dict): the value of each bind variable, by name.  Values not
+            in the SQL are ignored.
+    Returns:
+        native_sql (str): the SQL in the parameter style.
+        bind_vars: dict or tuple of bind variables, for
+            DBClient.set_bind_vars.  None for NOBINDVARS.
+    """
+    native_sql, names, parts = compile_portable_sql(sql, paramstyle)
+    if paramstyle in {NAMED, PYFORMAT}:
+        bind_vars = {name: values[name] for name in names}
+    elif paramstyle == QMARK:
+        bind_vars = tuple(values[name] for name in names)
+    else:
+        literals = [sql_literal(values[name]) for name in names]
+        native_sql = parts[0] + ''.join(literal + part for literal, part
+                                        in zip(literals, parts[1:]))
+        bind_vars = None
+    return native_sql, bind_vars
+# End of function portable_to_native.
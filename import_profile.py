@@ -0,0 +1,105 @@
+""" import_profile.py
+
+SUMMARY: Summarize "python -X importtime" for the universal database client,
+         and check total import time against a budget.
+
+REPOSITORY: https://github.com/DavidJLambert/Python-Universal-DB-Client
+
+AUTHOR: David J. Lambert
+
+VERSION: 0.7.6
+
+DATE: Jul 9, 2020
+
+Usage:
+    python import_profile.py [module] [budget_ms] [top_n]
+
+Exits with status 1 if importing the module takes more than budget_ms, or
+if it imports a database library: they are imported only when DBInstance
+first connects.
+"""
+import sys
+from os.path import dirname, abspath
+from subprocess import run, PIPE
+
+# Default module to profile, and its import time budget in milliseconds.
+DEFAULT_MODULE = 'UniversalClient'
+DEFAULT_BUDGET_MS = 100.0
+DEFAULT_TOP_N = 15
+
+# Database libraries, which must not be imported at startup.
+DB_LIBRARIES = {'sqlite3', '_sqlite3', 'psycopg2', 'pymysql', 'oracledb',
+                'pyodbc'}
+
+
+def import_times(module: str) -> list:
+    """ Import a module in a fresh interpreter with "-X importtime".
+
+    Parameters:
+        module (str): name of the module to import.
+    Returns:
+        times (list): tuples of (self microseconds, cumulative microseconds,
+            imported module name), in the order python reports them.
+    """
+    cmd = [sys.executable, '-X', 'importtime', '-c', 'import ' + module]
+    result = run(cmd, stdout=PIPE, stderr=PIPE, cwd=dirname(abspath(__file__)),
+                 universal_newlines=True)
+    if result.returncode != 0:
+        print(result.stderr)
+        print('Failed to import {}.'.format(module))
+        exit(1)
+
+    times = list()
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:   1234 |   5678 |   name".
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Header line.
+            continue
+        times.append((int(fields[0]), int(fields[1]), fields[2].rstrip()))
+    return times
+# End of function import_times.
+
+
+def main() -> None:
+    """ Code to execute.
+
+    Parameters:
+    Returns:
+    """
+    module = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODULE
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BUDGET_MS
+    top_n = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_TOP_N
+
+    times = import_times(module)
+    # The module itself is reported last, with the cumulative total.
+    total_ms = times[-1][1] / 1000
+
+    print('Slowest {} imports for "import {}":'.format(top_n, module))
+    print('{:>10} {:>10}  {}'.format('self ms', 'cumul ms', 'module'))
+    for self_us, cumul_us, name in sorted(times, key=lambda x: -x[0])[:top_n]:
+        print('{:10.1f} {:10.1f}  {}'.format(self_us / 1000, cumul_us / 1000,
+                                            name.strip()))
+    print('\nTotal import time: {:.1f} ms, budget {:.1f} ms.'.format(
+        total_ms, budget_ms))
+    db_libraries = sorted({name.strip().split('.')[0] for _, _, name in times
+                           if name.strip().split('.')[0] in DB_LIBRARIES})
+    failed = False
+    if total_ms > budget_ms:
+        print('OVER BUDGET.')
+        failed = True
+    if db_libraries:
+        print('DATABASE LIBRARIES IMPORTED AT STARTUP: {}.'.format(
+            ', '.join(db_libraries)))
+        failed = True
+    if failed:
+        exit(1)
+    print('Within budget.')
+    return
+# End of function main.
+
+
+if __name__ == '__main__':
+    main()
@@ -12,14 +12,27 @@ For more information, see README.rst.
 """
 
 import sqlite3
-import string
-import csv
+import sys
+from os.path import abspath, dirname
 import tkinter as tk
 from tkinter import filedialog
 
-keep = string.ascii_lowercase + string.digits + "_ "
+# MmapCSVReader is in the parent directory.
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+from CSVSniffer import CSVSniffer
+from MmapCSVReader import MmapCSVReader
+from TypeMapper import TypeMapper, profile_columns
+from constants import SQLITE
+
 ts_dict = {0: 'Single-threaded', 1: 'Multi-threaded', 3: 'Serialized'}
 commit_frequency = 25
+# A checkpoint is saved with each commit, so an interrupted import can resume after the last row committed.
+checkpoint_create = ("CREATE TABLE IF NOT EXISTS import_checkpoint (table_name TEXT, csv_file TEXT, "
+                     "byte_offset BIGINT, row_count BIGINT, PRIMARY KEY (table_name, csv_file))")
+checkpoint_select = "SELECT byte_offset, row_count FROM import_checkpoint WHERE table_name = ? AND csv_file = ?"
+checkpoint_save = ("INSERT INTO import_checkpoint (table_name, csv_file, byte_offset, row_count) VALUES (?, ?, ?, ?) "
+                   "ON CONFLICT (table_name, csv_file) DO UPDATE "
+                   "SET byte_offset = excluded.byte_offset, row_count = excluded.row_count")
 table_exists_select = "SELECT COUNT(name) FROM sqlite_master WHERE type='table' AND name = ?"
 
 # Get name & location of csv & DB files.  filedialog.askopenfilename is fragile, have to do this here.
@@ -39,9 +52,21 @@ if db_path == "":
 else:
     new_db = False
 
+# Sniff the format of the csv file from samples of it.
+sniffer = CSVSniffer(csv_file_path)
+print(f"Sniffed the csv file in {1000*sniffer.secs:.1f} ms.  {sniffer.describe()}")
+if not sniffer.ascii_compatible or sniffer.line_terminator == "\r":
+    print("Cannot import this csv file, convert it to UTF-8 with '\\n' or '\\r\\n' line terminators.  Exiting.")
+    exit(1)
+if not sniffer.has_header:
+    print("The first line does not look like column headings, it will be used as such.")
+
 # Get the column delimiter.
-delimiter = input("Enter the delimiter used to separate columns (or 'tab' for tab): ").strip()
-if delimiter.lower() == "tab":
+delimiter = input(f"Enter the delimiter used to separate columns (or 'tab' for tab), "
+                  f"or press Enter for {sniffer.delimiter!r}: ").strip()
+if delimiter == "":
+    delimiter = sniffer.delimiter
+elif delimiter.lower() == "tab":
     delimiter = "\t"
 
 # Create new table, or use existing one?
@@ -57,15 +82,19 @@ new_table = (choice == '1')
 # Enter SQL for create table, or auto-create from csv file column headings.
 if new_table:
     choice = ""
-    while choice not in ('A', 'B'):
+    while choice not in ('A', 'B', 'C'):
         choice = input("\nYou are creating a new table.\n"
                        "Enter 'A' if you will enter the SQL to create it.\n"
                        "Enter 'B' to have 1 autoincrement primary key,\n"
                        "1 varchar column per csv file column,\n"
-                       "with the varchar column names taken from the csv column headings: ")
+                       "with the varchar column names taken from the csv column headings.\n"
+                       "Enter 'C' for the same, but with each column of the tightest data type for its values,\n"
+                       "found by reading the whole csv file first: ")
     enter_SQL = (choice == 'A')
+    typed = (choice == 'C')
 else:
     enter_SQL = False
+    typed = False
 
 # Make connection to database.
 connection = sqlite3.connect(database=db_path, timeout=10, isolation_level='DEFERRED')
@@ -88,6 +117,10 @@ print(f"Isolation level: '{connection.isolation_level}' (Not in DB-API 2.0).  "
 cursor = connection.cursor()
 print("\nCreated cursor.")
 
+# Create the table of checkpoints, if it does not exist.
+cursor.execute(checkpoint_create)
+connection.commit()
+
 if not enter_SQL:
     table_name = input("Enter the name of the table to import into: ").strip().lower()
 
@@ -113,78 +146,105 @@ else:
     cursor.execute(table_exists_select, (table_name,))
     rows = cursor.fetchall()
     table_exists = (int(rows[0][0]) != 0)
-    if table_exists:
-        print("That table already exists.  Exiting.")
-        exit(1)
+
+# Look for the checkpoint of an earlier import of this file into this table.
+cursor.execute(checkpoint_select, (table_name, csv_file_path))
+rows = cursor.fetchall()
+if len(rows) > 0 and table_exists:
+    checkpoint_offset, rows_done = int(rows[0][0]), int(rows[0][1])
+else:
+    checkpoint_offset, rows_done = 0, 0
+resuming = (checkpoint_offset > 0)
+
+if enter_SQL and table_exists and not resuming:
+    print("That table already exists.  Exiting.")
+    exit(1)
 
 # Execute CREATE TABLE statement.
-if enter_SQL:
+if enter_SQL and not resuming:
     cursor.execute(SQL)
     connection.commit()
 
-with open(file=csv_file_path, encoding="utf8", newline='') as csv_file:
-    csv_reader = csv.reader(csv_file, delimiter=delimiter)
-    for line_number, row in enumerate(csv_reader):
-        if line_number == 0:
-            # Make column headings uppercase.
-
-            if new_table and not enter_SQL:
-                # Construct CREATE TABLE statement.
-                column_list = []
-                create_table_sql = []
-                create_table_sql.append(table_name + "_pkey INTEGER PRIMARY KEY AUTOINCREMENT")
-                for column in row:
-                    column = column.lower().replace("#", "num")
-                    new_column = ""
-                    for char in column:
-                        if char in keep:
-                            new_column += char
-                    column = new_column.replace(" ", "_")
-                    create_table_sql.append(column + " TEXT")
-                    column_list.append(column)
-                create_table_sql = ',\n '.join(create_table_sql)
-                create_table_sql = f"CREATE TABLE {table_name}\n({create_table_sql})"
-
-                print("\nSQL for creating the table:\n" + create_table_sql)
-
-                # Execute CREATE TABLE statement.
-                cursor.execute(create_table_sql)
-                connection.commit()
-            else:
-                # Get names of columns of existing table.
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                column_list = []
-                rows = cursor.fetchall()
-                for row in rows:
-                    column_list.append(row[1])
-
-            # Construct bind variables expression.
-            columns = ", ".join(column_list)
-
-            insert_values_bind = ["?"]*len(column_list)
-            insert_values_bind = "( " + ", ".join(insert_values_bind) + " )"
-
-            # Construct the SQL insert.
-            insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES {insert_values_bind}"
-
-            print("\nSQL for inserting records:\n" + insert_sql)
+# The csv file is memory-mapped, records are found on the raw bytes, and each batch of rows between commits is
+# decoded and parsed at once.  The reader gives the byte offset just past each batch, for the checkpoints.
+csv_reader = MmapCSVReader(csv_file_path, delimiter=delimiter, quotechar=sniffer.quotechar,
+                           encoding=sniffer.encoding)
+try:
+    # The first line of the file contains the column headings, after any byte order mark.
+    header_offset, row = next(csv_reader.rows(start=len(sniffer.bom)), (0, None))
+    if row is None:
+        print("The csv file is empty.  Exiting.")
+        exit(1)
+
+    converters = None
+    if new_table and not enter_SQL:
+        # Construct CREATE TABLE statement.
+        mapper = TypeMapper(SQLITE)
+        if typed:
+            # Find the values of each column, to choose its data type and parse its values before inserting them.
+            print("\nReading the csv file to find the data types of its columns.")
+            data_rows = (data_row for _, rows in csv_reader.batches(10000, start=header_offset) for data_row in rows)
+            profiles = profile_columns(row, data_rows)
+            converters = mapper.converters(profiles)
         else:
-            # The remaining lines of the file contain column values.
-            # Construct list of values to be inserted.
-            values_list = []
-            for column in row:
-                values_list.append(column)
-            values_tuple = tuple(values_list)
-
-            # Do the insert using bind variables.
-            cursor.execute(insert_sql, values_tuple)
-            if line_number % commit_frequency == 0:
-                connection.commit()
-            if line_number % (10*commit_frequency) == 0:
-                print(f"Inserted {line_number} records.")
-
-# Commit any remaining inserts.
-connection.commit()
+            profiles = profile_columns(row, [])
+        column_list = [profile.name for profile in profiles]
+        create_table_sql = mapper.create_table_sql(table_name, profiles, typed=typed, primary_key=table_name + "_pkey")
+
+        if not resuming:
+            print("\nSQL for creating the table:\n" + create_table_sql)
+
+            # Execute CREATE TABLE statement.
+            cursor.execute(create_table_sql)
+            connection.commit()
+    else:
+        # Get names of columns of existing table, except the primary key this program adds, which fills itself in.
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        column_list = []
+        rows = cursor.fetchall()
+        for row in rows:
+            if row[1].lower() != table_name.lower() + "_pkey":
+                column_list.append(row[1])
+
+    # Construct bind variables expression.
+    columns = ", ".join(column_list)
+
+    insert_values_bind = ["?"]*len(column_list)
+    insert_values_bind = "( " + ", ".join(insert_values_bind) + " )"
+
+    # Construct the SQL insert.
+    insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES {insert_values_bind}"
+
+    print("\nSQL for inserting records:\n" + insert_sql)
+
+    # Skip the rows already imported.
+    byte_offset = header_offset
+    if resuming:
+        print(f"\nResuming after record {rows_done}, at byte {checkpoint_offset} of the csv file.")
+        byte_offset = checkpoint_offset
+
+    # The remaining lines of the file contain column values, inserted commit_frequency rows at a time.
+    line_number = rows_done
+    for byte_offset, rows in csv_reader.batches(commit_frequency, start=byte_offset):
+        # Do the inserts using bind variables.
+        if converters is None:
+            cursor.executemany(insert_sql, [tuple(row) for row in rows])
+        else:
+            cursor.executemany(insert_sql, TypeMapper.convert_rows(converters, rows))
+        line_number += len(rows)
+
+        # Save the checkpoint in the same transaction as the rows.
+        cursor.execute(checkpoint_save, (table_name, csv_file_path, byte_offset, line_number))
+        connection.commit()
+        if line_number % (10*commit_frequency) < len(rows):
+            print(f"Inserted {line_number} records.")
+
+    # Commit the final checkpoint.
+    # Running this again imports only rows added to the end of the csv file.
+    cursor.execute(checkpoint_save, (table_name, csv_file_path, byte_offset, line_number))
+    connection.commit()
+finally:
+    csv_reader.close()
 print(f"Inserted a total of {line_number} records.")
 
 # Finish up.